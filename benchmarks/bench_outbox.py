@@ -0,0 +1,41 @@
+"""Benchmarks for outbox emission and webhook delivery."""
+
+import pytest
+from common.models import OutboxEvent, WebhookEndpoint
+from common.services.outbox import emit_event, emit_events, process_pending_events
+from common.utils import uuid7
+
+BATCH = 100
+
+
+def _event():
+    return {
+        "aggregate_type": "UploadFile",
+        "aggregate_id": str(uuid7()),
+        "event_type": "file.stored",
+        "payload": {"size_bytes": 1024, "sha256": "0" * 64},
+    }
+
+
+@pytest.mark.django_db
+def test_emit_event(benchmark):
+    def emit():
+        e = _event()
+        return emit_event(
+            e["aggregate_type"], e["aggregate_id"], e["event_type"], e["payload"]
+        )
+
+    benchmark(emit)
+
+
+@pytest.mark.django_db
+def test_process_pending_events(benchmark, webhook_server):
+    WebhookEndpoint.objects.create(url=webhook_server, secret="bench")
+
+    def setup():
+        emit_events([_event() for _ in range(BATCH)])
+        return (), {"batch_size": BATCH}
+
+    result = benchmark.pedantic(process_pending_events, setup=setup, rounds=10)
+    assert result["delivered"] == BATCH
+    assert not OutboxEvent.objects.filter(status=OutboxEvent.Status.PENDING).exists()
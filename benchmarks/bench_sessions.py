@@ -0,0 +1,52 @@
+"""Benchmarks for portal chunked upload session services."""
+
+import hashlib
+import itertools
+
+import pytest
+from portal.models import UploadSession
+from portal.services.sessions import (
+    complete_upload_session,
+    record_upload_part,
+    record_upload_parts,
+    start_upload_session,
+)
+
+CHUNK = 1024
+
+
+def _staged(part_number):
+    return {
+        "part_number": part_number,
+        "offset_bytes": (part_number - 1) * CHUNK,
+        "size_bytes": CHUNK,
+        "sha256": hashlib.sha256(str(part_number).encode()).hexdigest(),
+        "temp_storage_key": "",
+    }
+
+
+@pytest.mark.django_db
+def test_record_upload_part(benchmark, user):
+    session = start_upload_session(user, "bench.bin", 10_000 * CHUNK, CHUNK)
+    numbers = itertools.count(1)
+
+    def record():
+        n = next(numbers)
+        staged = _staged(n)
+        return record_upload_part(
+            session, n, staged["offset_bytes"], CHUNK, sha256=staged["sha256"]
+        )
+
+    benchmark.pedantic(record, rounds=1000)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("parts", [10, 1_000, 10_000])
+def test_complete_upload_session(benchmark, user, parts):
+    def setup():
+        session = start_upload_session(user, "bench.bin", parts * CHUNK, CHUNK)
+        record_upload_parts(session, [_staged(n) for n in range(1, parts + 1)])
+        return (session,), {}
+
+    session = benchmark.pedantic(complete_upload_session, setup=setup, rounds=3)
+    assert session.status == UploadSession.Status.COMPLETE
@@ -0,0 +1,63 @@
+"""Benchmarks for portal upload services."""
+
+import os
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from portal.models import UploadBatch, UploadFile
+from portal.services.uploads import (
+    compute_sha256,
+    create_batch,
+    create_upload_file,
+    finalize_batch,
+    recompute_batch_counters,
+)
+
+KB = 1024
+MB = 1024 * KB
+SIZES = [
+    pytest.param(KB, id="1KB"),
+    pytest.param(MB, id="1MB"),
+    pytest.param(50 * MB, id="50MB"),
+]
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("size", SIZES)
+def test_create_upload_file(benchmark, user, size):
+    content = os.urandom(size)
+
+    def setup():
+        return (user, SimpleUploadedFile("bench.pdf", content)), {}
+
+    upload = benchmark.pedantic(create_upload_file, setup=setup, rounds=5)
+    assert upload.status == UploadFile.Status.STORED
+
+
+@pytest.mark.parametrize("size", SIZES)
+def test_compute_sha256(benchmark, size):
+    file = SimpleUploadedFile("bench.pdf", os.urandom(size))
+    assert len(benchmark(compute_sha256, file)) == 64
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("count", [10, 10_000])
+def test_finalize_batch(benchmark, user, count):
+    batch = create_batch(user)
+    UploadFile.objects.bulk_create(
+        UploadFile(
+            batch=batch,
+            uploaded_by=user,
+            file=f"uploads/bench/{i}.pdf",
+            original_filename=f"{i}.pdf",
+            content_type="application/pdf",
+            size_bytes=1,
+            status=UploadFile.Status.STORED,
+        )
+        for i in range(count)
+    )
+    # bulk_create bypasses the services that maintain the batch counters
+    recompute_batch_counters([batch.pk])
+
+    batch = benchmark(finalize_batch, batch)
+    assert batch.status == UploadBatch.Status.COMPLETE
@@ -0,0 +1,42 @@
+"""Shared fixtures for the Doorito benchmark suite.
+
+Benchmarks live in ``bench_*.py`` files, which the default test run does
+not collect; run them with ``make bench``. ``loadtest.py`` (the
+``doorito loadtest`` client) sits alongside, and its ``test_loadtest.py``
+runs with the default test suite. They use whatever database
+``DATABASE_URL`` points at (SQLite by default, or a local Postgres) and
+never touch the network: webhooks go to a server on 127.0.0.1.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _storage_dirs(tmp_path, settings):
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.FILE_UPLOAD_SESSION_DIR = tmp_path / "sessions"
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope="session")
+def webhook_server():
+    """A local HTTP server accepting webhook POSTs; yields its URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _WebhookHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    yield f"http://{host}:{port}/hook"
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,424 @@
+"""Load test client: simulate concurrent uploaders over HTTP.
+
+Drives a running Doorito's ``/uploads/`` API with N simulated clients on
+one asyncio event loop, each with its own ``httpx.AsyncClient`` (and so
+its own login session). A client repeatedly either posts a batch upload
+or runs a chunked session: create, send parts, resume from the status
+endpoint, complete. Failures can be injected (truncated parts, dropped
+parts that must be resumed) and transient errors are retried. Latency,
+status and bytes are recorded per endpoint. Used by ``doorito loadtest``.
+"""
+
+import asyncio
+import math
+import random
+import re
+import time
+from collections import Counter, defaultdict
+
+import httpx
+
+SIZE_UNITS = {"": 1, "B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3}
+LOGIN_URL = "/app/login/"
+# Statuses worth retrying: the request may succeed if sent again
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+
+class LoadTestError(Exception):
+    """Raised when a simulated client cannot run at all (e.g. login fails)."""
+
+
+def parse_size(text):
+    """Parse a size such as ``"512"``, ``"64KB"`` or ``"1.5MB"`` into bytes.
+
+    Raises:
+        ValueError: If the text is not a size.
+    """
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*", text.upper())
+    if not match:
+        raise ValueError(f"Invalid size: {text!r}")
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2)])
+
+
+def parse_distribution(spec):
+    """Parse a file-size distribution spec into a sampler.
+
+    Specs:
+        ``fixed:1MB`` -- always the same size.
+        ``uniform:1KB-10MB`` -- uniform between two sizes.
+        ``lognormal:1MB,1.0`` -- log-normal with the given median and sigma.
+        ``choice:1KB,1MB,50MB`` -- one of the listed sizes, equally likely.
+
+    Returns:
+        A callable taking a ``random.Random`` and returning a size in
+        bytes (at least 1).
+
+    Raises:
+        ValueError: If the spec is not recognized.
+    """
+    kind, _, args = spec.partition(":")
+    kind = kind.strip().lower()
+    if kind == "fixed":
+        size = parse_size(args)
+        return lambda rng: max(1, size)
+    if kind == "uniform":
+        low, _, high = args.partition("-")
+        low, high = parse_size(low), parse_size(high)
+        if low > high:
+            raise ValueError(f"Invalid range in {spec!r}")
+        return lambda rng: max(1, rng.randint(low, high))
+    if kind == "lognormal":
+        median, _, sigma = args.partition(",")
+        mu, sigma = math.log(parse_size(median)), float(sigma or 1.0)
+        return lambda rng: max(1, int(rng.lognormvariate(mu, sigma)))
+    if kind == "choice":
+        sizes = [parse_size(s) for s in args.split(",")]
+        return lambda rng: max(1, rng.choice(sizes))
+    raise ValueError(
+        f"Invalid size distribution {spec!r}; "
+        "use fixed:, uniform:, lognormal: or choice:"
+    )
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an ascending list (0 if empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class _Recorder:
+    """Collects per-endpoint latencies, errors and bytes sent."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = Counter()
+        self.injected = Counter()
+        self.bytes_sent = Counter()
+        self.statuses = defaultdict(Counter)
+        self.outcomes = Counter()
+        self.dropped_parts = 0
+
+    def record(self, endpoint, seconds, status, ok, sent, injected=False):
+        self.latencies[endpoint].append(seconds)
+        self.statuses[endpoint][str(status)] += 1
+        self.bytes_sent[endpoint] += sent
+        if injected:
+            self.injected[endpoint] += 1
+        elif not ok:
+            self.errors[endpoint] += 1
+
+    def report(self, clients, seconds):
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            requests = len(values)
+            endpoints[endpoint] = {
+                "requests": requests,
+                "errors": self.errors[endpoint],
+                "error_rate": self.errors[endpoint] / requests,
+                "injected": self.injected[endpoint],
+                "statuses": dict(self.statuses[endpoint]),
+                "bytes_sent": self.bytes_sent[endpoint],
+                "p50_ms": percentile(values, 50) * 1000,
+                "p90_ms": percentile(values, 90) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": values[-1] * 1000,
+            }
+        requests = sum(e["requests"] for e in endpoints.values())
+        errors = sum(e["errors"] for e in endpoints.values())
+        sent = sum(self.bytes_sent.values())
+        return {
+            "clients": clients,
+            "seconds": seconds,
+            "requests": requests,
+            "errors": errors,
+            "error_rate": errors / requests if requests else 0.0,
+            "requests_per_sec": requests / seconds if seconds else 0.0,
+            "bytes_sent": sent,
+            "throughput_bytes_per_sec": sent / seconds if seconds else 0.0,
+            "uploads": dict(self.outcomes),
+            "dropped_parts": self.dropped_parts,
+            "endpoints": endpoints,
+        }
+
+
+class _SimulatedClient:
+    """One uploader: a logged-in httpx session running upload scenarios."""
+
+    def __init__(self, http, recorder, rng, options):
+        self.http = http
+        self.recorder = recorder
+        self.rng = rng
+        self.options = options
+
+    async def request(self, endpoint, method, url, expect, sent=0, **kwargs):
+        """Send a request, retrying transient failures; return the response.
+
+        Returns None when the request failed for good.
+        """
+        for attempt in range(self.options["max_retries"] + 1):
+            started = time.perf_counter()
+            try:
+                response = await self.http.request(method, url, **kwargs)
+            except httpx.HTTPError:
+                status, response = "error", None
+            else:
+                status = response.status_code
+            ok = status in expect
+            self.recorder.record(
+                endpoint, time.perf_counter() - started, status, ok, sent
+            )
+            if ok or status not in RETRY_STATUSES | {"error"}:
+                return response if ok else None
+            await asyncio.sleep(min(2**attempt * 0.1, 2.0))
+        return None
+
+    async def login(self, username, password):
+        await self.http.get(LOGIN_URL)
+        response = await self.request(
+            "POST " + LOGIN_URL,
+            "POST",
+            LOGIN_URL,
+            expect={302},
+            data={
+                "username": username,
+                "password": password,
+                "csrfmiddlewaretoken": self.http.cookies.get("csrftoken", ""),
+            },
+        )
+        if response is None:
+            raise LoadTestError(f"Login failed for {username}.")
+        # Django rotates the CSRF token on login
+        self.http.headers["X-CSRFToken"] = self.http.cookies.get("csrftoken", "")
+
+    async def upload_batch(self):
+        files = []
+        for i in range(self.options["files_per_batch"]):
+            size = self.options["sizes"](self.rng)
+            files.append(
+                (
+                    "files",
+                    (
+                        f"load-{i}.bin",
+                        self.rng.randbytes(size),
+                        "application/octet-stream",
+                    ),
+                )
+            )
+        sent = sum(len(f[1][1]) for f in files)
+        response = await self.request(
+            "POST /uploads/files/",
+            "POST",
+            "/uploads/files/",
+            expect={201},
+            sent=sent,
+            files=files,
+        )
+        self.recorder.outcomes["batch" if response is not None else "failed"] += 1
+
+    def _part_body(self, seed, part_number, size):
+        return random.Random(f"{seed}:{part_number}").randbytes(size)
+
+    async def send_part(self, session, seed, part_number):
+        chunk = session["chunk_size_bytes"]
+        offset = (part_number - 1) * chunk
+        size = min(chunk, session["total_size_bytes"] - offset)
+        url = f"/uploads/sessions/{session['id']}/parts/{part_number}"
+        endpoint = "PUT /uploads/sessions/:id/parts/:n"
+        headers = {"Content-Type": "application/octet-stream"}
+
+        if self.rng.random() < self.options["failure_rate"]:
+            if self.rng.random() < 0.5:
+                # Dropped: the client must notice via status and resume
+                self.recorder.dropped_parts += 1
+                return
+            # Truncated body: the server must reject it, then the real retry
+            started = time.perf_counter()
+            try:
+                response = await self.http.put(
+                    url,
+                    content=self._part_body(seed, part_number, size)[:-1],
+                    headers=headers,
+                )
+                status = response.status_code
+            except httpx.HTTPError:
+                status = "error"
+            self.recorder.record(
+                endpoint,
+                time.perf_counter() - started,
+                status,
+                status == 400,
+                size - 1,
+                injected=True,
+            )
+
+        await self.request(
+            endpoint,
+            "PUT",
+            url,
+            expect={200, 201},
+            sent=size,
+            content=self._part_body(seed, part_number, size),
+            headers=headers,
+        )
+
+    async def send_parts(self, session, seed, part_numbers):
+        queue = list(part_numbers)
+
+        async def worker():
+            while queue:
+                await self.send_part(session, seed, queue.pop(0))
+
+        workers = min(self.options["part_concurrency"], len(queue)) or 1
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+    async def upload_session(self):
+        size = self.options["sizes"](self.rng)
+        response = await self.request(
+            "POST /uploads/sessions/",
+            "POST",
+            "/uploads/sessions/",
+            expect={201},
+            json={
+                "filename": "load.bin",
+                "size_bytes": size,
+                "chunk_size_bytes": self.options["chunk_size"],
+            },
+        )
+        if response is None:
+            self.recorder.outcomes["failed"] += 1
+            return
+        session = response.json()
+        seed = self.rng.getrandbits(64)
+        await self.send_parts(session, seed, range(1, session["total_parts"] + 1))
+
+        # Resume: ask which parts never landed and send only those
+        for _ in range(self.options["max_retries"] + 1):
+            status = await self.request(
+                "GET /uploads/sessions/:id/",
+                "GET",
+                f"/uploads/sessions/{session['id']}/",
+                expect={200},
+            )
+            if status is None:
+                break
+            missing = _expand_ranges(status.json()["missing_parts"])
+            if not missing:
+                break
+            await self.send_parts(session, seed, missing)
+
+        response = await self.request(
+            "POST /uploads/sessions/:id/complete/",
+            "POST",
+            f"/uploads/sessions/{session['id']}/complete/",
+            expect={200},
+        )
+        self.recorder.outcomes["session" if response is not None else "failed"] += 1
+
+    async def run(self, iterations, deadline):
+        done = 0
+        while (iterations is None or done < iterations) and (
+            deadline is None or time.monotonic() < deadline
+        ):
+            if self.rng.random() < self.options["session_ratio"]:
+                await self.upload_session()
+            else:
+                await self.upload_batch()
+            done += 1
+
+
+def _expand_ranges(text):
+    """Expand ``"1-3,7"`` into ``[1, 2, 3, 7]``."""
+    numbers = []
+    for item in filter(None, text.split(",")):
+        start, _, end = item.partition("-")
+        numbers.extend(range(int(start), int(end or start) + 1))
+    return numbers
+
+
+async def run_load_test(
+    base_url,
+    username,
+    password,
+    *,
+    clients=10,
+    iterations=5,
+    duration=None,
+    session_ratio=0.5,
+    sizes="lognormal:1MB,1.0",
+    chunk_size=5_242_880,
+    files_per_batch=1,
+    part_concurrency=1,
+    failure_rate=0.0,
+    max_retries=3,
+    timeout=60.0,
+    seed=None,
+    transport=None,
+):
+    """Run simulated uploaders against a Doorito instance.
+
+    Args:
+        base_url: Root URL of the target, e.g. ``http://localhost:8000``.
+        username: Email of an existing user every client logs in as.
+        password: That user's password.
+        clients: Number of concurrent simulated clients.
+        iterations: Uploads per client (None: until ``duration`` ends).
+        duration: Optional wall-clock limit in seconds.
+        session_ratio: Fraction of uploads that use chunked sessions
+            (the rest are batch uploads).
+        sizes: File-size distribution spec (see ``parse_distribution()``)
+            or a sampler it returned.
+        chunk_size: Session chunk size in bytes.
+        files_per_batch: Files per batch upload request.
+        part_concurrency: Parts each client sends at once.
+        failure_rate: Probability per part of an injected failure (half
+            truncated bodies, half dropped parts resumed via status).
+        max_retries: Retries for transient errors and resume rounds.
+        timeout: Per-request timeout in seconds.
+        seed: Optional seed for reproducible sizes and injections.
+        transport: Optional httpx transport (e.g. ``httpx.ASGITransport``).
+
+    Returns:
+        dict: Overall "requests", "errors", "error_rate",
+        "requests_per_sec", "bytes_sent", "throughput_bytes_per_sec",
+        "uploads" (completed per scenario, and failed), "dropped_parts"
+        (injected drops that had to be resumed), and "endpoints"
+        with per-endpoint requests, errors, injected failures, statuses,
+        bytes and p50/p90/p99/max latency in milliseconds.
+
+    Raises:
+        LoadTestError: If a client cannot log in.
+    """
+    if iterations is None and duration is None:
+        raise ValueError("Set iterations, duration, or both.")
+    options = {
+        "session_ratio": session_ratio,
+        "sizes": parse_distribution(sizes) if isinstance(sizes, str) else sizes,
+        "chunk_size": chunk_size,
+        "files_per_batch": files_per_batch,
+        "part_concurrency": part_concurrency,
+        "failure_rate": failure_rate,
+        "max_retries": max_retries,
+    }
+    recorder = _Recorder()
+    master = random.Random(seed)
+    deadline = time.monotonic() + duration if duration else None
+
+    async def client_task():
+        async with httpx.AsyncClient(
+            base_url=base_url,
+            transport=transport,
+            timeout=timeout,
+            headers={"Referer": base_url},
+        ) as http:
+            client = _SimulatedClient(
+                http, recorder, random.Random(master.getrandbits(64)), options
+            )
+            await client.login(username, password)
+            await client.run(iterations, deadline)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client_task() for _ in range(clients)))
+    return recorder.report(clients, time.perf_counter() - started)
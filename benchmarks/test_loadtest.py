@@ -0,0 +1,103 @@
+"""Unit tests for the load test client."""
+
+import asyncio
+import random
+
+import httpx
+import pytest
+from benchmarks.loadtest import (
+    LoadTestError,
+    _expand_ranges,
+    parse_distribution,
+    parse_size,
+    percentile,
+    run_load_test,
+)
+from django.core.asgi import get_asgi_application
+from portal.models import UploadFile, UploadSession
+
+
+class TestParsing:
+    """Tests for size and distribution parsing."""
+
+    def test_parse_size(self):
+        assert parse_size("512") == 512
+        assert parse_size("64KB") == 65_536
+        assert parse_size("1.5mb") == 1_572_864
+        with pytest.raises(ValueError):
+            parse_size("lots")
+
+    def test_distributions(self):
+        rng = random.Random(1)
+        assert parse_distribution("fixed:1KB")(rng) == 1024
+        assert 1024 <= parse_distribution("uniform:1KB-2KB")(rng) <= 2048
+        assert parse_distribution("choice:1KB,2KB")(rng) in (1024, 2048)
+        assert parse_distribution("lognormal:1MB,0.5")(rng) > 0
+        with pytest.raises(ValueError):
+            parse_distribution("pareto:1MB")
+
+    def test_percentile_and_ranges(self):
+        assert percentile([1, 2, 3, 4], 50) == 2
+        assert percentile([1, 2, 3, 4], 99) == 4
+        assert percentile([], 50) == 0.0
+        assert _expand_ranges("1-3,7") == [1, 2, 3, 7]
+        assert _expand_ranges("") == []
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRunLoadTest:
+    """End-to-end runs against the ASGI app in-process."""
+
+    @pytest.fixture(autouse=True)
+    def _storage(self, tmp_path, settings):
+        # The login page renders static URLs; skip the WhiteNoise manifest
+        settings.STORAGES = {
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            "staticfiles": {
+                "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+            },
+        }
+        settings.MEDIA_ROOT = tmp_path / "media"
+        settings.FILE_UPLOAD_SESSION_DIR = tmp_path / "sessions"
+
+    def _run(self, password="testpass123", **kwargs):
+        transport = httpx.ASGITransport(app=get_asgi_application())
+        return asyncio.run(
+            run_load_test(
+                "http://testserver",
+                "test@example.com",
+                password,
+                transport=transport,
+                **kwargs,
+            )
+        )
+
+    def test_batches_and_sessions_with_injected_failures(self, user):
+        # One client: concurrent requests would run in separate threads
+        # whose connections lock each other out of the shared-cache
+        # in-memory SQLite test database ("database table is locked").
+        report = self._run(
+            clients=1,
+            iterations=6,
+            session_ratio=0.5,
+            sizes="uniform:1KB-20KB",
+            chunk_size=4096,
+            failure_rate=0.5,
+            seed=7,
+        )
+
+        assert report["errors"] == 0
+        assert sum(report["uploads"].values()) == 6
+        assert "failed" not in report["uploads"]
+        parts = report["endpoints"]["PUT /uploads/sessions/:id/parts/:n"]
+        assert parts["injected"] > 0
+        assert report["dropped_parts"] > 0
+        assert parts["p50_ms"] <= parts["p99_ms"]
+        assert UploadFile.objects.filter(status=UploadFile.Status.STORED).count() == 6
+        assert not UploadSession.objects.exclude(
+            status=UploadSession.Status.COMPLETE
+        ).exists()
+
+    def test_bad_credentials_raise(self, user):
+        with pytest.raises(LoadTestError):
+            self._run(password="wrong", clients=1, iterations=1)
@@ -133,6 +133,7 @@ class Base(Configuration):
     CELERY_TASK_TRACK_STARTED = True
     CELERY_TASK_TIME_LIMIT = 300  # 5 min hard limit
     CELERY_TASK_SOFT_TIME_LIMIT = 240  # 4 min soft limit
+    SWEEP_TIME_BUDGET_SECONDS = 210  # Sweeps re-enqueue before the soft limit
     CELERY_RESULT_EXPIRES = 86400  # 24 hours
     CELERY_WORKER_HIJACK_ROOT_LOGGER = False
 
@@ -143,6 +144,14 @@ class Base(Configuration):
     # Outbox settings
     OUTBOX_SWEEP_INTERVAL_MINUTES = 5  # Sweep for pending events
     OUTBOX_RETENTION_HOURS = 168  # 7 days retention for terminal events
+    OUTBOX_LEASE_SECONDS = 300  # Delivery lease; >= CELERY_TASK_TIME_LIMIT
+    OUTBOX_DISPATCH_DEBOUNCE_SECONDS = 1.0  # Coalesce delivery tasks per process
+    WEBHOOK_MAX_IN_FLIGHT = values.IntegerValue(
+        50, environ_name="WEBHOOK_MAX_IN_FLIGHT"
+    )  # Concurrent webhook POSTs per delivery batch
+    WEBHOOK_MAX_PER_ENDPOINT = values.IntegerValue(
+        5, environ_name="WEBHOOK_MAX_PER_ENDPOINT"
+    )  # Concurrent POSTs to any one endpoint
 
     @property
     def CELERY_BEAT_SCHEDULE(self):
@@ -168,6 +177,11 @@ class Base(Configuration):
                 "schedule": crontab(minute=30, hour="*/6"),
                 "options": {"queue": "default"},
             },
+            "cleanup-portal-event-outbox": {
+                "task": "portal.tasks.cleanup_portal_event_outbox_task",
+                "schedule": crontab(minute=45, hour="*/6"),
+                "options": {"queue": "default"},
+            },
             "notify-expiring-files": {
                 "task": "portal.tasks.notify_expiring_files_task",
                 "schedule": crontab(minute=0),
@@ -208,6 +222,26 @@ class Base(Configuration):
         None  # None = accept all; set to list e.g. ["application/pdf"]
     )
     FILE_UPLOAD_EXPIRY_NOTIFY_HOURS = 1  # Hours before TTL expiry to emit file.expiring
+    # Content-addressed storage: identical uploads share one stored blob
+    FILE_UPLOAD_DEDUPLICATE = values.BooleanValue(
+        False, environ_name="FILE_UPLOAD_DEDUPLICATE"
+    )
+    # Thread pool size for hashing/storing the files of one upload request
+    # (1 = process files sequentially)
+    FILE_UPLOAD_WORKERS = values.IntegerValue(4, environ_name="FILE_UPLOAD_WORKERS")
+    # Hash and sniff uploads while the request body streams in (single pass)
+    FILE_UPLOAD_HANDLERS = [
+        "portal.upload_handlers.HashingMemoryFileUploadHandler",
+        "portal.upload_handlers.HashingTemporaryFileUploadHandler",
+    ]
+    # Keep on the same filesystem as MEDIA_ROOT so storing a large upload is
+    # a rename rather than a copy (None = system temp dir)
+    FILE_UPLOAD_TEMP_DIR = values.Value(None, environ_name="FILE_UPLOAD_TEMP_DIR")
+    # Chunked upload sessions: maximum declared size and where parts are
+    # staged (None = FILE_UPLOAD_TEMP_DIR). Keep on MEDIA_ROOT's filesystem
+    # so completing a session is a rename.
+    FILE_UPLOAD_SESSION_MAX_SIZE = 21_474_836_480  # 20 GB
+    FILE_UPLOAD_SESSION_DIR = values.Value(None, environ_name="FILE_UPLOAD_SESSION_DIR")
 
     # Default field
     DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
@@ -14,4 +14,5 @@ urlpatterns = [
     path("healthz/", healthz, name="healthz"),
     path("admin/", admin.site.urls),
     path("app/", include("frontend.urls")),
+    path("uploads/", include("portal.urls")),
 ]
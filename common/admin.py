@@ -3,7 +3,27 @@
 from django.contrib import admin
 from django.utils import timezone
 
-from common.models import OutboxEvent, WebhookEndpoint
+from common.models import OutboxEvent, WebhookDelivery, WebhookEndpoint
+
+
+class WebhookDeliveryInline(admin.TabularInline):
+    """Read-only per-endpoint delivery state on the event page."""
+
+    model = WebhookDelivery
+    extra = 0
+    can_delete = False
+    fields = (
+        "endpoint",
+        "status",
+        "attempts",
+        "next_attempt_at",
+        "status_code",
+        "error_message",
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request, obj=None):
+        return False
 
 
 @admin.register(OutboxEvent)
@@ -31,18 +51,31 @@ class OutboxEventAdmin(admin.ModelAdmin):
         "attempts",
         "delivered_at",
         "error_message",
+        "claimed_by",
+        "lease_expires_at",
         "created_at",
         "updated_at",
     )
     date_hierarchy = "created_at"
+    inlines = [WebhookDeliveryInline]
     actions = ["retry_failed_events"]
 
     @admin.action(description="Retry selected failed events")
     def retry_failed_events(self, request, queryset):
-        """Reset failed events to pending for retry."""
-        updated = queryset.filter(status=OutboxEvent.Status.FAILED).update(
+        """Reset failed events (and their failed deliveries) to pending."""
+        now = timezone.now()
+        failed = queryset.filter(status=OutboxEvent.Status.FAILED)
+        WebhookDelivery.objects.filter(
+            event__in=failed, status=WebhookDelivery.Status.FAILED
+        ).update(
+            status=WebhookDelivery.Status.PENDING,
+            next_attempt_at=now,
+            error_message="",
+            attempts=0,
+        )
+        updated = failed.update(
             status=OutboxEvent.Status.PENDING,
-            next_attempt_at=timezone.now(),
+            next_attempt_at=now,
             error_message="",
             attempts=0,
         )
@@ -58,3 +91,33 @@ class WebhookEndpointAdmin(admin.ModelAdmin):
     search_fields = ("url",)
     readonly_fields = ("pk", "created_at", "updated_at")
     date_hierarchy = "created_at"
+
+
+@admin.register(WebhookDelivery)
+class WebhookDeliveryAdmin(admin.ModelAdmin):
+    """Admin interface for per-endpoint webhook delivery state."""
+
+    list_display = (
+        "event",
+        "endpoint",
+        "status",
+        "attempts",
+        "status_code",
+        "next_attempt_at",
+        "created_at",
+    )
+    list_filter = ("status", "created_at")
+    search_fields = ("event__event_type", "endpoint__url", "error_message")
+    readonly_fields = (
+        "pk",
+        "event",
+        "endpoint",
+        "attempts",
+        "delivered_at",
+        "status_code",
+        "error_message",
+        "created_at",
+        "updated_at",
+    )
+    list_select_related = ("event", "endpoint")
+    date_hierarchy = "created_at"
@@ -8,3 +8,6 @@ class CommonConfig(AppConfig):
 
     default_auto_field = "django.db.models.BigAutoField"
     name = "common"
+
+    def ready(self):
+        import common.signals  # noqa: F401
@@ -0,0 +1,35 @@
+"""Report outbox backlog sizes (bounded counts or estimates by default)."""
+
+from common.management.base import DooritoBaseCommand
+from common.services.backlog import backlog_stats
+
+
+class Command(DooritoBaseCommand):
+    help = "Show pending/failed outbox backlog sizes; --exact runs full counts."
+    supports_json = True
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--exact",
+            action="store_true",
+            help="Run full COUNT(*) queries instead of bounded counts and estimates",
+        )
+
+    def handle(self, *args, **options):
+        self.start_timer()
+        result = backlog_stats(exact=options["exact"])
+        result["seconds"] = round(self.elapsed(), 3)
+
+        if options["json_output"]:
+            self.output_json(result)
+            return
+        kind = "exact" if result["exact"] else "estimated"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Outbox pending: {result['outbox_pending']}, "
+                f"failed: {result['outbox_failed']}, "
+                f"deliveries pending: {result['deliveries_pending']} "
+                f"({kind}, {result['seconds']}s)."
+            )
+        )
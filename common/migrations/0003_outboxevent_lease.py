@@ -0,0 +1,30 @@
+# Generated by Django 5.2.11 on 2026-10-17 04:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("common", "0002_webhookendpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxevent",
+            name="claimed_by",
+            field=models.CharField(
+                blank=True,
+                help_text="Dispatcher currently holding the delivery lease",
+                max_length=255,
+            ),
+        ),
+        migrations.AddField(
+            model_name="outboxevent",
+            name="lease_expires_at",
+            field=models.DateTimeField(
+                blank=True,
+                help_text="When the current delivery lease lapses and the event can be reclaimed",
+                null=True,
+            ),
+        ),
+    ]
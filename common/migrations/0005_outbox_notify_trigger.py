@@ -0,0 +1,63 @@
+"""NOTIFY the outbox dispatcher when events become pending.
+
+Statement-level triggers send one ``pg_notify('outbox_event', <epoch>)``
+per INSERT/UPDATE statement, carrying the earliest ``next_attempt_at`` of
+the pending rows it wrote, so a 1,000-row ``bulk_create`` costs one
+notification. PostgreSQL only; a no-op on other databases.
+"""
+
+from django.db import migrations
+
+CHANNEL = "outbox_event"
+
+FORWARD_SQL = f"""
+CREATE OR REPLACE FUNCTION outbox_event_notify() RETURNS trigger AS $$
+DECLARE
+    due timestamptz;
+BEGIN
+    SELECT min(next_attempt_at) INTO due
+    FROM new_rows
+    WHERE status = 'pending' AND next_attempt_at IS NOT NULL;
+    IF due IS NOT NULL THEN
+        PERFORM pg_notify('{CHANNEL}', extract(epoch FROM due)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER outbox_event_notify_insert
+AFTER INSERT ON outbox_event
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION outbox_event_notify();
+
+CREATE TRIGGER outbox_event_notify_update
+AFTER UPDATE ON outbox_event
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION outbox_event_notify();
+"""
+
+REVERSE_SQL = """
+DROP TRIGGER IF EXISTS outbox_event_notify_update ON outbox_event;
+DROP TRIGGER IF EXISTS outbox_event_notify_insert ON outbox_event;
+DROP FUNCTION IF EXISTS outbox_event_notify();
+"""
+
+
+def create_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(FORWARD_SQL)
+
+
+def drop_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("common", "0004_webhookdelivery"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigger, drop_trigger),
+    ]
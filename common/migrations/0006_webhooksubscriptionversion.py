@@ -0,0 +1,31 @@
+# Generated by Django 5.2.11 on 2026-10-17 05:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("common", "0005_outbox_notify_trigger"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="WebhookSubscriptionVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("version", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "webhook subscription version",
+                "db_table": "webhook_subscription_version",
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.11 on 2026-10-17 05:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("common", "0006_webhooksubscriptionversion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxevent",
+            name="rendered_payload",
+            field=models.BinaryField(
+                help_text="Compact JSON request body, rendered once at emit and sent as-is",
+                null=True,
+            ),
+        ),
+    ]
@@ -0,0 +1,76 @@
+"""Partition outbox_event by created_at day (PostgreSQL only).
+
+Drops the database FK from webhook_delivery (a partitioned table can
+only be referenced through its partition key) and converts the table
+with ``common.services.partitions.partition_table()``, then re-creates
+the NOTIFY triggers from 0005. A no-op beyond the FK on other
+databases.
+
+The ``(event_type, idempotency_key)`` constraint is replaced by a
+trigger on PostgreSQL, so it is removed from the migration state on
+every database (other databases keep the physical constraint).
+
+Run it in a maintenance window: the conversion copies every row while
+holding an ACCESS EXCLUSIVE lock on the table, so event writes and
+deliveries wait for the whole copy. Running the outbox cleanup first
+keeps the copy small.
+
+Requires PostgreSQL 13 or later: the idempotency trigger is a BEFORE ROW
+trigger on the partitioned table, which older servers reject. The
+migration fails before changing anything on an older server.
+"""
+
+import importlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from common.services.partitions import partition_table, unpartition_table
+
+TABLE = "outbox_event"
+OPTIONS = {
+    "unique_name": "unique_event_type_idempotency_key",
+    "pending_index": "idx_outbox_pending_next",
+}
+
+notify = importlib.import_module("common.migrations.0005_outbox_notify_trigger")
+
+
+def partition(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        partition_table(schema_editor, TABLE, **OPTIONS)
+        schema_editor.execute(notify.FORWARD_SQL)
+
+
+def unpartition(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        unpartition_table(schema_editor, TABLE, **OPTIONS)
+        schema_editor.execute(notify.FORWARD_SQL)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("common", "0007_outboxevent_rendered_payload"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="webhookdelivery",
+            name="event",
+            field=models.ForeignKey(
+                db_constraint=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="deliveries",
+                to="common.outboxevent",
+            ),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(partition, unpartition)],
+            state_operations=[
+                migrations.RemoveConstraint(
+                    model_name="outboxevent",
+                    name=OPTIONS["unique_name"],
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,73 @@
+"""Only NOTIFY on outbox updates that change when an event is due.
+
+The 0005 UPDATE trigger notified for every statement that left a pending
+row behind, including the dispatchers' own lease claims, so each drain
+woke every dispatcher for nothing. This trigger compares the old and new
+transition tables and notifies only for rows that became pending, got a
+new ``next_attempt_at`` (a retry backoff) or had their lease released.
+PostgreSQL only; a no-op on other databases.
+"""
+
+import importlib
+
+from django.db import migrations
+
+notify = importlib.import_module("common.migrations.0005_outbox_notify_trigger")
+
+FORWARD_SQL = f"""
+CREATE OR REPLACE FUNCTION outbox_event_notify_update() RETURNS trigger AS $$
+DECLARE
+    due timestamptz;
+BEGIN
+    SELECT min(n.next_attempt_at) INTO due
+    FROM new_rows n
+    JOIN old_rows o ON o.id = n.id
+    WHERE n.status = 'pending'
+      AND n.next_attempt_at IS NOT NULL
+      AND (
+          o.status IS DISTINCT FROM n.status
+          OR o.next_attempt_at IS DISTINCT FROM n.next_attempt_at
+          OR (o.lease_expires_at IS NOT NULL AND n.lease_expires_at IS NULL)
+      );
+    IF due IS NOT NULL THEN
+        PERFORM pg_notify('{notify.CHANNEL}', extract(epoch FROM due)::text);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS outbox_event_notify_update ON outbox_event;
+CREATE TRIGGER outbox_event_notify_update
+AFTER UPDATE ON outbox_event
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION outbox_event_notify_update();
+"""
+
+REVERSE_SQL = """
+DROP TRIGGER IF EXISTS outbox_event_notify_update ON outbox_event;
+DROP FUNCTION IF EXISTS outbox_event_notify_update();
+CREATE TRIGGER outbox_event_notify_update
+AFTER UPDATE ON outbox_event
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION outbox_event_notify();
+"""
+
+
+def create_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(FORWARD_SQL)
+
+
+def restore_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute(REVERSE_SQL)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("common", "0008_partition_outbox_event"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigger, restore_trigger),
+    ]
@@ -22,6 +22,14 @@ class OutboxEvent(TimeStampedModel):
     Status lifecycle:
         pending → delivered (success)
         pending → ... retry ... → failed (max retries exhausted)
+
+    A dispatcher claims pending events by stamping ``claimed_by`` and
+    ``lease_expires_at``; other dispatchers skip events with a live
+    lease, and an expired lease (crashed worker) is reclaimed on the
+    next pass.
+
+    On PostgreSQL the table is partitioned by ``created_at`` day (see
+    ``common.services.partitions``) and retention drops whole partitions.
     """
 
     class Status(models.TextChoices):
@@ -34,6 +42,11 @@ class OutboxEvent(TimeStampedModel):
     aggregate_id = models.CharField(max_length=100)
     event_type = models.CharField(max_length=100)
     payload = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    rendered_payload = models.BinaryField(
+        null=True,
+        editable=False,
+        help_text="Compact JSON request body, rendered once at emit and sent as-is",
+    )
     status = models.CharField(
         max_length=20, choices=Status.choices, default=Status.PENDING
     )
@@ -43,6 +56,16 @@ class OutboxEvent(TimeStampedModel):
     next_attempt_at = models.DateTimeField(null=True)
     delivered_at = models.DateTimeField(null=True, blank=True)
     error_message = models.TextField(blank=True)
+    claimed_by = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Dispatcher currently holding the delivery lease",
+    )
+    lease_expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="When the current delivery lease lapses and the event can be reclaimed",
+    )
 
     class Meta:
         db_table = "outbox_event"
@@ -56,12 +79,11 @@ class OutboxEvent(TimeStampedModel):
                 name="idx_outbox_pending_next",
             ),
         ]
-        constraints = [
-            models.UniqueConstraint(
-                fields=["event_type", "idempotency_key"],
-                name="unique_event_type_idempotency_key",
-            ),
-        ]
+        # (event_type, idempotency_key) is unique, but not declared here:
+        # on PostgreSQL the partitioned table enforces it with a trigger
+        # (migration 0008), elsewhere the constraint from 0001 remains.
+        # Keeping it out of the migration state means no migration will
+        # try to alter a constraint PostgreSQL does not have.
 
     def __str__(self):
         return f"{self.event_type} ({self.get_status_display()})"
@@ -104,3 +126,84 @@ class WebhookEndpoint(TimeStampedModel):
     def __str__(self):
         status = "active" if self.is_active else "inactive"
         return f"{self.url} ({status})"
+
+    def accepts(self, event_type):
+        """Return True if this endpoint subscribes to ``event_type``."""
+        return not self.event_types or event_type in self.event_types
+
+
+class WebhookSubscriptionVersion(models.Model):
+    """Single-row version token changed whenever a WebhookEndpoint changes.
+
+    Each process caches a compiled subscription index (see
+    ``common.services.subscriptions``) and rebuilds it only when this
+    version moves, so matching needs one primary-key lookup instead of
+    loading every endpoint.
+    """
+
+    version = models.BigIntegerField(default=0)
+
+    class Meta:
+        db_table = "webhook_subscription_version"
+        verbose_name = "webhook subscription version"
+
+    def __str__(self):
+        return f"v{self.version}"
+
+
+class WebhookDelivery(TimeStampedModel):
+    """Delivery state of one outbox event to one webhook endpoint.
+
+    Rows are created when the event is emitted, one per matching active
+    endpoint, and carry their own attempts and backoff so a retry only
+    re-posts to the endpoints that failed. The parent OutboxEvent stays
+    PENDING until every delivery is terminal.
+
+    Status lifecycle:
+        pending → delivered (success)
+        pending → ... retry ... → failed (max retries exhausted)
+        pending → skipped (endpoint deactivated before delivery)
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Pending"
+        DELIVERED = "delivered", "Delivered"
+        FAILED = "failed", "Failed"
+        SKIPPED = "skipped", "Skipped"
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    # No database FK: outbox_event is partitioned on PostgreSQL, which a
+    # foreign key cannot reference by id alone. Deletes still cascade in
+    # the ORM; partition drops remove the deliveries themselves.
+    event = models.ForeignKey(
+        OutboxEvent,
+        on_delete=models.CASCADE,
+        related_name="deliveries",
+        db_constraint=False,
+    )
+    endpoint = models.ForeignKey(
+        WebhookEndpoint, on_delete=models.CASCADE, related_name="deliveries"
+    )
+    status = models.CharField(
+        max_length=20, choices=Status.choices, default=Status.PENDING
+    )
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    error_message = models.TextField(blank=True)
+
+    class Meta:
+        db_table = "webhook_delivery"
+        verbose_name = "webhook delivery"
+        verbose_name_plural = "webhook deliveries"
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["event", "endpoint"],
+                name="unique_webhook_delivery_event_endpoint",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.event_id} → {self.endpoint_id} ({self.get_status_display()})"
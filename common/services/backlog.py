@@ -0,0 +1,107 @@
+"""Cheap backlog statistics for task results and monitoring.
+
+``COUNT(*)`` over a large outbox or upload table reads every matching
+row, and the delivery and cleanup tasks used to run one per call only
+to report how much work is left. ``count_backlog()`` instead counts at
+most ``EXACT_COUNT_LIMIT`` rows -- exact for a normal backlog, bounded
+cost for a huge one -- and above that reports the PostgreSQL planner's
+row estimate. Exact counts are available on demand (``exact=True``,
+``manage.py backlog_stats --exact``). Hot paths that report a backlog
+on every call, such as outbox delivery batches, use
+``estimate_backlog()``, which on PostgreSQL reads no rows at all.
+"""
+
+import json
+
+from django.db import connections
+
+from common.models import OutboxEvent, WebhookDelivery
+
+EXACT_COUNT_LIMIT = 10_000
+
+
+def count_backlog(queryset, *, exact=False, limit=EXACT_COUNT_LIMIT):
+    """Return the number of rows in ``queryset``, estimated when large.
+
+    Args:
+        queryset: The rows to count.
+        exact: Run a full ``COUNT(*)`` instead.
+        limit: Rows counted exactly before falling back to an estimate.
+
+    Returns:
+        int: The exact count when below ``limit`` (or ``exact``);
+        otherwise the planner's estimate on PostgreSQL, never below
+        ``limit``, and ``limit`` itself on other databases.
+    """
+    if exact:
+        return queryset.count()
+    counted = queryset.order_by()[:limit].count()
+    if counted < limit:
+        return counted
+    return max(limit, _planner_estimate(queryset) or 0)
+
+
+def estimate_backlog(queryset):
+    """Return the planner's row estimate for ``queryset`` without counting.
+
+    For per-batch reporting, where even a bounded count costs a scan of
+    up to ``EXACT_COUNT_LIMIT`` rows every call. The estimate comes from
+    ``EXPLAIN`` (planning only, no rows read) and is as fresh as the
+    table's statistics.
+
+    Returns:
+        int: The estimate on PostgreSQL; ``count_backlog()`` elsewhere,
+        where there is no planner estimate.
+    """
+    estimate = _planner_estimate(queryset)
+    if estimate is None:
+        return count_backlog(queryset)
+    return estimate
+
+
+def _planner_estimate(queryset):
+    """Row estimate from ``EXPLAIN`` on PostgreSQL, else None."""
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def pending_outbox_backlog(*, exact=False, estimate=False):
+    """Return the number of PENDING outbox events (see ``count_backlog()``).
+
+    With ``estimate``, return ``estimate_backlog()`` instead.
+    """
+    pending = OutboxEvent.objects.filter(status=OutboxEvent.Status.PENDING)
+    if estimate and not exact:
+        return estimate_backlog(pending)
+    return count_backlog(pending, exact=exact)
+
+
+def backlog_stats(*, exact=False):
+    """Return backlog sizes for the outbox.
+
+    Args:
+        exact: Use full counts instead of bounded counts and estimates.
+
+    Returns:
+        dict: {"outbox_pending": int, "outbox_failed": int,
+        "deliveries_pending": int, "exact": bool}
+    """
+    return {
+        "outbox_pending": pending_outbox_backlog(exact=exact),
+        "outbox_failed": count_backlog(
+            OutboxEvent.objects.filter(status=OutboxEvent.Status.FAILED), exact=exact
+        ),
+        "deliveries_pending": count_backlog(
+            WebhookDelivery.objects.filter(status=WebhookDelivery.Status.PENDING),
+            exact=exact,
+        ),
+        "exact": exact,
+    }
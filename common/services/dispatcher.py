@@ -0,0 +1,209 @@
+"""Push-driven outbox dispatcher (the long-running ``doorito dispatcher``).
+
+On PostgreSQL the dispatcher LISTENs on the ``outbox_event`` channel,
+which the triggers from migrations ``common.0005`` and ``common.0009``
+notify whenever a statement inserts pending events or changes when one
+is due, with the earliest ``next_attempt_at`` as payload. Due times go
+into an in-memory min-heap; the dispatcher sleeps until the next one is
+due or a notification arrives, then drains with
+``process_pending_events()`` -- so new events and expiring backoffs are
+delivered within milliseconds, without polling queries.
+
+Other databases (SQLite in Dev) have no LISTEN/NOTIFY; the dispatcher
+falls back to polling for the next due time every ``poll_interval``.
+
+Several dispatchers can run side by side: event leases (see
+``process_pending_events()``) keep them from delivering the same event.
+"""
+
+import heapq
+import logging
+import time
+
+from django.db import close_old_connections, connection
+from django.db.models import Q
+from django.utils import timezone
+
+from common.models import OutboxEvent
+from common.services.outbox import DELIVERY_BATCH_SIZE, process_pending_events
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "outbox_event"
+DEFAULT_MAX_IDLE = 60.0
+DEFAULT_POLL_INTERVAL = 2.0
+# Longest single wait, so a stop request is honoured promptly
+WAIT_SLICE = 1.0
+
+
+class PostgresListener:
+    """Wait for ``outbox_event`` notifications on a dedicated connection."""
+
+    vendor = "postgresql"
+
+    def __init__(self, channel=NOTIFY_CHANNEL):
+        import psycopg
+
+        params = connection.get_connection_params()
+        self.conn = psycopg.connect(**params, autocommit=True)
+        self.conn.execute(f"LISTEN {channel}")
+
+    def wait(self, timeout):
+        """Block up to ``timeout`` seconds; return notified due times."""
+        return [
+            parse_notify_payload(notify.payload)
+            for notify in self.conn.notifies(timeout=timeout, stop_after=1)
+        ]
+
+    def close(self):
+        self.conn.close()
+
+
+class PollingListener:
+    """Fallback for databases without LISTEN/NOTIFY: sleep, then re-query."""
+
+    vendor = "polling"
+
+    def __init__(self, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+
+    def wait(self, timeout):
+        time.sleep(max(0.0, min(timeout, self.poll_interval)))
+        return None  # Unknown: the caller re-reads the next due time
+
+    def close(self):
+        pass
+
+
+def parse_notify_payload(payload):
+    """Return the epoch due time carried by a notification (now if empty)."""
+    try:
+        return float(payload)
+    except (TypeError, ValueError):
+        return time.time()
+
+
+def make_listener(poll_interval=DEFAULT_POLL_INTERVAL):
+    """Return a PostgresListener on PostgreSQL, else a PollingListener."""
+    if connection.vendor == "postgresql":
+        return PostgresListener()
+    return PollingListener(poll_interval)
+
+
+def next_due_time():
+    """Return the epoch time the next pending event can be claimed, or None.
+
+    An event is claimable once its ``next_attempt_at`` has passed and any
+    lease another dispatcher holds on it has expired. Both lookups are
+    ``ORDER BY ... LIMIT 1`` walks of ``idx_outbox_pending_next``, so the
+    cost does not grow with the pending backlog: the first skips only
+    live-leased rows, and the second is reached only when nothing
+    unleased is due yet, when every already-due pending row is one of
+    the few that dispatchers hold right now.
+    """
+    now = timezone.now()
+    pending = OutboxEvent.objects.filter(status=OutboxEvent.Status.PENDING)
+    due = (
+        pending.filter(Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now))
+        .order_by("next_attempt_at")
+        .values_list("next_attempt_at", flat=True)
+        .first()
+    )
+    if due is None or due > now:
+        # Leases are only taken on due events, so live ones sit below now
+        lease_end = (
+            pending.filter(next_attempt_at__lte=now, lease_expires_at__gt=now)
+            .order_by("lease_expires_at")
+            .values_list("lease_expires_at", flat=True)
+            .first()
+        )
+        if lease_end is not None and (due is None or lease_end < due):
+            due = lease_end
+    return due.timestamp() if due else None
+
+
+def drain(batch_size=DELIVERY_BATCH_SIZE):
+    """Deliver due events until a batch comes back short.
+
+    Returns:
+        dict: Summed ``process_pending_events()`` counts plus ``batches``.
+    """
+    totals = {"processed": 0, "delivered": 0, "failed": 0, "batches": 0}
+    while True:
+        result = process_pending_events(batch_size)
+        totals["batches"] += 1
+        for key in ("processed", "delivered", "failed"):
+            totals[key] += result[key]
+        if result["processed"] < batch_size:
+            totals["remaining"] = result["remaining"]
+            return totals
+
+
+def run_dispatcher(
+    *,
+    batch_size=DELIVERY_BATCH_SIZE,
+    max_idle=DEFAULT_MAX_IDLE,
+    poll_interval=DEFAULT_POLL_INTERVAL,
+    listener=None,
+    should_stop=None,
+    on_drain=None,
+):
+    """Run the dispatcher loop until ``should_stop()`` returns True.
+
+    Args:
+        batch_size: Events per ``process_pending_events()`` call.
+        max_idle: Longest sleep without a wake-up; on wake the next due
+            time is re-read (a safety net for lapsed leases).
+        poll_interval: Polling period when LISTEN/NOTIFY is unavailable.
+        listener: Object with ``wait(timeout)`` and ``close()``; defaults
+            to ``make_listener(poll_interval)``.
+        should_stop: Callable checked between waits (default: never).
+        on_drain: Optional callback receiving each ``drain()`` result.
+    """
+    listener = listener or make_listener(poll_interval)
+    should_stop = should_stop or (lambda: False)
+    heap = []
+
+    def push(due):
+        if due not in heap:
+            heapq.heappush(heap, due)
+
+    def reseed():
+        close_old_connections()
+        due = next_due_time()
+        if due is not None:
+            push(due)
+
+    logger.info("Outbox dispatcher started (%s).", listener.vendor)
+    reseed()
+    idle_until = time.time() + max_idle
+    try:
+        while not should_stop():
+            now = time.time()
+            if heap and heap[0] <= now:
+                while heap and heap[0] <= now:
+                    heapq.heappop(heap)
+                close_old_connections()
+                result = drain(batch_size)
+                if on_drain:
+                    on_drain(result)
+                # Retries scheduled by this drain notify us; re-read anyway
+                # so events whose lease or backoff lapses are not missed.
+                reseed()
+                idle_until = time.time() + max_idle
+                continue
+            if now >= idle_until:
+                reseed()
+                idle_until = now + max_idle
+                continue
+
+            deadline = min(heap[0] if heap else idle_until, idle_until)
+            due_times = listener.wait(min(deadline - now, WAIT_SLICE))
+            if due_times is None:
+                reseed()
+            else:
+                for due in due_times:
+                    push(due)
+    finally:
+        listener.close()
+        logger.info("Outbox dispatcher stopped.")
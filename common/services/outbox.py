@@ -1,22 +1,40 @@
 """Outbox event emission and delivery services."""
 
+import asyncio
 import logging
+import os
 import random
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
 from datetime import timedelta
 
-import httpx
 from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
 from django.db import transaction
+from django.db.models import Q
 from django.utils import timezone
 
-from common.models import OutboxEvent
+from common.models import OutboxEvent, WebhookDelivery
+from common.services.backlog import count_backlog, pending_outbox_backlog
+from common.services.partitions import maintain_partitions
+from common.services.subscriptions import get_subscription_index
+from common.services.sweep import run_sweep
+from common.services.webhook import (
+    WEBHOOK_MAX_IN_FLIGHT,
+    WEBHOOK_MAX_PER_ENDPOINT,
+    WEBHOOK_TIMEOUT,
+    fan_out,
+    render_payload,
+)
 from common.utils import safe_dispatch
 
 logger = logging.getLogger(__name__)
 
 DELIVERY_BATCH_SIZE = 20
 CLEANUP_BATCH_SIZE = 1000
-WEBHOOK_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
 
 
 def emit_event(
@@ -24,9 +42,11 @@ def emit_event(
 ):
     """Create an outbox event and schedule delivery.
 
-    The event is written to the database as part of the current transaction.
+    The event is written to the database as part of the current transaction,
+    together with one pending WebhookDelivery per matching active endpoint.
     Delivery is dispatched via transaction.on_commit() to ensure the event
-    is committed before the delivery task runs.
+    is committed before the delivery task runs; dispatches are debounced
+    per process, so a burst of events costs at most two tasks.
 
     For transactional consistency, callers should wrap both the state change
     and this call in the same transaction.atomic() block:
@@ -40,6 +60,7 @@ def emit_event(
         aggregate_id: String PK of the source record.
         event_type: Dotted event name (e.g., "file.stored").
         payload: Dict of event data (serialized via DjangoJSONEncoder).
+            Also rendered once to the request body sent to every endpoint.
         idempotency_key: Deduplication key. Defaults to
             "{aggregate_type}:{aggregate_id}".
 
@@ -51,22 +72,19 @@ def emit_event(
     idempotency_key = idempotency_key or f"{aggregate_type}:{aggregate_id}"
     payload = payload if payload is not None else {}
 
-    event = OutboxEvent.objects.create(
-        aggregate_type=aggregate_type,
-        aggregate_id=aggregate_id,
-        event_type=event_type,
-        payload=payload,
-        idempotency_key=idempotency_key,
-        next_attempt_at=timezone.now(),
-    )
-
-    def _dispatch():
-        with safe_dispatch("dispatch outbox delivery", logger):
-            from common.tasks import deliver_outbox_events_task
-
-            deliver_outbox_events_task.delay()
+    with transaction.atomic():
+        event = OutboxEvent.objects.create(
+            aggregate_type=aggregate_type,
+            aggregate_id=aggregate_id,
+            event_type=event_type,
+            payload=payload,
+            rendered_payload=render_payload(payload),
+            idempotency_key=idempotency_key,
+            next_attempt_at=timezone.now(),
+        )
+        _create_deliveries([event])
 
-    transaction.on_commit(_dispatch)
+    _schedule_dispatch()
 
     logger.info(
         "Outbox event emitted: pk=%s type=%s aggregate=%s:%s",
@@ -78,83 +96,229 @@ def emit_event(
     return event
 
 
-def process_pending_events(batch_size=DELIVERY_BATCH_SIZE):
+def emit_events(events):
+    """Create several outbox events in one INSERT and schedule one delivery.
+
+    Bulk counterpart of ``emit_event()`` for callers that produce many
+    events in one transaction (e.g. batch ingest). All rows (and their
+    WebhookDelivery records) are written with a single ``bulk_create``
+    each and a single delivery task is dispatched on commit, instead of
+    one of each per event.
+
+    Args:
+        events: Iterable of dicts with keys ``aggregate_type``,
+            ``aggregate_id``, ``event_type``, ``payload`` and optionally
+            ``idempotency_key`` (same semantics as ``emit_event()``).
+
+    Returns:
+        List of created OutboxEvent instances (status=PENDING).
+
+    Raises:
+        IntegrityError: If any event violates the idempotency constraint
+            (no events are created).
+    """
+    now = timezone.now()
+    rows = []
+    for e in events:
+        payload = e["payload"] if e["payload"] is not None else {}
+        rows.append(
+            OutboxEvent(
+                aggregate_type=e["aggregate_type"],
+                aggregate_id=e["aggregate_id"],
+                event_type=e["event_type"],
+                payload=payload,
+                rendered_payload=render_payload(payload),
+                idempotency_key=e.get("idempotency_key")
+                or f"{e['aggregate_type']}:{e['aggregate_id']}",
+                next_attempt_at=now,
+            )
+        )
+    if not rows:
+        return []
+
+    with transaction.atomic():
+        created = OutboxEvent.objects.bulk_create(rows)
+        _create_deliveries(created)
+    _schedule_dispatch()
+
+    logger.info("Outbox events emitted: count=%d", len(created))
+    return created
+
+
+def _schedule_dispatch():
+    """Register delivery dispatch to run when the transaction commits.
+
+    Every emit registers its own callback; a savepoint rollback drops
+    only the callbacks registered inside it. ``_dispatch_delivery()`` is
+    idempotent, so the extra callbacks of a transaction that emits many
+    events collapse into the debounce window instead of extra tasks.
+    """
+    transaction.on_commit(_dispatch_delivery)
+
+
+_debounce_lock = threading.Lock()
+_debounce_until = 0.0
+_trailing_queued = False
+
+
+def _dispatch_delivery():
+    """Enqueue a delivery task, debounced per process.
+
+    With no task pending, the task is enqueued at once and a window of
+    OUTBOX_DISPATCH_DEBOUNCE_SECONDS opens. The first dispatch inside the
+    window enqueues one more task for the end of the window, and later
+    ones are dropped: their events are already committed, so that task
+    picks them up. Eager mode (Dev, tests) dispatches every time.
+    """
+    global _debounce_until, _trailing_queued
+
+    with safe_dispatch("dispatch outbox delivery", logger):
+        from common.tasks import deliver_outbox_events_task
+
+        window = getattr(settings, "OUTBOX_DISPATCH_DEBOUNCE_SECONDS", 0)
+        if window <= 0 or getattr(settings, "CELERY_TASK_ALWAYS_EAGER", False):
+            deliver_outbox_events_task.delay()
+            return
+
+        with _debounce_lock:
+            now = time.monotonic()
+            if now >= _debounce_until:
+                _debounce_until = now + window
+                _trailing_queued = False
+                countdown = None
+            elif not _trailing_queued:
+                _trailing_queued = True
+                countdown = _debounce_until - now
+            else:
+                return
+        if countdown is None:
+            deliver_outbox_events_task.delay()
+        else:
+            deliver_outbox_events_task.apply_async(countdown=countdown)
+
+
+def default_worker_id():
+    """Return an identifier for this dispatcher process (host:pid)."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def process_pending_events(
+    batch_size=DELIVERY_BATCH_SIZE, *, worker_id=None, lease_seconds=None
+):
     """Process pending outbox events via webhook delivery.
 
     Three-phase approach to avoid holding row locks during HTTP I/O:
-    1. Fetch: lock and collect pending events
-    2. Deliver: POST to matching webhook endpoints (no DB locks)
+    1. Claim: lock pending events and stamp a lease (claimed_by,
+       lease_expires_at) in one short transaction
+    2. Deliver: POST to matching webhook endpoints concurrently
+       (asyncio fan-out, no DB locks), capped by WEBHOOK_MAX_IN_FLIGHT
+       overall and WEBHOOK_MAX_PER_ENDPOINT per endpoint
     3. Update: write delivery results back to the database
 
+    The lease lets any number of dispatchers run in parallel: events with
+    a live lease are skipped, phase 3 only writes events this worker
+    still holds, and a lease left behind by a crashed worker expires
+    after ``lease_seconds`` and is reclaimed.
+
     Events with no matching active endpoints are marked DELIVERED.
     On delivery failure, events are retried with exponential backoff.
     Events exceeding max_attempts are marked FAILED.
 
     Args:
         batch_size: Maximum events to process per call.
+        worker_id: Lease owner name. Defaults to ``default_worker_id()``
+            plus a random suffix, unique per call.
+        lease_seconds: Lease length. Defaults to
+            ``settings.OUTBOX_LEASE_SECONDS``; must outlast delivery.
 
     Returns:
         dict: {"processed": int, "delivered": int, "failed": int, "remaining": int}
+        where ``remaining`` is the PENDING backlog from
+        ``pending_outbox_backlog(estimate=True)`` (the planner estimate on
+        PostgreSQL, so no batch pays for a count).
     """
-    from common.models import WebhookEndpoint
-
+    worker_id = worker_id or f"{default_worker_id()}:{uuid.uuid4().hex[:8]}"
+    if lease_seconds is None:
+        lease_seconds = getattr(settings, "OUTBOX_LEASE_SECONDS", 300)
     now = timezone.now()
 
-    # Phase 1: Fetch pending events (short transaction, releases locks)
+    # Phase 1: Claim pending events with a lease (short transaction)
     with transaction.atomic():
         events = list(
             OutboxEvent.objects.filter(
+                Q(lease_expires_at__isnull=True) | Q(lease_expires_at__lte=now),
                 status=OutboxEvent.Status.PENDING,
                 next_attempt_at__lte=now,
-            ).select_for_update(skip_locked=True)[:batch_size]
+            )
+            .defer("payload")
+            .select_for_update(skip_locked=True)[:batch_size]
         )
+        if events:
+            OutboxEvent.objects.filter(pk__in=[e.pk for e in events]).update(
+                claimed_by=worker_id,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+            )
 
     if not events:
-        remaining = OutboxEvent.objects.filter(
-            status=OutboxEvent.Status.PENDING,
-        ).count()
+        remaining = pending_outbox_backlog(estimate=True)
         return {"processed": 0, "delivered": 0, "failed": 0, "remaining": remaining}
 
-    # Load active endpoints once for the batch
-    endpoints = list(WebhookEndpoint.objects.filter(is_active=True))
-
-    # Phase 2: Deliver (no transaction, no locks)
-    results = {}  # event.pk -> {"all_ok": bool, "error": str}
-    try:
-        with httpx.Client(timeout=WEBHOOK_TIMEOUT) as client:
-            for event in events:
-                matching = [
-                    ep
-                    for ep in endpoints
-                    if not ep.event_types or event.event_type in ep.event_types
-                ]
-
-                if not matching:
-                    # No matching endpoints — mark as delivered (no-op)
-                    results[event.pk] = {"all_ok": True, "error": ""}
-                    continue
-
-                from common.services.webhook import deliver_to_endpoint
-
-                errors = []
-                for ep in matching:
-                    result = deliver_to_endpoint(client, ep, event)
-                    if not result["ok"]:
-                        errors.append(f"{ep.url}: {result['error']}")
-
-                results[event.pk] = {
-                    "all_ok": len(errors) == 0,
-                    "error": "; ".join(errors),
-                }
-    except SoftTimeLimitExceeded:
-        logger.warning(
-            "Soft time limit reached during webhook delivery, "
-            "saving progress for %d/%d events.",
-            len(results),
-            len(events),
-        )
+    # Load this batch's delivery records once
+    by_event = defaultdict(list)
+    for delivery in WebhookDelivery.objects.filter(event__in=events).select_related(
+        "endpoint"
+    ):
+        by_event[delivery.event_id].append(delivery)
+    # Events created without emit_event() (or before any endpoint matched)
+    # get their delivery records now.
+    bare = [event for event in events if event.pk not in by_event]
+    if bare:
+        for delivery in _create_deliveries(bare):
+            by_event[delivery.event_id].append(delivery)
+    _skip_inactive_deliveries(by_event, now)
+    _render_missing_payloads(events)
+
+    # Phase 2: Deliver concurrently (no transaction, no locks)
+    results = {}  # event.pk -> {endpoint.pk: deliver_to_endpoint() result}
+    due = {}  # event.pk -> [WebhookDelivery] sent this round
+    fan = []
+    for event in events:
+        due[event.pk] = [
+            d
+            for d in by_event[event.pk]
+            if d.status == WebhookDelivery.Status.PENDING
+            and (d.next_attempt_at is None or d.next_attempt_at <= now)
+        ]
+        if due[event.pk]:
+            fan.append((event, [d.endpoint for d in due[event.pk]]))
+        else:
+            # Nothing to send (no matching endpoints) — settled in phase 3
+            results[event.pk] = {}
+
+    if fan:
+        try:
+            asyncio.run(
+                fan_out(
+                    fan,
+                    results,
+                    max_in_flight=getattr(
+                        settings, "WEBHOOK_MAX_IN_FLIGHT", WEBHOOK_MAX_IN_FLIGHT
+                    ),
+                    max_per_endpoint=getattr(
+                        settings, "WEBHOOK_MAX_PER_ENDPOINT", WEBHOOK_MAX_PER_ENDPOINT
+                    ),
+                    timeout=WEBHOOK_TIMEOUT,
+                )
+            )
+        except SoftTimeLimitExceeded:
+            logger.warning(
+                "Soft time limit reached during webhook delivery, "
+                "saving progress for %d/%d events.",
+                len(results),
+                len(events),
+            )
 
-    # Phase 3: Update event statuses (short transaction)
+    # Phase 3: Update deliveries and events, release leases (short transaction)
     delivered_count = 0
     failed_count = 0
     now = timezone.now()
@@ -162,44 +326,53 @@ def process_pending_events(batch_size=DELIVERY_BATCH_SIZE):
     with transaction.atomic():
         for event in events:
             if event.pk not in results:
-                # Not processed (soft time limit hit) — skip, will retry next sweep
+                # Not processed (soft time limit hit) — retried next sweep
                 continue
 
-            r = results[event.pk]
-            event.attempts += 1
+            outcomes = results[event.pk]
+            sent = [d for d in due[event.pk] if d.endpoint_id in outcomes]
+            for delivery in sent:
+                _apply_outcome(delivery, outcomes[delivery.endpoint_id], event, now)
+            fields = _settle_event(event, by_event[event.pk], sent, now)
+
+            # Only write events whose lease this worker still holds; if it
+            # lapsed, another dispatcher owns the event now.
+            claimed = OutboxEvent.objects.filter(pk=event.pk, claimed_by=worker_id)
+            if not claimed.update(
+                **fields, claimed_by="", lease_expires_at=None, updated_at=now
+            ):
+                logger.warning(
+                    "Outbox lease lost before update: event=%s worker=%s",
+                    event.pk,
+                    worker_id,
+                )
+                continue
 
-            if r["all_ok"]:
-                event.status = OutboxEvent.Status.DELIVERED
-                event.delivered_at = now
-                event.next_attempt_at = None
-                event.error_message = ""
+            for delivery in sent:
+                delivery.save(
+                    update_fields=[
+                        "status",
+                        "attempts",
+                        "delivered_at",
+                        "next_attempt_at",
+                        "status_code",
+                        "error_message",
+                        "updated_at",
+                    ]
+                )
+
+            if fields.get("status") == OutboxEvent.Status.DELIVERED:
                 delivered_count += 1
-            elif event.attempts >= event.max_attempts:
-                event.status = OutboxEvent.Status.FAILED
-                event.next_attempt_at = None
-                event.error_message = r["error"]
+            elif fields.get("status") == OutboxEvent.Status.FAILED:
                 failed_count += 1
-            else:
-                # Retry with exponential backoff + jitter
-                delay = min(60 * (2 ** (event.attempts - 1)), 3600)
-                jitter = random.uniform(0, delay * 0.1)
-                event.next_attempt_at = now + timedelta(seconds=delay + jitter)
-                event.error_message = r["error"]
-
-            event.save(
-                update_fields=[
-                    "status",
-                    "attempts",
-                    "delivered_at",
-                    "next_attempt_at",
-                    "error_message",
-                    "updated_at",
-                ]
+
+        unprocessed = [e.pk for e in events if e.pk not in results]
+        if unprocessed:
+            OutboxEvent.objects.filter(pk__in=unprocessed, claimed_by=worker_id).update(
+                claimed_by="", lease_expires_at=None
             )
 
-    remaining = OutboxEvent.objects.filter(
-        status=OutboxEvent.Status.PENDING,
-    ).count()
+    remaining = pending_outbox_backlog(estimate=True)
 
     return {
         "processed": len(results),
@@ -209,37 +382,210 @@ def process_pending_events(batch_size=DELIVERY_BATCH_SIZE):
     }
 
 
-def cleanup_delivered_events(retention_hours=168):
+def _create_deliveries(events, index=None):
+    """Create a pending WebhookDelivery per (event, matching active endpoint).
+
+    Endpoints are matched through the cached subscription index (see
+    ``common.services.subscriptions``) rather than loaded per call.
+    Deliveries inherit the event's attempts and next attempt time, so
+    events that predate delivery records keep their retry budget.
+
+    Returns:
+        List of created WebhookDelivery instances.
+    """
+    if index is None:
+        index = get_subscription_index()
+    rows = [
+        WebhookDelivery(
+            event=event,
+            endpoint=endpoint,
+            attempts=event.attempts,
+            next_attempt_at=event.next_attempt_at,
+        )
+        for event in events
+        for endpoint in index.match(event.event_type)
+    ]
+    if not rows:
+        return []
+    return WebhookDelivery.objects.bulk_create(rows)
+
+
+def _render_missing_payloads(events):
+    """Give each claimed event its request body before the fan-out.
+
+    The claim query defers the JSON ``payload``: events from
+    ``emit_event()``/``emit_events()`` carry ``rendered_payload`` already.
+    Rows written some other way are rendered from one payload query.
+    """
+    missing = [event.pk for event in events if event.rendered_payload is None]
+    payloads = {}
+    if missing:
+        payloads = dict(
+            OutboxEvent.objects.filter(pk__in=missing).values_list("pk", "payload")
+        )
+    for event in events:
+        if event.rendered_payload is None:
+            event.rendered_payload = render_payload(payloads[event.pk])
+        else:
+            event.rendered_payload = bytes(event.rendered_payload)
+
+
+def _skip_inactive_deliveries(by_event, now):
+    """Mark pending deliveries to since-deactivated endpoints SKIPPED."""
+    skipped = [
+        d
+        for deliveries in by_event.values()
+        for d in deliveries
+        if d.status == WebhookDelivery.Status.PENDING and not d.endpoint.is_active
+    ]
+    if not skipped:
+        return
+    WebhookDelivery.objects.filter(pk__in=[d.pk for d in skipped]).update(
+        status=WebhookDelivery.Status.SKIPPED, next_attempt_at=None, updated_at=now
+    )
+    for delivery in skipped:
+        delivery.status = WebhookDelivery.Status.SKIPPED
+        delivery.next_attempt_at = None
+
+
+def _backoff(attempts, now):
+    """Next attempt time after ``attempts`` failures: exponential + jitter."""
+    delay = min(60 * (2 ** (attempts - 1)), 3600)
+    jitter = random.uniform(0, delay * 0.1)
+    return now + timedelta(seconds=delay + jitter)
+
+
+def _apply_outcome(delivery, outcome, event, now):
+    """Apply one POST result to a WebhookDelivery in memory."""
+    delivery.attempts += 1
+    delivery.status_code = outcome["status_code"]
+    delivery.error_message = outcome["error"]
+    if outcome["ok"]:
+        delivery.status = WebhookDelivery.Status.DELIVERED
+        delivery.delivered_at = now
+        delivery.next_attempt_at = None
+    elif delivery.attempts >= event.max_attempts:
+        delivery.status = WebhookDelivery.Status.FAILED
+        delivery.next_attempt_at = None
+    else:
+        delivery.next_attempt_at = _backoff(delivery.attempts, now)
+
+
+def _settle_event(event, deliveries, sent, now):
+    """Return the OutboxEvent field updates after a delivery round.
+
+    The event stays PENDING (due at its earliest pending delivery) until
+    every delivery is terminal; it is then FAILED if any delivery failed
+    and DELIVERED otherwise.
+    """
+    fields = {}
+    if sent:
+        fields["attempts"] = event.attempts + 1
+        fields["error_message"] = "; ".join(
+            f"{d.endpoint.url}: {d.error_message}" for d in sent if d.error_message
+        )
+
+    pending = [d for d in deliveries if d.status == WebhookDelivery.Status.PENDING]
+    if pending:
+        fields["next_attempt_at"] = min(d.next_attempt_at or now for d in pending)
+    elif any(d.status == WebhookDelivery.Status.FAILED for d in deliveries):
+        fields.update(status=OutboxEvent.Status.FAILED, next_attempt_at=None)
+        fields["error_message"] = "; ".join(
+            f"{d.endpoint.url}: {d.error_message}"
+            for d in deliveries
+            if d.status == WebhookDelivery.Status.FAILED
+        )
+    else:
+        fields.update(
+            status=OutboxEvent.Status.DELIVERED,
+            delivered_at=now,
+            next_attempt_at=None,
+            error_message="",
+        )
+    return fields
+
+
+def cleanup_delivered_events(retention_hours=168, *, cursor=None, budget=None):
     """Delete terminal outbox events older than the retention period.
 
     Targets events with status DELIVERED or FAILED that are older
-    than retention_hours.
+    than retention_hours. On PostgreSQL, a fresh sweep (no ``cursor``)
+    first calls ``maintain_partitions()``: day partitions entirely past
+    the cutoff are dropped (after deleting their WebhookDelivery rows)
+    unless they still hold a pending event. The rest -- everything on
+    SQLite -- is deleted by a time-budgeted ``run_sweep()`` in
+    CLEANUP_BATCH_SIZE chunks. ``remaining`` is 0 once the sweep is
+    done, else ``count_backlog()`` of what is left.
 
     Args:
         retention_hours: Hours to retain terminal events (default 168 = 7 days).
+        cursor: Resume a previous sweep after this event pk.
+        budget: Sweep time budget in seconds (default ``sweep_budget()``).
 
     Returns:
-        dict: {"deleted": int, "remaining": int}
+        dict: {"deleted": int, "remaining": int, "rows_per_sec": float,
+        "done": bool, "cursor": str|None}
     """
     cutoff = timezone.now() - timedelta(hours=retention_hours)
+    dropped_rows = 0
+    if cursor is None:
+        partitions = maintain_partitions(
+            OutboxEvent._meta.db_table,
+            cutoff,
+            before_drop=_delete_partition_deliveries,
+        )
+        dropped_rows = partitions["rows"]
+        if partitions["dropped"]:
+            logger.info(
+                "Dropped %d outbox partitions (~%d events), kept %d with pending "
+                "events.",
+                partitions["dropped"],
+                partitions["rows"],
+                partitions["held"],
+            )
+
     terminal_qs = OutboxEvent.objects.filter(
         status__in=[OutboxEvent.Status.DELIVERED, OutboxEvent.Status.FAILED],
         created_at__lt=cutoff,
     )
-    total_terminal = terminal_qs.count()
 
-    if total_terminal == 0:
-        return {"deleted": 0, "remaining": 0}
+    def delete_chunk(pks):
+        _, per_model = OutboxEvent.objects.filter(pk__in=pks).delete()
+        return per_model.get(OutboxEvent._meta.label, 0)
 
-    batch_pks = list(
-        terminal_qs.order_by("pk").values_list("pk", flat=True)[:CLEANUP_BATCH_SIZE]
+    sweep = run_sweep(
+        terminal_qs,
+        delete_chunk,
+        chunk_size=CLEANUP_BATCH_SIZE,
+        cursor=cursor,
+        budget=budget,
     )
-    deleted_count, _ = OutboxEvent.objects.filter(pk__in=batch_pks).delete()
-    remaining = max(0, total_terminal - deleted_count)
+    remaining = 0 if sweep["done"] else count_backlog(terminal_qs)
+
+    if sweep["handled"]:
+        logger.info(
+            "Cleaned up %d terminal outbox events (%.1f rows/s), %d remaining.",
+            sweep["handled"],
+            sweep["rows_per_sec"],
+            remaining,
+        )
+    return {
+        "deleted": dropped_rows + sweep["handled"],
+        "remaining": remaining,
+        "rows_per_sec": sweep["rows_per_sec"],
+        "done": sweep["done"],
+        "cursor": sweep["cursor"],
+    }
 
-    logger.info(
-        "Cleaned up %d terminal outbox events, %d remaining.",
-        deleted_count,
-        remaining,
+
+def _delete_partition_deliveries(cursor, partition):
+    """Delete the WebhookDelivery rows of a partition about to be dropped.
+
+    Runs before the drop's own transaction, so deliveries of an event
+    that turned pending meanwhile (keeping the partition) are spared.
+    """
+    cursor.execute(
+        f"DELETE FROM {WebhookDelivery._meta.db_table} "
+        f'WHERE event_id IN (SELECT id FROM "{partition}" '
+        "WHERE status <> 'pending')"
     )
-    return {"deleted": deleted_count, "remaining": remaining}
@@ -0,0 +1,337 @@
+"""Daily ``created_at`` partitions for the outbox tables (PostgreSQL only).
+
+On PostgreSQL, ``outbox_event`` and ``portal_event_outbox`` are range
+partitioned by ``created_at`` day (migrations ``common.0008`` and
+``portal.0008``): one ``{table}_pYYYYMMDD`` partition per UTC day plus a
+``{table}_default`` catch-all. The partial pending index is declared on
+the parent, so every partition carries its own copy.
+
+Retention then drops whole partitions instead of deleting rows, which
+costs the same (a catalog update) whatever their size and leaves no
+dead tuples behind. A partition that still holds a PENDING row is kept
+until a later run.
+
+Partitioned tables cannot carry a unique constraint without the
+partition key, so the ``(event_type, idempotency_key)`` uniqueness is
+enforced by a ``BEFORE INSERT`` trigger that serializes on an advisory
+lock and raises ``unique_violation`` (``IntegrityError`` in Django), as
+the constraint did. The migrations drop the constraint from the
+migration state as well, so it matches the schema.
+
+The conversion needs PostgreSQL 13 or later, the first release with
+BEFORE ROW triggers on partitioned tables; ``partition_table()`` refuses
+older servers.
+
+On other databases (SQLite in Dev) the tables stay plain and every
+function here is a no-op; row-by-row cleanup still applies.
+"""
+
+import logging
+from datetime import UTC, datetime, timedelta
+
+from django.db import NotSupportedError, OperationalError, connection, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PARTITION_DAYS_AHEAD = 7
+# First release with BEFORE ROW triggers on partitioned tables
+MIN_SERVER_VERSION = 130000
+# How long a partition drop waits for the parent table's lock
+DROP_LOCK_TIMEOUT = "5s"
+
+
+def partition_name(table, day):
+    """Return the name of ``table``'s partition for ``day`` (a date)."""
+    return f"{table}_p{day:%Y%m%d}"
+
+
+def _day_bounds(day):
+    start = datetime(day.year, day.month, day.day, tzinfo=UTC)
+    return start, start + timedelta(days=1)
+
+
+def _partition_of_sql(table, day):
+    start, end = _day_bounds(day)
+    return (
+        f'CREATE TABLE IF NOT EXISTS "{partition_name(table, day)}" '
+        f'PARTITION OF "{table}" '
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def is_partitioned(table):
+    """Return True if ``table`` is a partitioned table (PostgreSQL only)."""
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table p "
+            "JOIN pg_class c ON c.oid = p.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(table):
+    """Return ``{day: partition name}`` for ``table``'s daily partitions.
+
+    The default partition is not included.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = %s AND pg_table_is_visible(p.oid)",
+            [table],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    prefix = f"{table}_p"
+    partitions = {}
+    for name in names:
+        if name.startswith(prefix):
+            try:
+                day = datetime.strptime(name[len(prefix) :], "%Y%m%d").date()
+            except ValueError:
+                continue
+            partitions[day] = name
+    return partitions
+
+
+def ensure_partitions(table, *, days_ahead=PARTITION_DAYS_AHEAD, today=None):
+    """Create ``table``'s daily partitions from today to ``days_ahead``.
+
+    A day whose rows already landed in the default partition is skipped
+    (attaching it would fail); those rows are retired by row cleanup.
+
+    Returns:
+        list[str]: Names of the partitions created.
+    """
+    today = today or timezone.now().date()
+    existing = list_partitions(table)
+    created = []
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        if day in existing:
+            continue
+        created_name = create_partition(table, day)
+        if created_name:
+            created.append(created_name)
+    return created
+
+
+def create_partition(table, day):
+    """Create ``table``'s partition for ``day``; return its name or None."""
+    name = partition_name(table, day)
+    start, end = _day_bounds(day)
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT 1 FROM "{table}_default" '
+            "WHERE created_at >= %s AND created_at < %s LIMIT 1",
+            [start, end],
+        )
+        if cursor.fetchone():
+            logger.warning(
+                "Not creating partition %s: rows for that day are in %s_default.",
+                name,
+                table,
+            )
+            return None
+        cursor.execute(_partition_of_sql(table, day))
+    return name
+
+
+def _has_pending_rows(cursor, name):
+    cursor.execute(f"SELECT 1 FROM \"{name}\" WHERE status = 'pending' LIMIT 1")
+    return cursor.fetchone() is not None
+
+
+def drop_expired_partitions(table, cutoff, *, before_drop=None):
+    """Drop ``table``'s daily partitions that end at or before ``cutoff``.
+
+    Partitions with PENDING rows are kept. ``before_drop`` runs first,
+    in its own transaction; the drop itself is a short transaction that
+    locks the parent before the partition -- the order every query on
+    the table takes, so it cannot deadlock against live dispatchers --
+    and re-checks for PENDING rows under that lock. The parent lock is
+    requested with ``DROP_LOCK_TIMEOUT`` so a long-running transaction
+    cannot queue every outbox writer behind it; a partition that cannot
+    be locked in time is kept for the next run.
+
+    Args:
+        table: The partitioned table.
+        cutoff: Aware datetime; partitions entirely older are dropped.
+        before_drop: Optional ``callable(cursor, partition)`` run before
+            the drop (e.g. to remove rows that reference the partition's
+            events).
+
+    Returns:
+        dict: {"dropped": int, "rows": int (planner estimate), "held": int}
+    """
+    result = {"dropped": 0, "rows": 0, "held": 0}
+    for day, name in sorted(list_partitions(table).items()):
+        if _day_bounds(day)[1] > cutoff:
+            break
+        with transaction.atomic(), connection.cursor() as cursor:
+            held = _has_pending_rows(cursor, name)
+            if not held and before_drop:
+                before_drop(cursor, name)
+        if held:
+            logger.warning("Keeping partition %s: it has pending rows.", name)
+            result["held"] += 1
+            continue
+        try:
+            rows = _drop_partition(table, name)
+        except OperationalError:  # lock_timeout
+            logger.warning("Keeping partition %s: %s is busy.", name, table)
+            result["held"] += 1
+            continue
+        if rows is None:
+            logger.warning("Keeping partition %s: it has pending rows.", name)
+            result["held"] += 1
+            continue
+        result["dropped"] += 1
+        result["rows"] += rows
+        logger.info("Dropped partition %s (~%d rows).", name, rows)
+    return result
+
+
+def _drop_partition(table, name):
+    """Drop one partition under the parent lock; None if it has pending rows."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"SET LOCAL lock_timeout = '{DROP_LOCK_TIMEOUT}'")
+        cursor.execute(f'LOCK TABLE "{table}" IN ACCESS EXCLUSIVE MODE')
+        if _has_pending_rows(cursor, name):
+            return None
+        cursor.execute(
+            "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE relname = %s",
+            [name],
+        )
+        rows = cursor.fetchone()[0]
+        cursor.execute(f'DROP TABLE "{name}"')
+    return rows
+
+
+def maintain_partitions(table, cutoff, *, before_drop=None):
+    """Create upcoming partitions and drop expired ones for ``table``.
+
+    A no-op (all zeros) when ``table`` is not partitioned.
+
+    Returns:
+        dict: {"created": int, "dropped": int, "rows": int, "held": int}
+    """
+    if not is_partitioned(table):
+        return {"created": 0, "dropped": 0, "rows": 0, "held": 0}
+    created = ensure_partitions(table)
+    result = drop_expired_partitions(table, cutoff, before_drop=before_drop)
+    result["created"] = len(created)
+    return result
+
+
+# -- Conversion (used by the migrations) ------------------------------------
+
+
+def partition_table(schema_editor, table, *, unique_name, pending_index):
+    """Convert plain ``table`` into a ``created_at``-partitioned table.
+
+    Copies the rows into daily partitions (plus a default partition),
+    keys the parent on ``(id, created_at)``, recreates the partial
+    pending index on the parent and replaces the ``unique_name``
+    constraint with the idempotency trigger. Triggers on the old table
+    are dropped with it; the caller recreates any it still needs.
+
+    The copy is a single ``INSERT ... SELECT`` inside the migration's
+    transaction, so the table stays ACCESS EXCLUSIVE locked until it
+    commits: a maintenance-window operation. Batching would not help
+    while the rename holds that lock for the whole transaction.
+
+    Raises:
+        NotSupportedError: If the server is older than PostgreSQL 13
+            (checked before anything is changed).
+    """
+    server_version = schema_editor.connection.pg_version
+    if server_version < MIN_SERVER_VERSION:
+        raise NotSupportedError(
+            f"Partitioning {table} needs PostgreSQL 13 or later "
+            f"(server version {server_version})."
+        )
+    legacy = f"{table}_unpartitioned"
+    execute = schema_editor.execute
+    execute(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+    execute(
+        f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS '
+        "INCLUDING CONSTRAINTS) PARTITION BY RANGE (created_at)"
+    )
+    execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(f'SELECT min(created_at) FROM "{legacy}"')
+        oldest = cursor.fetchone()[0]
+    today = timezone.now().date()
+    day = oldest.astimezone(UTC).date() if oldest else today
+    while day <= today + timedelta(days=PARTITION_DAYS_AHEAD):
+        execute(_partition_of_sql(table, day))
+        day += timedelta(days=1)
+
+    execute(f'INSERT INTO "{table}" SELECT * FROM "{legacy}"')
+    execute(f'DROP TABLE "{legacy}"')
+    execute(f'ALTER TABLE "{table}" ADD PRIMARY KEY (id, created_at)')
+    execute(
+        f'CREATE INDEX "{pending_index}" ON "{table}" (next_attempt_at) '
+        "WHERE status = 'pending'"
+    )
+    execute(
+        f'CREATE INDEX "{table}_idempotency_idx" '
+        f'ON "{table}" (event_type, idempotency_key)'
+    )
+    execute(_idempotency_trigger_sql(table, unique_name))
+
+
+def unpartition_table(schema_editor, table, *, unique_name, pending_index):
+    """Reverse ``partition_table()``: copy back into a plain table."""
+    partitioned = f"{table}_partitioned"
+    execute = schema_editor.execute
+    execute(f'ALTER TABLE "{table}" RENAME TO "{partitioned}"')
+    execute(
+        f'CREATE TABLE "{table}" (LIKE "{partitioned}" INCLUDING DEFAULTS '
+        "INCLUDING CONSTRAINTS)"
+    )
+    execute(f'INSERT INTO "{table}" SELECT * FROM "{partitioned}"')
+    execute(f'DROP TABLE "{partitioned}" CASCADE')
+    execute(f'DROP FUNCTION IF EXISTS "{table}_idempotency_guard"()')
+    execute(f'ALTER TABLE "{table}" ADD PRIMARY KEY (id)')
+    execute(
+        f'CREATE INDEX "{pending_index}" ON "{table}" (next_attempt_at) '
+        "WHERE status = 'pending'"
+    )
+    execute(
+        f'ALTER TABLE "{table}" ADD CONSTRAINT "{unique_name}" '
+        "UNIQUE (event_type, idempotency_key)"
+    )
+
+
+def _idempotency_trigger_sql(table, unique_name):
+    return f"""
+CREATE OR REPLACE FUNCTION "{table}_idempotency_guard"() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(
+        hashtextextended('{table}:' || NEW.event_type || ':' || NEW.idempotency_key, 0)
+    );
+    IF EXISTS (
+        SELECT 1 FROM "{table}"
+        WHERE event_type = NEW.event_type AND idempotency_key = NEW.idempotency_key
+    ) THEN
+        RAISE unique_violation USING
+            MESSAGE = 'duplicate key value violates unique constraint "{unique_name}"',
+            CONSTRAINT = '{unique_name}';
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER "{table}_idempotency"
+BEFORE INSERT ON "{table}"
+FOR EACH ROW EXECUTE FUNCTION "{table}_idempotency_guard"();
+"""
@@ -0,0 +1,112 @@
+"""Cached event-type subscription index for webhook endpoint matching.
+
+The index maps each event type to its active endpoints (catch-all
+endpoints, with an empty ``event_types`` list, included), so matching an
+event is one dict lookup. It is cached per process and rebuilt only when
+``WebhookSubscriptionVersion.version`` changes; the ``WebhookEndpoint``
+post_save/post_delete signals bump it. Queryset ``update()`` calls
+bypass the signals -- call ``bump_subscription_version()`` after them.
+
+Each bump writes a fresh random version rather than ``version + 1``: an
+index built inside a transaction that later rolls back must never match
+a version committed afterwards.
+"""
+
+import secrets
+import threading
+
+from common.models import WebhookEndpoint, WebhookSubscriptionVersion
+
+VERSION_PK = 1
+
+
+class SubscriptionIndex:
+    """Active endpoints grouped by the event types they subscribe to."""
+
+    def __init__(self, endpoints, version=None):
+        self.version = version
+        self.endpoints = list(endpoints)
+        self._catch_all = []
+        self._by_type = {}
+        for endpoint in self.endpoints:
+            if not endpoint.event_types:
+                self._catch_all.append(endpoint)
+            # A type listed twice must not match (and be delivered) twice
+            for event_type in dict.fromkeys(endpoint.event_types or ()):
+                self._by_type.setdefault(event_type, []).append(endpoint)
+        self._matches = {}
+
+    def match(self, event_type):
+        """Return the endpoints (tuple) that accept ``event_type``."""
+        matches = self._matches.get(event_type)
+        if matches is None:
+            matches = tuple(self._catch_all) + tuple(self._by_type.get(event_type, ()))
+            self._matches[event_type] = matches
+        return matches
+
+    def __len__(self):
+        return len(self.endpoints)
+
+
+_lock = threading.Lock()
+_cached = None
+
+
+def current_subscription_version():
+    """Return the current subscription version (0 if never bumped)."""
+    version = (
+        WebhookSubscriptionVersion.objects.filter(pk=VERSION_PK)
+        .values_list("version", flat=True)
+        .first()
+    )
+    return version or 0
+
+
+def bump_subscription_version():
+    """Invalidate all cached subscription indexes.
+
+    Returns:
+        int: The new version. The version row is created on first use.
+    """
+    version = secrets.randbits(62) + 1
+    updated = WebhookSubscriptionVersion.objects.filter(pk=VERSION_PK).update(
+        version=version
+    )
+    if not updated:
+        WebhookSubscriptionVersion.objects.update_or_create(
+            pk=VERSION_PK, defaults={"version": version}
+        )
+    return version
+
+
+def get_subscription_index():
+    """Return this process's subscription index, rebuilding it if stale.
+
+    Costs one primary-key lookup when the cached index is current, and
+    one endpoint query when it has to be rebuilt.
+
+    Returns:
+        SubscriptionIndex over the active WebhookEndpoint rows.
+    """
+    global _cached
+
+    version = current_subscription_version()
+    index = _cached
+    if index is not None and index.version == version:
+        return index
+
+    with _lock:
+        if _cached is not None and _cached.version == version:
+            return _cached
+        _cached = SubscriptionIndex(
+            WebhookEndpoint.objects.filter(is_active=True), version
+        )
+        return _cached
+
+
+def clear_subscription_index():
+    """Drop this process's cached index (tests, forked workers)."""
+    global _cached
+
+    with _lock:
+        _cached = None
@@ -0,0 +1,96 @@
+"""Resumable, time-budgeted sweeps for the cleanup and notification tasks.
+
+A sweep walks a queryset in primary-key order (uuid7, so roughly
+creation order), one chunk at a time, until the queryset is exhausted
+or the time budget -- ``SWEEP_TIME_BUDGET_SECONDS``, kept below
+``CELERY_TASK_SOFT_TIME_LIMIT`` -- is spent. The last primary key
+handled is returned as a cursor; the task re-enqueues itself with it
+(``continue_sweep()``) so a large backlog drains in back-to-back runs
+instead of one chunk per beat slot.
+"""
+
+import logging
+import time
+
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SWEEP_CHUNK_SIZE = 1000
+
+
+def sweep_budget():
+    """Return the default sweep time budget in seconds."""
+    return getattr(settings, "SWEEP_TIME_BUDGET_SECONDS", 210)
+
+
+def run_sweep(queryset, handle_chunk, *, chunk_size=None, cursor=None, budget=None):
+    """Feed ``queryset``'s primary keys to ``handle_chunk`` until done or out of time.
+
+    At least one chunk is handled per call. A Celery soft time limit
+    ends the sweep early; the interrupted chunk is retried next run.
+
+    Args:
+        queryset: Rows still to sweep (re-evaluated per chunk, so rows
+            the handler deletes or changes drop out).
+        handle_chunk: ``callable(pks)`` returning the number of rows it
+            handled.
+        chunk_size: Primary keys per chunk; defaults to SWEEP_CHUNK_SIZE.
+        cursor: Resume after this primary key (from a previous run).
+        budget: Seconds to keep going; defaults to ``sweep_budget()``.
+
+    Returns:
+        dict: {"handled": int, "chunks": int, "cursor": str|None,
+        "done": bool, "seconds": float, "rows_per_sec": float}
+    """
+    chunk_size = chunk_size or SWEEP_CHUNK_SIZE
+    budget = sweep_budget() if budget is None else budget
+    started = time.monotonic()
+    handled = 0
+    chunks = 0
+    done = False
+    try:
+        while True:
+            chunk = queryset.order_by("pk")
+            if cursor is not None:
+                chunk = chunk.filter(pk__gt=cursor)
+            pks = list(chunk.values_list("pk", flat=True)[:chunk_size])
+            if pks:
+                handled += handle_chunk(pks)
+                chunks += 1
+                cursor = pks[-1]
+            if len(pks) < chunk_size:
+                done = True
+                break
+            if time.monotonic() - started >= budget:
+                break
+    except SoftTimeLimitExceeded:
+        logger.warning("Soft time limit reached, sweep stopped at %s.", cursor)
+
+    seconds = time.monotonic() - started
+    return {
+        "handled": handled,
+        "chunks": chunks,
+        "cursor": str(cursor) if cursor is not None else None,
+        "done": done,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(handled / seconds, 1) if seconds > 0 else 0.0,
+    }
+
+
+def continue_sweep(task, sweep, **kwargs):
+    """Re-enqueue ``task`` from ``sweep``'s cursor if the backlog is not drained.
+
+    Eager runs (``CELERY_TASK_ALWAYS_EAGER`` in Dev and tests) never
+    re-enqueue: ``apply_async()`` would run the rest of the sweep inline.
+
+    Returns:
+        bool: True if the task was re-enqueued.
+    """
+    if sweep["done"] or task.request.is_eager:
+        return False
+    if getattr(settings, "CELERY_TASK_ALWAYS_EAGER", False):
+        return False
+    task.apply_async(kwargs={**kwargs, "cursor": sweep["cursor"]})
+    return True
@@ -1,15 +1,27 @@
 """Webhook delivery service for outbox events."""
 
+import asyncio
 import hashlib
 import hmac
-import json
 import logging
+import math
+from collections import defaultdict
 
 import httpx
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:  # Optional: faster payload rendering
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
 WEBHOOK_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+WEBHOOK_MAX_IN_FLIGHT = 50
+WEBHOOK_MAX_PER_ENDPOINT = 5
+
+_json_encoder = DjangoJSONEncoder(separators=(",", ":"), ensure_ascii=False)
 
 
 def compute_signature(payload_bytes, secret):
@@ -22,48 +34,100 @@ def compute_signature(payload_bytes, secret):
     Returns:
         Hex-encoded HMAC-SHA256 signature string.
     """
-    return hmac.new(
-        secret.encode("utf-8"), payload_bytes, hashlib.sha256
-    ).hexdigest()
+    return hmac.new(secret.encode("utf-8"), payload_bytes, hashlib.sha256).hexdigest()
 
 
-def deliver_to_endpoint(client, endpoint, event):
-    """Deliver an outbox event to a single webhook endpoint.
+def render_payload(payload):
+    """Serialize an event payload to the canonical JSON request body.
 
-    Posts the event payload as JSON with HMAC signature and
-    metadata headers.
+    The canonical encoding is the standard library's: no whitespace,
+    UTF-8 (no ASCII escaping) and DjangoJSONEncoder for dates, times,
+    durations, decimals, UUIDs and lazy strings. orjson renders it when
+    installed, but only for payloads whose bytes it reproduces exactly;
+    anything else (floats written with an exponent or non-finite, non-str
+    keys, integers beyond 64 bits) takes the standard library path, so
+    the signed bytes never depend on whether orjson is installed. Called
+    once per event at emit time; the bytes are stored on the event and
+    reused for every endpoint and retry.
 
     Args:
-        client: An httpx.Client instance (for connection pooling).
-        endpoint: A WebhookEndpoint instance.
-        event: An OutboxEvent instance.
+        payload: The event payload (JSON-serializable dict).
 
     Returns:
-        dict: {"ok": bool, "status_code": int|None, "error": str}
+        bytes: The UTF-8 encoded JSON body.
     """
-    payload_bytes = json.dumps(event.payload, default=str).encode("utf-8")
-    signature = compute_signature(payload_bytes, endpoint.secret)
+    if orjson is not None and not _has_unportable_float(payload):
+        try:
+            return orjson.dumps(
+                payload,
+                default=_orjson_default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_DATACLASS
+                | orjson.OPT_PASSTHROUGH_SUBCLASS,
+            )
+        except TypeError:
+            pass  # e.g. non-str keys or big integers; the stdlib handles them
+    return _json_encoder.encode(payload).encode("utf-8")
+
+
+def _orjson_default(obj):
+    # Subclasses of JSON types (str/int enums, namedtuples) as the stdlib
+    # writes them: by value, ignoring any __str__ override
+    if isinstance(obj, str):
+        return str.__str__(obj)
+    if isinstance(obj, int):
+        return int.__int__(obj)
+    if isinstance(obj, dict):
+        return dict(obj)
+    if isinstance(obj, list | tuple):
+        return list(obj)
+    return _json_encoder.default(obj)
+
+
+def _has_unportable_float(obj):
+    """Return True if ``obj`` holds a float orjson would format differently.
 
+    orjson and ``float.__repr__`` agree on finite floats in plain decimal
+    notation; they differ on exponents (``1e16`` vs ``1e+16``) and on
+    NaN/Infinity (``null`` vs ``NaN``).
+    """
+    if isinstance(obj, float):
+        return not (math.isfinite(obj) and (obj == 0 or 1e-4 <= abs(obj) < 1e16))
+    if isinstance(obj, dict):
+        return any(_has_unportable_float(value) for value in obj.values())
+    if isinstance(obj, list | tuple):
+        return any(_has_unportable_float(item) for item in obj)
+    return False
+
+
+def _build_request(endpoint, event):
+    # Pre-rendered at emit; rows written some other way are rendered now
+    if event.rendered_payload is not None:
+        payload_bytes = bytes(event.rendered_payload)
+    else:
+        payload_bytes = render_payload(event.payload)
+    signature = compute_signature(payload_bytes, endpoint.secret)
     headers = {
         "Content-Type": "application/json",
         "X-Webhook-Signature": signature,
         "X-Webhook-Event": event.event_type,
         "X-Webhook-Delivery": str(event.pk),
     }
+    return payload_bytes, headers
 
-    try:
-        response = client.post(
-            str(endpoint.url), content=payload_bytes, headers=headers
-        )
-        response.raise_for_status()
-        logger.info(
-            "Webhook delivered: event=%s endpoint=%s status=%d",
-            event.pk,
-            endpoint.url,
-            response.status_code,
-        )
-        return {"ok": True, "status_code": response.status_code, "error": ""}
-    except httpx.HTTPStatusError as exc:
+
+def _success_result(endpoint, event, response):
+    logger.info(
+        "Webhook delivered: event=%s endpoint=%s status=%d",
+        event.pk,
+        endpoint.url,
+        response.status_code,
+    )
+    return {"ok": True, "status_code": response.status_code, "error": ""}
+
+
+def _error_result(endpoint, event, exc):
+    if isinstance(exc, httpx.HTTPStatusError):
         error = f"HTTP {exc.response.status_code}: {exc.response.text[:200]}"
         logger.warning(
             "Webhook HTTP error: event=%s endpoint=%s error=%s",
@@ -72,12 +136,117 @@ def deliver_to_endpoint(client, endpoint, event):
             error,
         )
         return {"ok": False, "status_code": exc.response.status_code, "error": error}
-    except httpx.RequestError as exc:
-        error = f"{type(exc).__name__}: {exc}"
-        logger.warning(
-            "Webhook request error: event=%s endpoint=%s error=%s",
-            event.pk,
-            endpoint.url,
-            error,
+    error = f"{type(exc).__name__}: {exc}"
+    logger.warning(
+        "Webhook request error: event=%s endpoint=%s error=%s",
+        event.pk,
+        endpoint.url,
+        error,
+    )
+    return {"ok": False, "status_code": None, "error": error}
+
+
+def deliver_to_endpoint(client, endpoint, event):
+    """Deliver an outbox event to a single webhook endpoint.
+
+    Posts the event payload as JSON with HMAC signature and
+    metadata headers.
+
+    Args:
+        client: An httpx.Client instance (for connection pooling).
+        endpoint: A WebhookEndpoint instance.
+        event: An OutboxEvent instance.
+
+    Returns:
+        dict: {"ok": bool, "status_code": int|None, "error": str}
+    """
+    payload_bytes, headers = _build_request(endpoint, event)
+    try:
+        response = client.post(
+            str(endpoint.url), content=payload_bytes, headers=headers
+        )
+        response.raise_for_status()
+    except (httpx.HTTPStatusError, httpx.RequestError) as exc:
+        return _error_result(endpoint, event, exc)
+    return _success_result(endpoint, event, response)
+
+
+async def deliver_to_endpoint_async(client, endpoint, event):
+    """Async counterpart of ``deliver_to_endpoint()``.
+
+    Args:
+        client: An httpx.AsyncClient instance.
+        endpoint: A WebhookEndpoint instance.
+        event: An OutboxEvent instance.
+
+    Returns:
+        dict: {"ok": bool, "status_code": int|None, "error": str}
+    """
+    payload_bytes, headers = _build_request(endpoint, event)
+    try:
+        response = await client.post(
+            str(endpoint.url), content=payload_bytes, headers=headers
+        )
+        response.raise_for_status()
+    except (httpx.HTTPStatusError, httpx.RequestError) as exc:
+        return _error_result(endpoint, event, exc)
+    return _success_result(endpoint, event, response)
+
+
+async def fan_out(
+    deliveries,
+    results,
+    *,
+    max_in_flight=WEBHOOK_MAX_IN_FLIGHT,
+    max_per_endpoint=WEBHOOK_MAX_PER_ENDPOINT,
+    timeout=WEBHOOK_TIMEOUT,
+    transport=None,
+):
+    """Deliver events to their endpoints concurrently.
+
+    Every (event, endpoint) POST runs as its own task on one shared
+    ``httpx.AsyncClient``. A global semaphore caps the requests in flight
+    and a per-endpoint semaphore keeps one slow or rate-limited receiver
+    from taking every slot, so a batch costs roughly one round trip to
+    the slowest endpoint instead of the sum of all of them.
+
+    ``results`` is filled in as each POST finishes, so a caller that is
+    interrupted (e.g. a Celery soft time limit) keeps the outcomes
+    recorded so far. Must not touch the database.
+
+    Args:
+        deliveries: Iterable of ``(event, endpoints)`` pairs.
+        results: Dict to fill with ``event.pk -> {endpoint.pk: outcome}``,
+            where outcome is the ``deliver_to_endpoint()`` result dict.
+        max_in_flight: Maximum concurrent requests across all endpoints.
+        max_per_endpoint: Maximum concurrent requests to one endpoint.
+        timeout: httpx timeout for each request.
+        transport: Optional httpx async transport (for tests).
+
+    Returns:
+        The ``results`` dict.
+    """
+    in_flight = asyncio.Semaphore(max_in_flight)
+    per_endpoint = defaultdict(lambda: asyncio.Semaphore(max_per_endpoint))
+
+    async def deliver(client, endpoint, event):
+        # Wait for the endpoint's slot first so a saturated endpoint does
+        # not hold global slots that other endpoints could use.
+        async with per_endpoint[endpoint.pk], in_flight:
+            outcome = await deliver_to_endpoint_async(client, endpoint, event)
+        results.setdefault(event.pk, {})[endpoint.pk] = outcome
+
+    limits = httpx.Limits(
+        max_connections=max_in_flight, max_keepalive_connections=max_in_flight
+    )
+    async with httpx.AsyncClient(
+        timeout=timeout, limits=limits, transport=transport
+    ) as client:
+        await asyncio.gather(
+            *(
+                deliver(client, endpoint, event)
+                for event, endpoints in deliveries
+                for endpoint in endpoints
+            )
         )
-        return {"ok": False, "status_code": None, "error": error}
+    return results
@@ -0,0 +1,13 @@
+"""Signal handlers for the common app."""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+
+@receiver(post_save, sender="common.WebhookEndpoint")
+@receiver(post_delete, sender="common.WebhookEndpoint")
+def on_webhook_endpoint_change(sender, instance, **kwargs):
+    """Invalidate every process's cached subscription index."""
+    from common.services.subscriptions import bump_subscription_version
+
+    bump_subscription_version()
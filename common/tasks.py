@@ -16,16 +16,21 @@ logger = logging.getLogger(__name__)
 def deliver_outbox_events_task(self):
     """Deliver pending outbox events.
 
-    Processes at most DELIVERY_BATCH_SIZE (100) pending events per run.
-    Called on-demand via transaction.on_commit() and periodically via
-    celery-beat as a safety net.
+    Processes at most DELIVERY_BATCH_SIZE (20) pending events per run.
+    Called on-demand via transaction.on_commit() (coalesced per
+    transaction and debounced per process) and periodically via
+    celery-beat as a safety net. A full batch means more events may be
+    due, so the task re-enqueues itself to drain bursts without waiting
+    for the sweep.
 
     Returns:
         dict: {"processed": int, "remaining": int}
     """
-    from common.services.outbox import process_pending_events
+    from common.services.outbox import DELIVERY_BATCH_SIZE, process_pending_events
 
     result = process_pending_events()
+    if result["processed"] >= DELIVERY_BATCH_SIZE and not self.request.is_eager:
+        deliver_outbox_events_task.delay()
     if result["processed"] > 0:
         logger.info(
             "Processed %d outbox events: %d delivered, %d failed, %d remaining.",
@@ -43,20 +48,28 @@ def deliver_outbox_events_task(self):
     max_retries=2,
     default_retry_delay=60,
 )
-def cleanup_delivered_outbox_events_task(self):
+def cleanup_delivered_outbox_events_task(self, cursor=None):
     """Delete terminal outbox events older than OUTBOX_RETENTION_HOURS.
 
-    Processes at most CLEANUP_BATCH_SIZE (1000) events per run.
+    Sweeps in CLEANUP_BATCH_SIZE (1000) chunks until the backlog is
+    drained or SWEEP_TIME_BUDGET_SECONDS is spent, then re-enqueues
+    itself from the last event pk (``continue_sweep()``).
+
+    Args:
+        cursor: Resume after this event pk (set by the re-enqueue).
 
     Returns:
-        dict: {"deleted": int, "remaining": int}
+        dict: {"deleted": int, "remaining": int, "rows_per_sec": float,
+        "done": bool, "cursor": str|None}
     """
     from django.conf import settings
 
     from common.services.outbox import cleanup_delivered_events
+    from common.services.sweep import continue_sweep
 
     retention_hours = getattr(settings, "OUTBOX_RETENTION_HOURS", 168)
-    result = cleanup_delivered_events(retention_hours=retention_hours)
+    result = cleanup_delivered_events(retention_hours=retention_hours, cursor=cursor)
+    continue_sweep(self, result)
     if result["deleted"] > 0:
         logger.info(
             "Cleaned up %d terminal outbox events, %d remaining.",
@@ -1,9 +1,13 @@
 """Tests for common app admin actions."""
 
+from unittest.mock import patch
+
 import pytest
+from django.contrib import admin
 from django.utils import timezone
 
-from common.models import OutboxEvent
+from common.admin import OutboxEventAdmin
+from common.models import OutboxEvent, WebhookDelivery
 
 
 @pytest.mark.django_db
@@ -36,3 +40,33 @@ class TestRetryFailedEventsAction:
         assert event.attempts == 0
         assert event.error_message == ""
         assert event.next_attempt_at is not None
+
+    def test_retry_resets_failed_deliveries(
+        self, make_outbox_event, make_webhook_endpoint, rf
+    ):
+        """The action also re-queues the event's failed endpoint deliveries."""
+        event = make_outbox_event(status=OutboxEvent.Status.FAILED, attempts=5)
+        failed = WebhookDelivery.objects.create(
+            event=event,
+            endpoint=make_webhook_endpoint(),
+            status=WebhookDelivery.Status.FAILED,
+            attempts=5,
+        )
+        delivered = WebhookDelivery.objects.create(
+            event=event,
+            endpoint=make_webhook_endpoint(url="https://ok.test/"),
+            status=WebhookDelivery.Status.DELIVERED,
+            attempts=1,
+        )
+        model_admin = OutboxEventAdmin(OutboxEvent, admin.site)
+
+        with patch.object(model_admin, "message_user"):
+            model_admin.retry_failed_events(
+                rf.post("/"), OutboxEvent.objects.filter(pk=event.pk)
+            )
+
+        failed.refresh_from_db()
+        delivered.refresh_from_db()
+        assert failed.status == WebhookDelivery.Status.PENDING
+        assert failed.attempts == 0
+        assert delivered.status == WebhookDelivery.Status.DELIVERED
@@ -0,0 +1,82 @@
+"""Unit tests for backlog statistics."""
+
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from common.models import OutboxEvent
+from common.services import backlog
+from common.services.backlog import (
+    backlog_stats,
+    count_backlog,
+    estimate_backlog,
+    pending_outbox_backlog,
+)
+
+
+@pytest.mark.django_db
+class TestCountBacklog:
+    """Tests for count_backlog() and backlog_stats()."""
+
+    def test_exact_below_limit(self, make_outbox_event):
+        for i in range(3):
+            make_outbox_event(aggregate_id=str(i))
+
+        assert count_backlog(OutboxEvent.objects.all(), limit=5) == 3
+
+    def test_bounded_at_limit_without_planner(self, make_outbox_event):
+        for i in range(5):
+            make_outbox_event(aggregate_id=str(i))
+
+        # SQLite has no planner estimate: the bound is reported
+        assert count_backlog(OutboxEvent.objects.all(), limit=2) == 2
+        assert count_backlog(OutboxEvent.objects.all(), exact=True, limit=2) == 5
+
+    def test_estimate_falls_back_to_bounded_count(self, make_outbox_event):
+        for i in range(3):
+            make_outbox_event(aggregate_id=str(i))
+
+        assert estimate_backlog(OutboxEvent.objects.all()) == 3
+
+    def test_pending_estimate_skips_count(
+        self, make_outbox_event, monkeypatch, django_assert_num_queries
+    ):
+        make_outbox_event()
+        monkeypatch.setattr(backlog, "_planner_estimate", lambda queryset: 42)
+
+        with django_assert_num_queries(0):
+            assert pending_outbox_backlog(estimate=True) == 42
+        assert pending_outbox_backlog() == 1
+        assert pending_outbox_backlog(exact=True, estimate=True) == 1
+
+    @pytest.mark.skipif(
+        connection.vendor != "postgresql", reason="Planner estimates need PostgreSQL"
+    )
+    def test_estimate_uses_planner_on_postgresql(self, make_outbox_event):
+        make_outbox_event()
+
+        assert isinstance(estimate_backlog(OutboxEvent.objects.all()), int)
+
+    def test_backlog_stats(self, make_outbox_event):
+        make_outbox_event(aggregate_id="1")
+        make_outbox_event(aggregate_id="2", status=OutboxEvent.Status.FAILED)
+
+        assert backlog_stats() == {
+            "outbox_pending": 1,
+            "outbox_failed": 1,
+            "deliveries_pending": 0,
+            "exact": False,
+        }
+
+    def test_command_reports_json(self, make_outbox_event):
+        make_outbox_event()
+        out = StringIO()
+
+        call_command("backlog_stats", "--exact", "--json", stdout=out)
+
+        result = json.loads(out.getvalue())
+        assert result["outbox_pending"] == 1
+        assert result["exact"] is True
@@ -0,0 +1,177 @@
+"""Unit tests for the push-driven outbox dispatcher."""
+
+import time
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.utils import timezone
+
+from common.models import OutboxEvent
+from common.services.dispatcher import (
+    PollingListener,
+    PostgresListener,
+    drain,
+    make_listener,
+    next_due_time,
+    parse_notify_payload,
+    run_dispatcher,
+)
+
+
+class FakeListener:
+    """Hands out scripted notification batches, then stops the loop."""
+
+    vendor = "fake"
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.timeouts = []
+        self.closed = False
+
+    def wait(self, timeout):
+        self.timeouts.append(timeout)
+        return self.batches.pop(0) if self.batches else []
+
+    def close(self):
+        self.closed = True
+
+
+class TestHelpers:
+    """Tests for payload parsing and listener selection."""
+
+    def test_parse_notify_payload(self):
+        assert parse_notify_payload("1700000000.25") == 1700000000.25
+        assert abs(parse_notify_payload("") - time.time()) < 1
+
+    def test_sqlite_falls_back_to_polling(self):
+        assert isinstance(make_listener(0.5), PollingListener)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestRunDispatcher:
+    """Tests for run_dispatcher() and its helpers."""
+
+    def test_next_due_time_respects_leases(self, make_outbox_event):
+        assert next_due_time() is None
+        event = make_outbox_event()
+        lease_end = timezone.now() + timedelta(minutes=5)
+        OutboxEvent.objects.filter(pk=event.pk).update(
+            claimed_by="other", lease_expires_at=lease_end
+        )
+        assert next_due_time() == pytest.approx(lease_end.timestamp())
+
+    def test_next_due_time_skips_leased_events(self, make_outbox_event):
+        now = timezone.now()
+        leased = make_outbox_event(aggregate_id="1")
+        OutboxEvent.objects.filter(pk=leased.pk).update(
+            claimed_by="other", lease_expires_at=now + timedelta(minutes=5)
+        )
+        later = now + timedelta(minutes=1)
+        make_outbox_event(aggregate_id="2", next_attempt_at=later)
+
+        assert next_due_time() == pytest.approx(later.timestamp())
+
+        make_outbox_event(aggregate_id="3", next_attempt_at=now)
+        assert next_due_time() == pytest.approx(now.timestamp())
+
+    def test_drain_loops_until_short_batch(self, make_outbox_event):
+        for i in range(5):
+            make_outbox_event(aggregate_id=str(i))
+
+        result = drain(batch_size=2)
+
+        assert result["batches"] == 3
+        assert result["delivered"] == 5
+        assert result["remaining"] == 0
+
+    def test_delivers_due_event_at_startup(self, make_outbox_event):
+        event = make_outbox_event()
+        drains = []
+        listener = FakeListener([])
+
+        run_dispatcher(
+            listener=listener,
+            should_stop=lambda: bool(drains),
+            on_drain=drains.append,
+        )
+
+        assert drains[0]["delivered"] == 1
+        assert listener.closed
+        event.refresh_from_db()
+        assert event.status == OutboxEvent.Status.DELIVERED
+
+    def test_notification_wakes_dispatcher(self, make_outbox_event):
+        drains = []
+        # The first wait "receives" a notification for an event that is
+        # already due; it is created just before that notification.
+        listener = FakeListener([])
+
+        def wait(timeout):
+            listener.timeouts.append(timeout)
+            if len(listener.timeouts) == 1:
+                make_outbox_event()
+                return [time.time()]
+            return []
+
+        listener.wait = wait
+
+        run_dispatcher(
+            listener=listener,
+            should_stop=lambda: bool(drains) or len(listener.timeouts) > 5,
+            on_drain=drains.append,
+        )
+
+        assert len(listener.timeouts) == 1
+        assert drains[0]["delivered"] == 1
+
+    def test_sleeps_until_future_due_time(self, make_outbox_event):
+        make_outbox_event(next_attempt_at=timezone.now() + timedelta(seconds=0.3))
+        drains = []
+
+        started = time.monotonic()
+        run_dispatcher(
+            listener=FakeListener([]),
+            should_stop=lambda: bool(drains) or time.monotonic() - started > 5,
+            on_drain=drains.append,
+        )
+
+        assert drains[0]["delivered"] == 1
+        assert time.monotonic() - started >= 0.25
+
+
+@pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="LISTEN/NOTIFY needs PostgreSQL"
+)
+@pytest.mark.django_db(transaction=True)
+class TestNotifyTriggers:
+    """The outbox NOTIFY triggers only fire when an event's due time changes."""
+
+    def _notified(self, listener):
+        return listener.wait(0.2)
+
+    def test_insert_and_retry_notify_but_lease_claim_does_not(self, make_outbox_event):
+        listener = PostgresListener()
+        try:
+            event = make_outbox_event()
+            assert self._notified(listener)
+
+            # A dispatcher's lease claim leaves the due time unchanged
+            OutboxEvent.objects.filter(pk=event.pk).update(
+                claimed_by="w", lease_expires_at=timezone.now()
+            )
+            assert not self._notified(listener)
+
+            # A retry moves next_attempt_at and releases the lease
+            retry_at = timezone.now() + timedelta(minutes=1)
+            OutboxEvent.objects.filter(pk=event.pk).update(
+                claimed_by="", lease_expires_at=None, next_attempt_at=retry_at
+            )
+            assert self._notified(listener) == [pytest.approx(retry_at.timestamp())]
+
+            OutboxEvent.objects.filter(pk=event.pk).update(
+                status=OutboxEvent.Status.DELIVERED
+            )
+            assert not self._notified(listener)
+        finally:
+            listener.close()
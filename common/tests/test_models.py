@@ -1,4 +1,4 @@
-"""Unit tests for OutboxEvent and WebhookEndpoint models."""
+"""Unit tests for OutboxEvent, WebhookEndpoint and WebhookDelivery models."""
 
 import uuid
 from datetime import datetime
@@ -7,7 +7,7 @@ from decimal import Decimal
 import pytest
 from django.db import IntegrityError
 
-from common.models import OutboxEvent, WebhookEndpoint
+from common.models import OutboxEvent, WebhookDelivery, WebhookEndpoint
 
 
 @pytest.mark.django_db
@@ -162,3 +162,25 @@ class TestWebhookEndpoint:
         )
         assert endpoint.created_at is not None
         assert endpoint.updated_at is not None
+
+    def test_accepts(self):
+        endpoint = WebhookEndpoint(url="https://example.com/hook", secret="s")
+        assert endpoint.accepts("file.stored") is True
+        endpoint.event_types = ["file.expiring"]
+        assert endpoint.accepts("file.stored") is False
+        assert endpoint.accepts("file.expiring") is True
+
+
+@pytest.mark.django_db
+class TestWebhookDelivery:
+    """Tests for WebhookDelivery model."""
+
+    def test_defaults_and_unique_per_endpoint(self, make_outbox_event):
+        event = make_outbox_event()
+        endpoint = WebhookEndpoint.objects.create(url="https://a.test/", secret="s")
+        delivery = WebhookDelivery.objects.create(event=event, endpoint=endpoint)
+
+        assert delivery.status == WebhookDelivery.Status.PENDING
+        assert delivery.attempts == 0
+        with pytest.raises(IntegrityError):
+            WebhookDelivery.objects.create(event=event, endpoint=endpoint)
@@ -0,0 +1,199 @@
+"""Unit tests for outbox table partition management."""
+
+from datetime import UTC, date, datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.db import (
+    IntegrityError,
+    NotSupportedError,
+    OperationalError,
+    connection,
+    transaction,
+)
+from django.db.migrations.executor import MigrationExecutor
+
+from common.models import OutboxEvent
+from common.services import partitions
+from common.services.outbox import cleanup_delivered_events
+from common.services.partitions import (
+    create_partition,
+    drop_expired_partitions,
+    is_partitioned,
+    list_partitions,
+    maintain_partitions,
+    partition_name,
+)
+
+postgresql_only = pytest.mark.skipif(
+    connection.vendor != "postgresql", reason="Partitioning needs PostgreSQL"
+)
+
+
+class TestHelpers:
+    """Tests for partition naming and DDL."""
+
+    def test_partition_name(self):
+        assert partition_name("outbox_event", date(2026, 1, 5)) == (
+            "outbox_event_p20260105"
+        )
+
+    def test_partition_bounds_are_utc_days(self):
+        sql = partitions._partition_of_sql("outbox_event", date(2026, 1, 5))
+        assert 'PARTITION OF "outbox_event"' in sql
+        assert (
+            "FROM ('2026-01-05T00:00:00+00:00') TO ('2026-01-06T00:00:00+00:00')"
+        ) in sql
+
+    def test_conversion_refuses_postgresql_before_13(self):
+        schema_editor = MagicMock()
+        schema_editor.connection.pg_version = 120011
+
+        with pytest.raises(NotSupportedError, match="PostgreSQL 13"):
+            partitions.partition_table(
+                schema_editor, "outbox_event", unique_name="u", pending_index="i"
+            )
+        schema_editor.execute.assert_not_called()
+
+
+@pytest.mark.django_db
+class TestMaintainPartitions:
+    """Tests for partition retention."""
+
+    def test_noop_on_plain_table(self):
+        cutoff = datetime(2026, 1, 1, tzinfo=UTC)
+        assert maintain_partitions("outbox_event", cutoff) == {
+            "created": 0,
+            "dropped": 0,
+            "rows": 0,
+            "held": 0,
+        }
+
+    def test_drops_expired_partitions_without_pending_rows(self):
+        days = {
+            date(2026, 1, 1): "t_p20260101",  # pending rows: kept
+            date(2026, 1, 2): "t_p20260102",  # dropped
+            date(2026, 1, 3): "t_p20260103",  # ends after the cutoff
+        }
+        cursor = MagicMock()
+        # Pending check (day 1); pending check, re-check under lock, estimate
+        cursor.fetchone.side_effect = [(1,), None, None, (40,)]
+        connection = MagicMock()
+        connection.cursor.return_value.__enter__.return_value = cursor
+        before_drop = MagicMock()
+
+        with (
+            patch.object(partitions, "list_partitions", return_value=days),
+            patch.object(partitions, "connection", connection),
+        ):
+            result = drop_expired_partitions(
+                "t",
+                datetime(2026, 1, 3, 12, tzinfo=UTC),
+                before_drop=before_drop,
+            )
+
+        assert result == {"dropped": 1, "rows": 40, "held": 1}
+        before_drop.assert_called_once_with(cursor, "t_p20260102")
+        statements = [call.args[0] for call in cursor.execute.call_args_list]
+        assert 'DROP TABLE "t_p20260102"' in statements
+        assert not any("t_p20260103" in sql for sql in statements)
+        # The parent is locked (first) before the partition is dropped
+        locks = [sql for sql in statements if sql.startswith("LOCK TABLE")]
+        assert locks == ['LOCK TABLE "t" IN ACCESS EXCLUSIVE MODE']
+        assert statements.index(locks[0]) < statements.index('DROP TABLE "t_p20260102"')
+
+    def test_busy_parent_keeps_partition(self):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = None
+
+        def execute(sql, params=None):
+            if sql.startswith("LOCK TABLE"):
+                raise OperationalError("canceling statement due to lock timeout")
+
+        cursor.execute.side_effect = execute
+        connection = MagicMock()
+        connection.cursor.return_value.__enter__.return_value = cursor
+
+        with (
+            patch.object(
+                partitions,
+                "list_partitions",
+                return_value={date(2026, 1, 1): "t_p20260101"},
+            ),
+            patch.object(partitions, "connection", connection),
+        ):
+            result = drop_expired_partitions("t", datetime(2026, 1, 3, tzinfo=UTC))
+
+        assert result == {"dropped": 0, "rows": 0, "held": 1}
+
+    def test_cleanup_counts_dropped_partition_rows(self):
+        dropped = {"created": 0, "dropped": 2, "rows": 500, "held": 0}
+        with patch(
+            "common.services.outbox.maintain_partitions", return_value=dropped
+        ) as mock_maintain:
+            result = cleanup_delivered_events(retention_hours=1)
+
+        assert result["deleted"] == 500
+        assert result["remaining"] == 0
+        assert result["done"] is True
+        assert mock_maintain.call_args.args[0] == "outbox_event"
+
+
+@postgresql_only
+@pytest.mark.django_db(transaction=True)
+class TestPostgresPartitioning:
+    """End-to-end checks against a real partitioned PostgreSQL table."""
+
+    def _event_on(self, make_outbox_event, day, status, key):
+        event = make_outbox_event(aggregate_id=key, status=status)
+        created_at = datetime(day.year, day.month, day.day, 12, tzinfo=UTC)
+        # Updating the partition key moves the row into that day's partition
+        OutboxEvent.objects.filter(pk=event.pk).update(created_at=created_at)
+        return event
+
+    def test_outbox_tables_are_partitioned(self):
+        assert is_partitioned("outbox_event")
+        assert is_partitioned("portal_event_outbox")
+
+    def test_idempotency_trigger_rejects_duplicates(self, make_outbox_event):
+        make_outbox_event(idempotency_key="same")
+
+        with pytest.raises(IntegrityError), transaction.atomic():
+            make_outbox_event(aggregate_id="2", idempotency_key="same")
+
+    def test_drop_expired_partitions(self, make_outbox_event):
+        old = date.today() - timedelta(days=30)
+        pending_day = old + timedelta(days=1)
+        for day in (old, pending_day):
+            create_partition("outbox_event", day)
+        self._event_on(make_outbox_event, old, OutboxEvent.Status.DELIVERED, "1")
+        self._event_on(make_outbox_event, pending_day, OutboxEvent.Status.PENDING, "2")
+
+        result = drop_expired_partitions(
+            "outbox_event", datetime.now(UTC) - timedelta(days=7)
+        )
+
+        assert result["dropped"] == 1
+        assert result["held"] == 1
+        remaining = list_partitions("outbox_event")
+        assert old not in remaining
+        assert pending_day in remaining
+        assert OutboxEvent.objects.filter(aggregate_id="2").exists()
+
+    def test_reverse_migration_restores_plain_tables(self):
+        executor = MigrationExecutor(connection)
+        leaves = executor.loader.graph.leaf_nodes()
+        try:
+            executor.migrate([("common", "0007_outboxevent_rendered_payload")])
+            assert not is_partitioned("outbox_event")
+            assert not is_partitioned("portal_event_outbox")
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM pg_constraint WHERE conname = %s",
+                    ["unique_event_type_idempotency_key"],
+                )
+                assert cursor.fetchone()
+        finally:
+            executor = MigrationExecutor(connection)
+            executor.migrate(leaves)
+        assert is_partitioned("outbox_event")
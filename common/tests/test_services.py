@@ -1,16 +1,17 @@
 """Unit tests for outbox services."""
 
 from datetime import timedelta
-from unittest.mock import patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 
-from common.models import OutboxEvent
+from common.models import OutboxEvent, WebhookDelivery
 from common.services.outbox import (
     cleanup_delivered_events,
     emit_event,
+    emit_events,
     process_pending_events,
 )
 
@@ -61,6 +62,47 @@ class TestEmitEvent:
         event = emit_event("User", "1", "user.status", {})
         assert event.status == OutboxEvent.Status.PENDING
 
+    def test_payload_rendered_once_at_emit(self):
+        event = emit_event("User", "1", "user.created", {"email": "a@b.com"})
+        event.refresh_from_db()
+        assert bytes(event.rendered_payload) == b'{"email":"a@b.com"}'
+
+
+@pytest.mark.django_db
+class TestEmitEvents:
+    """Tests for emit_events() bulk service function."""
+
+    def test_creates_all_events_with_default_keys(self):
+        events = emit_events(
+            {
+                "aggregate_type": "User",
+                "aggregate_id": str(i),
+                "event_type": "user.created",
+                "payload": None,
+            }
+            for i in range(3)
+        )
+        assert [e.idempotency_key for e in events] == ["User:0", "User:1", "User:2"]
+        assert OutboxEvent.objects.count() == 3
+        assert all(e.payload == {} for e in OutboxEvent.objects.all())
+
+    def test_empty_input_is_noop(self):
+        assert emit_events([]) == []
+        assert not OutboxEvent.objects.exists()
+
+    def test_dispatches_single_delivery_task(self, django_capture_on_commit_callbacks):
+        with django_capture_on_commit_callbacks() as callbacks:
+            emit_events(
+                {
+                    "aggregate_type": "User",
+                    "aggregate_id": str(i),
+                    "event_type": "user.created",
+                    "payload": {},
+                }
+                for i in range(5)
+            )
+        assert len(callbacks) == 1
+
 
 @pytest.mark.django_db
 class TestProcessPendingEvents:
@@ -125,7 +167,7 @@ class TestProcessPendingEvents:
         result = process_pending_events()
         assert result["processed"] == 0
 
-    @patch("common.services.webhook.deliver_to_endpoint")
+    @patch("common.services.webhook.deliver_to_endpoint_async", new_callable=AsyncMock)
     def test_delivers_to_matching_endpoints(
         self, mock_deliver, make_outbox_event, make_webhook_endpoint
     ):
@@ -141,7 +183,25 @@ class TestProcessPendingEvents:
         assert event.status == OutboxEvent.Status.DELIVERED
         assert result["delivered"] == 1
 
-    @patch("common.services.webhook.deliver_to_endpoint")
+    @patch("common.services.webhook.deliver_to_endpoint_async", new_callable=AsyncMock)
+    def test_sends_rendered_bodies(
+        self, mock_deliver, make_outbox_event, make_webhook_endpoint
+    ):
+        """Emitted events reuse their bytes; other rows are rendered on claim."""
+        make_webhook_endpoint()
+        legacy = make_outbox_event(aggregate_id="legacy")
+        emitted = emit_event("TestModel", "emitted", "test.created", {"n": 1})
+        mock_deliver.return_value = {"ok": True, "status_code": 200, "error": ""}
+
+        process_pending_events()
+
+        bodies = {
+            call.args[2].pk: call.args[2].rendered_payload
+            for call in mock_deliver.call_args_list
+        }
+        assert bodies == {legacy.pk: b'{"key":"value"}', emitted.pk: b'{"n":1}'}
+
+    @patch("common.services.webhook.deliver_to_endpoint_async", new_callable=AsyncMock)
     def test_no_matching_endpoints_marks_delivered(
         self, mock_deliver, make_outbox_event, make_webhook_endpoint
     ):
@@ -156,7 +216,7 @@ class TestProcessPendingEvents:
         assert event.status == OutboxEvent.Status.DELIVERED
         assert result["delivered"] == 1
 
-    @patch("common.services.webhook.deliver_to_endpoint")
+    @patch("common.services.webhook.deliver_to_endpoint_async", new_callable=AsyncMock)
     def test_failed_delivery_increments_attempts_and_sets_backoff(
         self, mock_deliver, make_outbox_event, make_webhook_endpoint
     ):
@@ -180,7 +240,7 @@ class TestProcessPendingEvents:
         assert result["delivered"] == 0
         assert result["failed"] == 0  # Not failed yet, just retrying
 
-    @patch("common.services.webhook.deliver_to_endpoint")
+    @patch("common.services.webhook.deliver_to_endpoint_async", new_callable=AsyncMock)
     def test_exceeds_max_attempts_transitions_to_failed(
         self, mock_deliver, make_outbox_event, make_webhook_endpoint
     ):
@@ -201,7 +261,7 @@ class TestProcessPendingEvents:
         assert event.next_attempt_at is None
         assert result["failed"] == 1
 
-    @patch("common.services.webhook.deliver_to_endpoint")
+    @patch("common.services.webhook.deliver_to_endpoint_async", new_callable=AsyncMock)
     def test_error_message_populated_on_failure(
         self, mock_deliver, make_outbox_event, make_webhook_endpoint
     ):
@@ -219,7 +279,7 @@ class TestProcessPendingEvents:
         event.refresh_from_db()
         assert "HTTP 503" in event.error_message
 
-    @patch("common.services.webhook.deliver_to_endpoint")
+    @patch("common.services.webhook.deliver_to_endpoint_async", new_callable=AsyncMock)
     def test_inactive_endpoints_excluded(
         self, mock_deliver, make_outbox_event, make_webhook_endpoint
     ):
@@ -234,7 +294,7 @@ class TestProcessPendingEvents:
         assert event.status == OutboxEvent.Status.DELIVERED
         assert result["delivered"] == 1
 
-    @patch("common.services.webhook.deliver_to_endpoint")
+    @patch("common.services.webhook.deliver_to_endpoint_async", new_callable=AsyncMock)
     def test_event_type_exact_match(
         self, mock_deliver, make_outbox_event, make_webhook_endpoint
     ):
@@ -249,7 +309,7 @@ class TestProcessPendingEvents:
         event.refresh_from_db()
         assert event.status == OutboxEvent.Status.DELIVERED
 
-    @patch("common.services.webhook.deliver_to_endpoint")
+    @patch("common.services.webhook.deliver_to_endpoint_async", new_callable=AsyncMock)
     def test_empty_event_types_matches_all(
         self, mock_deliver, make_outbox_event, make_webhook_endpoint
     ):
@@ -265,6 +325,183 @@ class TestProcessPendingEvents:
         assert event.status == OutboxEvent.Status.DELIVERED
 
 
+@pytest.mark.django_db
+class TestOutboxLeases:
+    """Tests for lease-based claiming in process_pending_events()."""
+
+    def test_live_lease_is_skipped(self, make_outbox_event):
+        event = make_outbox_event()
+        OutboxEvent.objects.filter(pk=event.pk).update(
+            claimed_by="other-worker",
+            lease_expires_at=timezone.now() + timedelta(minutes=5),
+        )
+
+        result = process_pending_events()
+
+        assert result["processed"] == 0
+        event.refresh_from_db()
+        assert event.status == OutboxEvent.Status.PENDING
+        assert event.claimed_by == "other-worker"
+
+    def test_expired_lease_is_reclaimed(self, make_outbox_event):
+        event = make_outbox_event()
+        OutboxEvent.objects.filter(pk=event.pk).update(
+            claimed_by="crashed-worker",
+            lease_expires_at=timezone.now() - timedelta(seconds=1),
+        )
+
+        result = process_pending_events(worker_id="w1")
+
+        assert result["delivered"] == 1
+        event.refresh_from_db()
+        assert event.status == OutboxEvent.Status.DELIVERED
+        assert event.claimed_by == ""
+        assert event.lease_expires_at is None
+
+    @patch("common.services.webhook.deliver_to_endpoint_async", new_callable=AsyncMock)
+    def test_retry_releases_lease(
+        self, mock_deliver, make_outbox_event, make_webhook_endpoint
+    ):
+        make_webhook_endpoint()
+        event = make_outbox_event()
+        mock_deliver.return_value = {"ok": False, "status_code": 500, "error": "x"}
+
+        process_pending_events(worker_id="w1")
+
+        event.refresh_from_db()
+        assert event.status == OutboxEvent.Status.PENDING
+        assert event.attempts == 1
+        assert event.claimed_by == ""
+        assert event.lease_expires_at is None
+
+    @patch("common.services.outbox.asyncio.run", side_effect=lambda result: result)
+    @patch("common.services.outbox.fan_out", new_callable=MagicMock)
+    def test_update_skipped_when_lease_lost(
+        self, mock_fan_out, _mock_run, make_outbox_event, make_webhook_endpoint
+    ):
+        """A worker whose lease was taken over does not write results."""
+        make_webhook_endpoint()
+        event = make_outbox_event()
+
+        def deliver_while_lease_taken(deliveries, results, **kwargs):
+            OutboxEvent.objects.filter(pk=event.pk).update(claimed_by="w2")
+            results[event.pk] = {"all_ok": True, "error": ""}
+
+        mock_fan_out.side_effect = deliver_while_lease_taken
+
+        result = process_pending_events(worker_id="w1")
+
+        assert result["delivered"] == 0
+        event.refresh_from_db()
+        assert event.status == OutboxEvent.Status.PENDING
+        assert event.attempts == 0
+        assert event.claimed_by == "w2"
+
+
+@pytest.mark.django_db
+class TestWebhookDeliveries:
+    """Tests for per-endpoint WebhookDelivery records."""
+
+    def _outcomes(self, failing):
+        def deliver(client, endpoint, event):
+            if endpoint.url in failing:
+                return {"ok": False, "status_code": 503, "error": "HTTP 503"}
+            return {"ok": True, "status_code": 200, "error": ""}
+
+        return deliver
+
+    def _make_due(self, event):
+        now = timezone.now()
+        OutboxEvent.objects.filter(pk=event.pk).update(next_attempt_at=now)
+        event.deliveries.filter(status=WebhookDelivery.Status.PENDING).update(
+            next_attempt_at=now
+        )
+
+    def test_emit_materializes_matching_active_endpoints(self, make_webhook_endpoint):
+        match = make_webhook_endpoint(event_types=["file.stored"])
+        make_webhook_endpoint(url="https://other.test/", event_types=["other"])
+        make_webhook_endpoint(url="https://off.test/", is_active=False)
+
+        event = emit_event("UploadFile", "1", "file.stored", {})
+        (created,) = emit_events(
+            [
+                {
+                    "aggregate_type": "UploadFile",
+                    "aggregate_id": "2",
+                    "event_type": "file.stored",
+                    "payload": {},
+                }
+            ]
+        )
+
+        for e in (event, created):
+            assert list(e.deliveries.values_list("endpoint_id", flat=True)) == [
+                match.pk
+            ]
+
+    @patch("common.services.webhook.deliver_to_endpoint_async", new_callable=AsyncMock)
+    def test_retry_targets_only_failed_endpoint(
+        self, mock_deliver, make_webhook_endpoint
+    ):
+        good = make_webhook_endpoint(url="https://good.test/")
+        bad = make_webhook_endpoint(url="https://bad.test/")
+        event = emit_event("UploadFile", "1", "file.stored", {})
+        mock_deliver.side_effect = self._outcomes({"https://bad.test/"})
+
+        result = process_pending_events()
+
+        assert result["delivered"] == 0
+        event.refresh_from_db()
+        assert event.status == OutboxEvent.Status.PENDING
+        assert event.error_message == "https://bad.test/: HTTP 503"
+        assert event.deliveries.get(endpoint=good).status == (
+            WebhookDelivery.Status.DELIVERED
+        )
+        failed = event.deliveries.get(endpoint=bad)
+        assert failed.attempts == 1
+        assert failed.status_code == 503
+        assert event.next_attempt_at == failed.next_attempt_at
+
+        self._make_due(event)
+        mock_deliver.reset_mock()
+        mock_deliver.side_effect = self._outcomes(set())
+
+        result = process_pending_events()
+
+        assert [c.args[1].url for c in mock_deliver.call_args_list] == [bad.url]
+        assert result["delivered"] == 1
+        event.refresh_from_db()
+        assert event.status == OutboxEvent.Status.DELIVERED
+
+    @patch("common.services.webhook.deliver_to_endpoint_async", new_callable=AsyncMock)
+    def test_event_fails_when_one_endpoint_exhausts_retries(
+        self, mock_deliver, make_webhook_endpoint
+    ):
+        make_webhook_endpoint(url="https://good.test/")
+        bad = make_webhook_endpoint(url="https://bad.test/")
+        event = emit_event("UploadFile", "1", "file.stored", {})
+        event.deliveries.filter(endpoint=bad).update(attempts=4)
+        mock_deliver.side_effect = self._outcomes({"https://bad.test/"})
+
+        result = process_pending_events()
+
+        assert result["failed"] == 1
+        event.refresh_from_db()
+        assert event.status == OutboxEvent.Status.FAILED
+        assert event.error_message == "https://bad.test/: HTTP 503"
+
+    def test_deactivated_endpoint_is_skipped(self, make_webhook_endpoint):
+        endpoint = make_webhook_endpoint()
+        event = emit_event("UploadFile", "1", "file.stored", {})
+        endpoint.is_active = False
+        endpoint.save()
+
+        result = process_pending_events()
+
+        assert result["delivered"] == 1
+        assert event.deliveries.get().status == WebhookDelivery.Status.SKIPPED
+
+
 @pytest.mark.django_db
 class TestCleanupDeliveredEvents:
     """Tests for cleanup_delivered_events() service function."""
@@ -320,12 +557,101 @@ class TestCleanupDeliveredEvents:
                 old_time = timezone.now() - timedelta(hours=200)
                 OutboxEvent.objects.filter(pk=event.pk).update(created_at=old_time)
 
-            result = cleanup_delivered_events(retention_hours=168)
+            result = cleanup_delivered_events(retention_hours=168, budget=0)
             assert result["deleted"] == 2
             assert result["remaining"] == 3
+            assert result["done"] is False
         finally:
             outbox.CLEANUP_BATCH_SIZE = original
 
     def test_returns_correct_counts(self, make_outbox_event):
         result = cleanup_delivered_events(retention_hours=168)
-        assert result == {"deleted": 0, "remaining": 0}
+        assert result == {
+            "deleted": 0,
+            "remaining": 0,
+            "rows_per_sec": 0.0,
+            "done": True,
+            "cursor": None,
+        }
+
+
+@pytest.mark.django_db
+class TestDispatchCoalescing:
+    """Tests for per-transaction and per-process delivery dispatch coalescing."""
+
+    def _emit(self, i):
+        return emit_event("User", str(i), "user.created", {})
+
+    def _lazy_dispatch(self, settings, monkeypatch, clock):
+        from common.services import outbox
+
+        settings.OUTBOX_DISPATCH_DEBOUNCE_SECONDS = 2.0
+        settings.CELERY_TASK_ALWAYS_EAGER = False
+        monkeypatch.setattr(outbox, "_debounce_until", 0.0)
+        monkeypatch.setattr(outbox, "_trailing_queued", False)
+        ticks = iter(clock)
+        monkeypatch.setattr(outbox.time, "monotonic", lambda: next(ticks))
+
+    def test_burst_in_one_transaction_enqueues_two_tasks(
+        self, settings, monkeypatch, django_capture_on_commit_callbacks
+    ):
+        from common.tasks import deliver_outbox_events_task
+
+        self._lazy_dispatch(settings, monkeypatch, [100.0] + [100.1] * 9)
+        with (
+            patch.object(deliver_outbox_events_task, "delay") as delay,
+            patch.object(deliver_outbox_events_task, "apply_async") as apply_async,
+            django_capture_on_commit_callbacks(execute=True),
+            transaction.atomic(),
+        ):
+            for i in range(10):
+                self._emit(i)
+
+        assert delay.call_count == 1
+        assert apply_async.call_count == 1
+
+    def test_rolled_back_savepoint_does_not_lose_dispatch(
+        self, django_capture_on_commit_callbacks
+    ):
+        with django_capture_on_commit_callbacks() as callbacks, transaction.atomic():
+            try:
+                with transaction.atomic():
+                    self._emit(1)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+            self._emit(2)
+        assert len(callbacks) == 1
+
+    def test_idle_dispatch_is_immediate(self, settings, monkeypatch):
+        from common.services import outbox
+        from common.tasks import deliver_outbox_events_task
+
+        self._lazy_dispatch(settings, monkeypatch, [100.0])
+
+        with (
+            patch.object(deliver_outbox_events_task, "delay") as delay,
+            patch.object(deliver_outbox_events_task, "apply_async") as apply_async,
+        ):
+            outbox._dispatch_delivery()
+
+        delay.assert_called_once_with()
+        apply_async.assert_not_called()
+
+    def test_debounces_within_window(self, settings, monkeypatch):
+        from common.services import outbox
+        from common.tasks import deliver_outbox_events_task
+
+        self._lazy_dispatch(settings, monkeypatch, [100.0, 101.5, 101.8, 103.0])
+
+        with (
+            patch.object(deliver_outbox_events_task, "delay") as delay,
+            patch.object(deliver_outbox_events_task, "apply_async") as apply_async,
+        ):
+            outbox._dispatch_delivery()  # idle: immediate
+            outbox._dispatch_delivery()  # within the window: end of window
+            outbox._dispatch_delivery()  # trailing task already queued: dropped
+            outbox._dispatch_delivery()  # window over: immediate again
+
+        assert delay.call_count == 2
+        apply_async.assert_called_once_with(countdown=0.5)
@@ -0,0 +1,101 @@
+"""Unit tests for the cached webhook subscription index."""
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from common.models import WebhookDelivery, WebhookEndpoint
+from common.services.outbox import emit_event
+from common.services.subscriptions import (
+    SubscriptionIndex,
+    bump_subscription_version,
+    clear_subscription_index,
+    current_subscription_version,
+    get_subscription_index,
+)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_index():
+    clear_subscription_index()
+    yield
+    clear_subscription_index()
+
+
+class TestSubscriptionIndex:
+    """Tests for SubscriptionIndex matching."""
+
+    def test_match_includes_catch_all_and_typed(self):
+        catch_all = WebhookEndpoint(url="https://all.test/", event_types=[])
+        typed = WebhookEndpoint(url="https://a.test/", event_types=["a", "b"])
+        other = WebhookEndpoint(url="https://c.test/", event_types=["c"])
+
+        index = SubscriptionIndex([catch_all, typed, other])
+
+        assert index.match("a") == (catch_all, typed)
+        assert index.match("c") == (catch_all, other)
+        assert index.match("z") == (catch_all,)
+        assert len(index) == 3
+
+    def test_duplicate_event_types_match_once(self):
+        endpoint = WebhookEndpoint(url="https://a.test/", event_types=["a", "b", "a"])
+
+        index = SubscriptionIndex([endpoint])
+
+        assert index.match("a") == (endpoint,)
+        assert index.match("b") == (endpoint,)
+
+    @pytest.mark.django_db
+    def test_duplicate_event_types_get_one_delivery(self, make_webhook_endpoint):
+        endpoint = make_webhook_endpoint(event_types=["file.stored", "file.stored"])
+
+        emit_event("UploadFile", "1", "file.stored", {})
+
+        assert WebhookDelivery.objects.filter(endpoint=endpoint).count() == 1
+
+
+@pytest.mark.django_db
+class TestGetSubscriptionIndex:
+    """Tests for get_subscription_index() caching and invalidation."""
+
+    def test_reused_while_version_unchanged(self, make_webhook_endpoint):
+        make_webhook_endpoint()
+        index = get_subscription_index()
+
+        with CaptureQueriesContext(connection) as ctx:
+            assert get_subscription_index() is index
+
+        assert len(ctx.captured_queries) == 1
+
+    def test_inactive_endpoints_excluded(self, make_webhook_endpoint):
+        make_webhook_endpoint(url="https://on.test/")
+        make_webhook_endpoint(url="https://off.test/", is_active=False)
+
+        assert [e.url for e in get_subscription_index().endpoints] == [
+            "https://on.test/"
+        ]
+
+    def test_rebuilt_after_endpoint_save(self, make_webhook_endpoint):
+        endpoint = make_webhook_endpoint(event_types=["a"])
+        assert get_subscription_index().match("b") == ()
+
+        endpoint.event_types = ["b"]
+        endpoint.save()
+
+        assert get_subscription_index().match("b") == (endpoint,)
+
+    def test_rebuilt_after_endpoint_delete(self, make_webhook_endpoint):
+        endpoint = make_webhook_endpoint()
+        assert len(get_subscription_index()) == 1
+
+        endpoint.delete()
+
+        assert len(get_subscription_index()) == 0
+
+    def test_bump_changes_version(self):
+        before = current_subscription_version()
+
+        after = bump_subscription_version()
+
+        assert after != before
+        assert current_subscription_version() == after
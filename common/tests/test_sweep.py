@@ -0,0 +1,96 @@
+"""Tests for the resumable sweep helpers."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from common.models import OutboxEvent
+from common.services.sweep import continue_sweep, run_sweep
+
+
+@pytest.fixture
+def events(make_outbox_event):
+    return [
+        make_outbox_event(aggregate_id=str(i), idempotency_key=f"sweep:{i}")
+        for i in range(5)
+    ]
+
+
+@pytest.mark.django_db
+class TestRunSweep:
+    """Tests for run_sweep()."""
+
+    def test_drains_queryset_in_chunks(self, events):
+        seen = []
+
+        def handle(pks):
+            seen.append(pks)
+            return len(pks)
+
+        result = run_sweep(OutboxEvent.objects.all(), handle, chunk_size=2)
+
+        assert [len(pks) for pks in seen] == [2, 2, 1]
+        assert result["handled"] == 5
+        assert result["chunks"] == 3
+        assert result["done"] is True
+        assert result["cursor"] == str(max(e.pk for e in events))
+
+    def test_spent_budget_stops_after_one_chunk(self, events):
+        result = run_sweep(OutboxEvent.objects.all(), len, chunk_size=2, budget=0)
+
+        ordered = sorted(e.pk for e in events)
+        assert result["handled"] == 2
+        assert result["done"] is False
+        assert result["cursor"] == str(ordered[1])
+
+    def test_resumes_after_cursor(self, events):
+        ordered = sorted(e.pk for e in events)
+        seen = []
+
+        def handle(pks):
+            seen.extend(pks)
+            return len(pks)
+
+        result = run_sweep(
+            OutboxEvent.objects.all(), handle, chunk_size=2, cursor=str(ordered[1])
+        )
+
+        assert seen == ordered[2:]
+        assert result["done"] is True
+
+    def test_empty_queryset(self, db):
+        result = run_sweep(OutboxEvent.objects.all(), len)
+        assert result["handled"] == 0
+        assert result["done"] is True
+        assert result["cursor"] is None
+
+
+class TestContinueSweep:
+    """Tests for continue_sweep()."""
+
+    def _task(self, is_eager=False):
+        task = MagicMock()
+        task.request.is_eager = is_eager
+        return task
+
+    def test_re_enqueues_unfinished_sweep(self, settings):
+        settings.CELERY_TASK_ALWAYS_EAGER = False
+        task = self._task()
+        assert continue_sweep(task, {"done": False, "cursor": "abc"}, limit=5)
+        task.apply_async.assert_called_once_with(kwargs={"limit": 5, "cursor": "abc"})
+
+    def test_finished_sweep_not_re_enqueued(self):
+        task = self._task()
+        assert not continue_sweep(task, {"done": True, "cursor": "abc"})
+        task.apply_async.assert_not_called()
+
+    def test_eager_run_not_re_enqueued(self):
+        task = self._task(is_eager=True)
+        assert not continue_sweep(task, {"done": False, "cursor": "abc"})
+        task.apply_async.assert_not_called()
+
+    def test_always_eager_not_re_enqueued(self, settings):
+        settings.CELERY_TASK_ALWAYS_EAGER = True
+        task = self._task()
+        assert not continue_sweep(task, {"done": False, "cursor": "abc"})
+        task.apply_async.assert_not_called()
@@ -1,6 +1,7 @@
 """Unit tests for common app Celery tasks."""
 
 from datetime import timedelta
+from unittest.mock import patch
 
 import pytest
 from django.utils import timezone
@@ -35,6 +36,15 @@ class TestDeliverOutboxEventsTask:
         assert "failed" in result
         assert "remaining" in result
 
+    def test_full_batch_re_enqueues(self):
+        full = {"processed": 20, "delivered": 20, "failed": 0, "remaining": 5}
+        with (
+            patch("common.services.outbox.process_pending_events", return_value=full),
+            patch.object(deliver_outbox_events_task, "delay") as delay,
+        ):
+            deliver_outbox_events_task()
+        delay.assert_called_once_with()
+
 
 @pytest.mark.django_db
 class TestCleanupDeliveredOutboxEventsTask:
@@ -50,7 +60,13 @@ class TestCleanupDeliveredOutboxEventsTask:
 
     def test_noop_when_no_terminal_events(self):
         result = cleanup_delivered_outbox_events_task()
-        assert result == {"deleted": 0, "remaining": 0}
+        assert result == {
+            "deleted": 0,
+            "remaining": 0,
+            "rows_per_sec": 0.0,
+            "done": True,
+            "cursor": None,
+        }
 
     def test_reads_retention_from_settings(self, make_outbox_event, settings):
         settings.OUTBOX_RETENTION_HOURS = 1
@@ -60,3 +76,23 @@ class TestCleanupDeliveredOutboxEventsTask:
 
         result = cleanup_delivered_outbox_events_task()
         assert result["deleted"] == 1
+
+    def test_unfinished_sweep_re_enqueues_from_cursor(self, settings):
+        settings.CELERY_TASK_ALWAYS_EAGER = False
+        partial = {
+            "deleted": 1000,
+            "remaining": 500,
+            "rows_per_sec": 250.0,
+            "done": False,
+            "cursor": "abc",
+        }
+        with (
+            patch(
+                "common.services.outbox.cleanup_delivered_events", return_value=partial
+            ),
+            patch.object(
+                cleanup_delivered_outbox_events_task, "apply_async"
+            ) as enqueue,
+        ):
+            cleanup_delivered_outbox_events_task()
+        enqueue.assert_called_once_with(kwargs={"cursor": "abc"})
@@ -1,14 +1,27 @@
 """Unit tests for webhook delivery service."""
 
+import asyncio
 import hashlib
 import hmac
+import json
+import time
+import uuid
+from collections import namedtuple
+from datetime import UTC, date, datetime, timedelta
+from decimal import Decimal
 from unittest.mock import MagicMock
 
 import httpx
 import pytest
 
 from common.models import WebhookEndpoint
-from common.services.webhook import compute_signature, deliver_to_endpoint
+from common.services import webhook
+from common.services.webhook import (
+    compute_signature,
+    deliver_to_endpoint,
+    fan_out,
+    render_payload,
+)
 
 
 class TestComputeSignature:
@@ -35,6 +48,61 @@ class TestComputeSignature:
         assert sig1 != sig2
 
 
+class TestRenderPayload:
+    """Tests for render_payload()."""
+
+    PAYLOAD = {
+        "id": uuid.UUID("0190f4e6-0000-7000-8000-000000000000"),
+        "price": Decimal("9.99"),
+        "name": "café ✓ 日本 😀",
+        "at": datetime(2024, 5, 1, 12, 30, 45, 123456, tzinfo=UTC),
+        "on": date(2024, 5, 1),
+        "ttl": timedelta(hours=1),
+        "tags": [1, 2.5, None, True],
+    }
+
+    def test_compact_utf8_json(self, monkeypatch):
+        monkeypatch.setattr(webhook, "orjson", None)
+
+        body = render_payload(self.PAYLOAD)
+
+        expected = (
+            '{"id":"0190f4e6-0000-7000-8000-000000000000","price":"9.99",'
+            '"name":"café ✓ 日本 😀","at":"2024-05-01T12:30:45.123Z",'
+            '"on":"2024-05-01","ttl":"P0DT01H00M00S","tags":[1,2.5,null,true]}'
+        )
+        assert body == expected.encode()
+
+    @pytest.mark.parametrize(
+        "payload",
+        [
+            PAYLOAD,
+            {"naive": datetime(2024, 5, 1, 12, 0), "control": '\x1f"\\'},
+            {"floats": [0.1, -0.0, 1e-4, 1e-5, 1e16, 1.5e300, float("nan")]},
+            {"keys": {1: "int", 2.5: "float", None: "none"}},
+            {"big": 2**70},
+            {"tuple": namedtuple("Point", "x y")(1, 2)},
+        ],
+    )
+    def test_orjson_matches_stdlib(self, monkeypatch, payload):
+        pytest.importorskip("orjson")
+        fast = render_payload(payload)
+        monkeypatch.setattr(webhook, "orjson", None)
+
+        assert fast == render_payload(payload)
+
+    def test_str_enum_rendered_by_value(self):
+        from django.db import models
+
+        class Kind(models.TextChoices):
+            FILE = "file", "File"
+
+        assert render_payload({"kind": Kind.FILE}) == b'{"kind":"file"}'
+
+    def test_big_integers_fall_back_to_stdlib(self):
+        assert json.loads(render_payload({"n": 2**70})) == {"n": 2**70}
+
+
 @pytest.mark.django_db
 class TestDeliverToEndpoint:
     """Tests for deliver_to_endpoint() function."""
@@ -143,3 +211,108 @@ class TestDeliverToEndpoint:
 
         expected_signature = compute_signature(sent_payload, endpoint.secret)
         assert sent_signature == expected_signature
+
+    def test_sends_pre_rendered_body(self, make_outbox_event):
+        event = self._make_event(make_outbox_event)
+        event.rendered_payload = b'{"pre":"rendered"}'
+        endpoint = self._make_endpoint()
+
+        client = MagicMock(spec=httpx.Client)
+        client.post.return_value = MagicMock(status_code=200)
+
+        deliver_to_endpoint(client, endpoint, event)
+
+        assert client.post.call_args.kwargs["content"] == b'{"pre":"rendered"}'
+
+
+@pytest.mark.django_db
+class TestFanOut:
+    """Tests for the async fan_out() delivery engine."""
+
+    def _run(self, deliveries, handler, **kwargs):
+        results = {}
+        asyncio.run(
+            fan_out(
+                deliveries, results, transport=httpx.MockTransport(handler), **kwargs
+            )
+        )
+        return results
+
+    def test_delivers_concurrently_within_caps(self, make_outbox_event):
+        endpoints = [
+            WebhookEndpoint.objects.create(url=f"https://hook{i}.test/", secret="s")
+            for i in range(5)
+        ]
+        events = [
+            make_outbox_event(aggregate_id=str(i), event_type="file.stored")
+            for i in range(20)
+        ]
+        active = {"total": 0, "peak": 0}
+        per_host = {}
+        host_peak = {}
+
+        async def handler(request):
+            host = request.url.host
+            active["total"] += 1
+            per_host[host] = per_host.get(host, 0) + 1
+            active["peak"] = max(active["peak"], active["total"])
+            host_peak[host] = max(host_peak.get(host, 0), per_host[host])
+            await asyncio.sleep(0.05)
+            active["total"] -= 1
+            per_host[host] -= 1
+            return httpx.Response(204)
+
+        start = time.monotonic()
+        results = self._run(
+            [(event, endpoints) for event in events],
+            handler,
+            max_in_flight=20,
+            max_per_endpoint=4,
+        )
+        elapsed = time.monotonic() - start
+
+        assert len(results) == 20
+        assert all(
+            outcome["ok"]
+            for outcomes in results.values()
+            for outcome in outcomes.values()
+        )
+        assert active["peak"] == 20
+        assert max(host_peak.values()) == 4
+        # 100 sequential POSTs would take 5 s; 4-wide per endpoint is ~5 rounds
+        assert elapsed < 2.0
+
+    def test_outcomes_recorded_per_endpoint(self, make_outbox_event):
+        good = WebhookEndpoint.objects.create(url="https://good.test/", secret="s")
+        bad = WebhookEndpoint.objects.create(url="https://bad.test/", secret="s")
+        first = make_outbox_event(aggregate_id="1")
+        second = make_outbox_event(aggregate_id="2")
+
+        def handler(request):
+            if request.url.host == "bad.test":
+                raise httpx.ConnectError("Connection refused")
+            return httpx.Response(200)
+
+        results = self._run([(first, [good, bad]), (second, [good])], handler)
+
+        assert results[first.pk][good.pk]["ok"] is True
+        assert results[first.pk][bad.pk]["ok"] is False
+        assert "ConnectError" in results[first.pk][bad.pk]["error"]
+        assert list(results[second.pk]) == [good.pk]
+
+    def test_signed_headers_sent(self, make_outbox_event):
+        endpoint = WebhookEndpoint.objects.create(url="https://a.test/", secret="s")
+        event = make_outbox_event(event_type="file.stored")
+        seen = []
+
+        def handler(request):
+            seen.append(request)
+            return httpx.Response(200)
+
+        self._run([(event, [endpoint])], handler)
+
+        request = seen[0]
+        assert request.headers["X-Webhook-Event"] == "file.stored"
+        assert request.headers["X-Webhook-Signature"] == compute_signature(
+            request.content, "s"
+        )
@@ -16,8 +16,9 @@ run_migrations() {
 case "${1:-web}" in
     web)
         run_migrations
-        echo "[entrypoint] Starting gunicorn..."
-        exec gunicorn boot.wsgi:application \
+        echo "[entrypoint] Starting gunicorn (ASGI)..."
+        exec gunicorn boot.asgi:application \
+            --worker-class uvicorn_worker.UvicornWorker \
             --bind "0.0.0.0:${WEB_PORT}" \
             --workers "${WEB_WORKERS:-4}" \
             --access-logfile - \
@@ -6,7 +6,7 @@ from django.contrib import messages
 from django.shortcuts import redirect, render
 from django.views.decorators.http import require_http_methods
 from portal.models import UploadFile
-from portal.services.uploads import create_batch, create_upload_file, finalize_batch
+from portal.services.uploads import create_batch, create_upload_files, finalize_batch
 
 from frontend.decorators import frontend_login_required
 
@@ -47,11 +47,9 @@ def upload_view(request):
         messages.error(request, error)
         return redirect("frontend:upload")
 
+    # Hash and store all files concurrently, then write all rows at once
     batch = create_batch(request.user)
-    results = []
-    for f in files:
-        upload = create_upload_file(request.user, f, batch=batch)
-        results.append(upload)
+    results = create_upload_files(request.user, files, batch=batch)
     finalize_batch(batch)
 
     stored_count = sum(1 for r in results if r.status == UploadFile.Status.STORED)
@@ -4,6 +4,7 @@ from django.contrib import admin
 
 from portal.models import (
     PortalEventOutbox,
+    StoredBlob,
     UploadBatch,
     UploadFile,
     UploadPart,
@@ -15,10 +16,25 @@ from portal.models import (
 class UploadBatchAdmin(admin.ModelAdmin):
     """Admin interface for upload batches."""
 
-    list_display = ("pk", "created_by", "status", "created_at")
+    list_display = (
+        "pk",
+        "created_by",
+        "status",
+        "total_count",
+        "stored_count",
+        "failed_count",
+        "created_at",
+    )
     list_filter = ("status", "created_at")
     search_fields = ("pk", "idempotency_key", "created_by__email")
-    readonly_fields = ("pk", "created_at", "updated_at")
+    readonly_fields = (
+        "pk",
+        "total_count",
+        "stored_count",
+        "failed_count",
+        "created_at",
+        "updated_at",
+    )
     list_select_related = ("created_by",)
     date_hierarchy = "created_at"
 
@@ -42,6 +58,7 @@ class UploadFileAdmin(admin.ModelAdmin):
         "size_bytes",
         "content_type",
         "sha256",
+        "blob",
         "status",
         "error_message",
         "created_at",
@@ -51,6 +68,24 @@ class UploadFileAdmin(admin.ModelAdmin):
     date_hierarchy = "created_at"
 
 
+@admin.register(StoredBlob)
+class StoredBlobAdmin(admin.ModelAdmin):
+    """Admin interface for content-addressed stored blobs."""
+
+    list_display = ("sha256", "size_bytes", "ref_count", "created_at")
+    search_fields = ("sha256", "storage_key")
+    readonly_fields = (
+        "pk",
+        "sha256",
+        "storage_key",
+        "size_bytes",
+        "ref_count",
+        "created_at",
+        "updated_at",
+    )
+    date_hierarchy = "created_at"
+
+
 @admin.register(UploadSession)
 class UploadSessionAdmin(admin.ModelAdmin):
     """Admin interface for upload sessions."""
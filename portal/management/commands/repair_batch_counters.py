@@ -0,0 +1,39 @@
+"""Recompute UploadBatch file counters from the UploadFile rows."""
+
+from common.management.base import DooritoBaseCommand
+
+from portal.services.uploads import recompute_batch_counters
+
+
+class Command(DooritoBaseCommand):
+    help = "Recompute total/stored/failed counters on upload batches from their files."
+    supports_dry_run = True
+    supports_json = True
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "batch_ids",
+            nargs="*",
+            help="Batch IDs to repair (default: all batches)",
+        )
+
+    def handle(self, *args, **options):
+        self.start_timer()
+        result = recompute_batch_counters(
+            batch_ids=options["batch_ids"] or None,
+            dry_run=options["dry_run"],
+        )
+        result["dry_run"] = options["dry_run"]
+        result["seconds"] = round(self.elapsed(), 3)
+
+        if options["json_output"]:
+            self.output_json(result)
+            return
+        verb = "would repair" if options["dry_run"] else "repaired"
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Checked {result['checked']} batches, {verb} {result['repaired']} "
+                f"in {result['seconds']}s."
+            )
+        )
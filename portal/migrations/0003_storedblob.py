@@ -0,0 +1,80 @@
+# Generated by Django 5.2.11 on 2026-10-17 03:56
+
+import common.utils
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portal", "0002_portaleventoutbox_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StoredBlob",
+            fields=[
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="created at"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="updated at"),
+                ),
+                (
+                    "id",
+                    models.UUIDField(
+                        default=common.utils.uuid7,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("sha256", models.CharField(max_length=64, unique=True)),
+                (
+                    "storage_key",
+                    models.CharField(
+                        help_text="Storage name of the blob (derived from sha256)",
+                        max_length=500,
+                    ),
+                ),
+                (
+                    "size_bytes",
+                    models.PositiveBigIntegerField(help_text="Blob size in bytes"),
+                ),
+                (
+                    "ref_count",
+                    models.PositiveIntegerField(
+                        default=0,
+                        help_text="Number of UploadFile rows referencing this blob",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "stored blob",
+                "verbose_name_plural": "stored blobs",
+                "db_table": "portal_stored_blob",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("ref_count", 0)),
+                        fields=["updated_at"],
+                        name="idx_portal_blob_unreferenced",
+                    )
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="uploadfile",
+            name="blob",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Shared content blob (content-addressed storage mode only)",
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="files",
+                to="portal.storedblob",
+            ),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.11 on 2026-10-17 04:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portal", "0003_storedblob"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadsession",
+            name="multipart_upload_id",
+            field=models.CharField(
+                blank=True,
+                help_text="S3 multipart upload ID when parts stream straight to S3",
+                max_length=1024,
+            ),
+        ),
+    ]
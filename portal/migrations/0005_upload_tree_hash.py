@@ -0,0 +1,39 @@
+# Generated by Django 5.2.11 on 2026-10-17 04:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portal", "0004_uploadsession_multipart_upload_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadfile",
+            name="tree_sha256",
+            field=models.CharField(
+                blank=True,
+                help_text="Merkle tree hash over part SHA-256s (chunked uploads only)",
+                max_length=64,
+            ),
+        ),
+        migrations.AddField(
+            model_name="uploadsession",
+            name="tree_frontier",
+            field=models.JSONField(
+                blank=True,
+                default=list,
+                help_text="Merkle subtree roots folded from the leading consecutive parts",
+            ),
+        ),
+        migrations.AddField(
+            model_name="uploadsession",
+            name="tree_sha256",
+            field=models.CharField(
+                blank=True,
+                help_text="Merkle tree hash over part SHA-256s, set on completion",
+                max_length=64,
+            ),
+        ),
+    ]
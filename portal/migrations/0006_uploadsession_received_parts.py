@@ -0,0 +1,43 @@
+# Generated by Django 5.2.11 on 2026-10-17 04:24
+
+from django.db import migrations, models
+
+
+def backfill_received_parts(apps, schema_editor):
+    """Build bitmaps (and exact counters) for sessions that already have parts."""
+    UploadSession = apps.get_model("portal", "UploadSession")
+    UploadPart = apps.get_model("portal", "UploadPart")
+
+    sessions = UploadSession.objects.filter(parts__isnull=False).distinct()
+    for session in sessions.iterator():
+        bitmap = bytearray((session.total_parts + 7) // 8)
+        count = 0
+        for number in UploadPart.objects.filter(
+            session_id=session.pk, status="received"
+        ).values_list("part_number", flat=True):
+            index, bit = divmod(number - 1, 8)
+            if index < len(bitmap) and not bitmap[index] >> bit & 1:
+                bitmap[index] |= 1 << bit
+                count += 1
+        UploadSession.objects.filter(pk=session.pk).update(
+            received_parts=bytes(bitmap), completed_parts=count
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portal", "0005_upload_tree_hash"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadsession",
+            name="received_parts",
+            field=models.BinaryField(
+                blank=True,
+                default=bytes,
+                help_text="Bitmap of received part numbers (bit n-1 for part n)",
+            ),
+        ),
+        migrations.RunPython(backfill_received_parts, migrations.RunPython.noop),
+    ]
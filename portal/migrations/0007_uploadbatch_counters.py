@@ -0,0 +1,52 @@
+# Generated by Django 5.2.11 on 2026-10-17 04:39
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_batch_counters(apps, schema_editor):
+    """Compute counters for existing batches from their files."""
+    UploadBatch = apps.get_model("portal", "UploadBatch")
+
+    batches = UploadBatch.objects.annotate(
+        n_total=Count("files"),
+        n_stored=Count("files", filter=Q(files__status="stored")),
+        n_failed=Count("files", filter=Q(files__status="failed")),
+    ).filter(n_total__gt=0)
+    for batch in batches.iterator():
+        UploadBatch.objects.filter(pk=batch.pk).update(
+            total_count=batch.n_total,
+            stored_count=batch.n_stored,
+            failed_count=batch.n_failed,
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portal", "0006_uploadsession_received_parts"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadbatch",
+            name="failed_count",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Files in the batch with status FAILED"
+            ),
+        ),
+        migrations.AddField(
+            model_name="uploadbatch",
+            name="stored_count",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Files in the batch with status STORED"
+            ),
+        ),
+        migrations.AddField(
+            model_name="uploadbatch",
+            name="total_count",
+            field=models.PositiveIntegerField(
+                default=0, help_text="Files in the batch (any status)"
+            ),
+        ),
+        migrations.RunPython(backfill_batch_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+"""Partition portal_event_outbox by created_at day (PostgreSQL only).
+
+Same conversion as ``common.0008`` (see ``common.services.partitions``),
+including removing the idempotency constraint from the migration state
+the need for a maintenance window and PostgreSQL 13 or later; a no-op
+on other databases.
+"""
+
+from common.services.partitions import partition_table, unpartition_table
+from django.db import migrations
+
+TABLE = "portal_event_outbox"
+OPTIONS = {
+    "unique_name": "unique_portal_event_type_idempotency_key",
+    "pending_index": "idx_portal_outbox_pending_next",
+}
+
+
+def partition(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        partition_table(schema_editor, TABLE, **OPTIONS)
+
+
+def unpartition(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        unpartition_table(schema_editor, TABLE, **OPTIONS)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("common", "0008_partition_outbox_event"),
+        ("portal", "0007_uploadbatch_counters"),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunPython(partition, unpartition)],
+            state_operations=[
+                migrations.RemoveConstraint(
+                    model_name="portaleventoutbox",
+                    name=OPTIONS["unique_name"],
+                ),
+            ],
+        ),
+    ]
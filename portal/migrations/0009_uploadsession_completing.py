@@ -0,0 +1,28 @@
+# Generated by Django 5.2.11 on 2026-10-17 06:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("portal", "0008_partition_portal_event_outbox"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="uploadsession",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("init", "Init"),
+                    ("in_progress", "In Progress"),
+                    ("completing", "Completing"),
+                    ("complete", "Complete"),
+                    ("failed", "Failed"),
+                    ("aborted", "Aborted"),
+                ],
+                default="init",
+                max_length=20,
+            ),
+        ),
+    ]
@@ -8,7 +8,15 @@ from django.db import models
 
 
 class UploadBatch(TimeStampedModel):
-    """Groups multiple uploaded files into a single logical batch."""
+    """Groups multiple uploaded files into a single logical batch.
+
+    ``total_count``, ``stored_count`` and ``failed_count`` are kept in step
+    with the batch's files (F() updates in the same transaction as each
+    file change: the UploadFile post_save/post_delete signals count rows
+    created or deleted one by one, the upload services the rest), so
+    finalizing reads no file rows.
+    ``manage.py repair_batch_counters`` recomputes them from scratch.
+    """
 
     class Status(models.TextChoices):
         INIT = "init", "Init"
@@ -35,6 +43,18 @@ class UploadBatch(TimeStampedModel):
         blank=True,
         db_index=True,
     )
+    total_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Files in the batch (any status)",
+    )
+    stored_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Files in the batch with status STORED",
+    )
+    failed_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Files in the batch with status FAILED",
+    )
 
     class Meta:
         db_table = "portal_upload_batch"
@@ -46,6 +66,45 @@ class UploadBatch(TimeStampedModel):
         return f"Batch {self.pk} ({self.get_status_display()})"
 
 
+class StoredBlob(TimeStampedModel):
+    """Content-addressed storage object shared by identical uploads.
+
+    Used when ``FILE_UPLOAD_DEDUPLICATE`` is enabled: the bytes live once
+    under a key derived from their SHA-256, and every UploadFile with the
+    same content points at the same blob. ``ref_count`` tracks how many
+    UploadFile rows reference the blob; unreferenced blobs are purged by
+    the upload cleanup task after a grace period.
+    """
+
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+    sha256 = models.CharField(max_length=64, unique=True)
+    storage_key = models.CharField(
+        max_length=500,
+        help_text="Storage name of the blob (derived from sha256)",
+    )
+    size_bytes = models.PositiveBigIntegerField(help_text="Blob size in bytes")
+    ref_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of UploadFile rows referencing this blob",
+    )
+
+    class Meta:
+        db_table = "portal_stored_blob"
+        verbose_name = "stored blob"
+        verbose_name_plural = "stored blobs"
+        ordering = ["-created_at"]
+        indexes = [
+            models.Index(
+                fields=["updated_at"],
+                condition=models.Q(ref_count=0),
+                name="idx_portal_blob_unreferenced",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Blob {self.sha256[:16]} ({self.ref_count} refs)"
+
+
 class UploadFile(TimeStampedModel):
     """Canonical file record for uploaded files.
 
@@ -75,10 +134,23 @@ class UploadFile(TimeStampedModel):
         related_name="upload_files",
     )
     file = models.FileField(upload_to="uploads/%Y/%m/")
+    blob = models.ForeignKey(
+        "StoredBlob",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="files",
+        help_text="Shared content blob (content-addressed storage mode only)",
+    )
     original_filename = models.CharField(max_length=255)
     content_type = models.CharField(max_length=100)
     size_bytes = models.PositiveBigIntegerField(help_text="File size in bytes")
     sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    tree_sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Merkle tree hash over part SHA-256s (chunked uploads only)",
+    )
     metadata = models.JSONField(default=dict, blank=True)
     status = models.CharField(
         max_length=20,
@@ -105,12 +177,16 @@ class UploadSession(TimeStampedModel):
     """Tracks a chunked upload session for a single file.
 
     Status lifecycle:
-        init → in_progress → complete / failed / aborted
+        init → in_progress → completing → complete / failed
+        init / in_progress → aborted
+
+    COMPLETING covers the file placement in ``complete_upload_session()``.
     """
 
     class Status(models.TextChoices):
         INIT = "init", "Init"
         IN_PROGRESS = "in_progress", "In Progress"
+        COMPLETING = "completing", "Completing"
         COMPLETE = "complete", "Complete"
         FAILED = "failed", "Failed"
         ABORTED = "aborted", "Aborted"
@@ -138,6 +214,11 @@ class UploadSession(TimeStampedModel):
     )
     bytes_received = models.PositiveBigIntegerField(default=0)
     completed_parts = models.PositiveIntegerField(default=0)
+    received_parts = models.BinaryField(
+        default=bytes,
+        blank=True,
+        help_text="Bitmap of received part numbers (bit n-1 for part n)",
+    )
     idempotency_key = models.CharField(
         max_length=255,
         blank=True,
@@ -148,6 +229,21 @@ class UploadSession(TimeStampedModel):
         blank=True,
         db_index=True,
     )
+    multipart_upload_id = models.CharField(
+        max_length=1024,
+        blank=True,
+        help_text="S3 multipart upload ID when parts stream straight to S3",
+    )
+    tree_frontier = models.JSONField(
+        default=list,
+        blank=True,
+        help_text="Merkle subtree roots folded from the leading consecutive parts",
+    )
+    tree_sha256 = models.CharField(
+        max_length=64,
+        blank=True,
+        help_text="Merkle tree hash over part SHA-256s, set on completion",
+    )
 
     class Meta:
         db_table = "portal_upload_session"
@@ -253,12 +349,8 @@ class PortalEventOutbox(TimeStampedModel):
                 name="idx_portal_outbox_pending_next",
             ),
         ]
-        constraints = [
-            models.UniqueConstraint(
-                fields=["event_type", "idempotency_key"],
-                name="unique_portal_event_type_idempotency_key",
-            ),
-        ]
+        # (event_type, idempotency_key) is unique; enforced outside the
+        # migration state like OutboxEvent's (see migration 0008).
 
     def __str__(self):
         return f"{self.event_type} ({self.get_status_display()})"
@@ -0,0 +1,312 @@
+"""Portal assembly services: concatenate staged part data into a stored file.
+
+Sources are always local files (see ``portal/services/chunks.py``). When
+the destination storage is local too, segments are copied kernel-side with
+``os.copy_file_range`` (or ``os.sendfile``), so part bytes never pass
+through Python buffers. Remote destinations (S3) and whole-file SHA-256
+verification use a large-buffer streaming copy that hashes in the same
+pass.
+"""
+
+import errno
+import hashlib
+import io
+import logging
+import os
+import time
+
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+
+from portal.models import UploadFile
+
+logger = logging.getLogger(__name__)
+
+STREAM_BUFFER_SIZE = 8_388_608  # 8 MB
+# errnos meaning "this kernel copy primitive can't handle these fds"
+_KERNEL_COPY_UNSUPPORTED = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP}
+
+
+def local_path(storage, name):
+    """Return the filesystem path for name, or None if storage is not local.
+
+    Only ``FileSystemStorage`` (and subclasses) qualify: other backends may
+    implement ``path()`` without storing their data there.
+    """
+    if isinstance(storage, FileSystemStorage):
+        return storage.path(name)
+    return None
+
+
+def coalesce_segments(segments):
+    """Merge adjacent ``(path, offset, length)`` segments of the same file.
+
+    Parts written into one staging file at consecutive offsets collapse
+    into a single segment, so a whole session copies with one call.
+
+    Args:
+        segments: Iterable of (path, offset, length) tuples, in output order.
+
+    Returns:
+        List of coalesced (path, offset, length) tuples.
+    """
+    merged = []
+    for path, offset, length in segments:
+        if merged:
+            last_path, last_offset, last_length = merged[-1]
+            if last_path == path and last_offset + last_length == offset:
+                merged[-1] = (path, last_offset, last_length + length)
+                continue
+        merged.append((path, offset, length))
+    return merged
+
+
+def _kernel_copy(src_fd, dst_fd, offset, length):
+    """Copy a range with copy_file_range/sendfile; return the method used.
+
+    Returns None (nothing copied) if neither primitive supports the fds.
+    """
+    if hasattr(os, "copy_file_range"):
+        copied = 0
+        try:
+            while copied < length:
+                n = os.copy_file_range(src_fd, dst_fd, length - copied, offset + copied)
+                if n == 0:
+                    break
+                copied += n
+        except OSError as exc:
+            if copied or exc.errno not in _KERNEL_COPY_UNSUPPORTED:
+                raise
+        else:
+            if copied == length:
+                return "copy_file_range"
+            raise OSError(errno.EIO, f"Short copy: {copied} of {length} bytes")
+
+    if hasattr(os, "sendfile"):
+        copied = 0
+        try:
+            while copied < length:
+                n = os.sendfile(dst_fd, src_fd, offset + copied, length - copied)
+                if n == 0:
+                    break
+                copied += n
+        except OSError as exc:
+            if copied or exc.errno not in _KERNEL_COPY_UNSUPPORTED:
+                raise
+        else:
+            if copied == length:
+                return "sendfile"
+            raise OSError(errno.EIO, f"Short copy: {copied} of {length} bytes")
+
+    return None
+
+
+def _stream_copy(src, dst, offset, length, hasher, buf):
+    src.seek(offset)
+    view = memoryview(buf)
+    remaining = length
+    while remaining:
+        n = src.readinto(view[: min(remaining, len(buf))])
+        if not n:
+            raise OSError(errno.EIO, f"Unexpected end of {src.name}")
+        if hasher is not None:
+            hasher.update(view[:n])
+        dst.write(view[:n])
+        remaining -= n
+
+
+class _SegmentReader(io.RawIOBase):
+    """Read-only stream over a list of segments, hashing as it is read.
+
+    Storage backends may rewind before uploading (``seek(0)``), which
+    restarts the hash; any other seek is unsupported.
+    """
+
+    def __init__(self, segments, hash_content):
+        super().__init__()
+        self._segments = segments
+        self._hash_content = hash_content
+        self.size = sum(length for _path, _offset, length in segments)
+        self._fh = None
+        self._rewind()
+
+    def _rewind(self):
+        self._close_segment()
+        self._index = 0
+        self._pos = 0
+        self.position = 0
+        self.hasher = hashlib.sha256() if self._hash_content else None
+
+    def _close_segment(self):
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if offset == 0 and whence == io.SEEK_SET:
+            self._rewind()
+        elif offset == 0 and whence == io.SEEK_END:
+            self._close_segment()
+            self._index = len(self._segments)
+            self.position = self.size
+        elif not (offset == 0 and whence == io.SEEK_CUR):
+            raise io.UnsupportedOperation("Segment streams only rewind to the start.")
+        return self.position
+
+    def readinto(self, buffer):
+        while self._index < len(self._segments):
+            path, offset, length = self._segments[self._index]
+            if self._pos >= length:
+                self._close_segment()
+                self._index += 1
+                self._pos = 0
+                continue
+            if self._fh is None:
+                self._fh = open(path, "rb")  # noqa: SIM115
+                self._fh.seek(offset + self._pos)
+            view = memoryview(buffer)[: length - self._pos]
+            n = self._fh.readinto(view)
+            if not n:
+                raise OSError(errno.EIO, f"Unexpected end of {path}")
+            if self.hasher is not None:
+                self.hasher.update(view[:n])
+            self._pos += n
+            self.position += n
+            return n
+        return 0
+
+    def close(self):
+        self._close_segment()
+        super().close()
+
+
+def _open_local_destination(storage, name):
+    """Create the destination file exclusively; return (name, path, fd)."""
+    while True:
+        name = storage.get_available_name(name)
+        path = storage.path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            fd = os.open(
+                path,
+                os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0),
+                0o666,
+            )
+        except FileExistsError:
+            continue  # Lost a race for the name; pick another
+        return name, path, fd
+
+
+def _assemble_local(storage, segments, name, verify):
+    name, path, dst_fd = _open_local_destination(storage, name)
+    method = None
+    hasher = hashlib.sha256() if verify else None
+    try:
+        if not verify:
+            for src_path, offset, length in segments:
+                with open(src_path, "rb") as src:
+                    used = _kernel_copy(src.fileno(), dst_fd, offset, length)
+                if used is None:
+                    method = None  # Start over with a streaming copy
+                    break
+                method = used
+        if method is None:
+            # Verification needs the bytes; or kernel copies are unavailable
+            os.ftruncate(dst_fd, 0)
+            os.lseek(dst_fd, 0, os.SEEK_SET)
+            buf = bytearray(STREAM_BUFFER_SIZE)
+            with open(dst_fd, "wb", closefd=False) as dst:
+                for src_path, offset, length in segments:
+                    with open(src_path, "rb", buffering=0) as src:
+                        _stream_copy(src, dst, offset, length, hasher, buf)
+            method = "stream"
+    except BaseException:
+        os.close(dst_fd)
+        os.remove(path)
+        raise
+    os.close(dst_fd)
+    if storage.file_permissions_mode is not None:
+        os.chmod(path, storage.file_permissions_mode)
+    return name, method, hasher.hexdigest() if hasher else ""
+
+
+def _assemble_remote(storage, segments, name, verify):
+    reader = _SegmentReader(segments, hash_content=verify)
+    try:
+        name = storage.save(name, File(reader, name=os.path.basename(name)))
+    finally:
+        reader.close()
+    return name, "stream", reader.hasher.hexdigest() if verify else ""
+
+
+def assemble_segments(segments, name, expected_sha256=None):
+    """Concatenate local file segments into a new file in default storage.
+
+    Local storage destinations are written with kernel-side copies
+    (``os.copy_file_range``, falling back to ``os.sendfile``), unless a
+    whole-file SHA-256 is expected: then, like remote destinations, the
+    data is streamed through an 8 MB buffer and hashed in the same pass.
+
+    Args:
+        segments: Iterable of (path, offset, length) tuples, in order.
+            Adjacent ranges of the same file are coalesced first.
+        name: Desired storage name (an available name is chosen).
+        expected_sha256: Optional hex SHA-256 the assembled file must have.
+
+    Returns:
+        dict: {"name": str, "bytes": int, "seconds": float,
+        "throughput_bytes_per_sec": float, "method": str, "sha256": str}.
+        ``method`` is "copy_file_range", "sendfile" or "stream";
+        ``sha256`` is empty unless verification was requested.
+
+    Raises:
+        ValidationError: If the assembled content does not match
+            ``expected_sha256`` (code ``checksum_mismatch``); the
+            destination file is deleted.
+    """
+    segments = coalesce_segments(segments)
+    storage = UploadFile._meta.get_field("file").storage
+    verify = bool(expected_sha256)
+    total = sum(length for _path, _offset, length in segments)
+
+    started = time.perf_counter()
+    if local_path(storage, name) is not None:
+        name, method, sha256 = _assemble_local(storage, segments, name, verify)
+    else:
+        name, method, sha256 = _assemble_remote(storage, segments, name, verify)
+    seconds = time.perf_counter() - started
+
+    if verify and sha256 != expected_sha256.lower():
+        storage.delete(name)
+        raise ValidationError(
+            f"Assembled file SHA-256 {sha256} does not match {expected_sha256}.",
+            code="checksum_mismatch",
+        )
+
+    throughput = total / seconds if seconds > 0 else float(total)
+    logger.info(
+        "Assembled file: name=%s bytes=%d method=%s seconds=%.3f throughput=%.1f MB/s",
+        name,
+        total,
+        method,
+        seconds,
+        throughput / 1_048_576,
+    )
+    return {
+        "name": name,
+        "bytes": total,
+        "seconds": seconds,
+        "throughput_bytes_per_sec": throughput,
+        "method": method,
+        "sha256": sha256,
+    }
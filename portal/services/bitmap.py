@@ -0,0 +1,84 @@
+"""Portal bitmap services: compact received-part sets for upload sessions.
+
+``UploadSession.received_parts`` holds one bit per part (part n is bit
+``n - 1``, least significant bit first within each byte), so a 10,000-part
+session needs 1,250 bytes. Completion checks, progress and missing-part
+lists read this one column instead of scanning ``UploadPart`` rows.
+"""
+
+
+def empty_bitmap(total_parts):
+    """Return an all-clear bitmap sized for total_parts."""
+    return bytes((total_parts + 7) // 8)
+
+
+def has_part(bitmap, part_number):
+    """Return True if part_number's bit is set."""
+    index, bit = divmod(part_number - 1, 8)
+    return index < len(bitmap) and bool(bitmap[index] >> bit & 1)
+
+
+def set_part(bitmap, part_number):
+    """Set part_number's bit.
+
+    Args:
+        bitmap: Current bitmap (bytes or memoryview); grown if too short.
+        part_number: 1-indexed part ordinal.
+
+    Returns:
+        A tuple of (new bitmap bytes, newly_set).
+    """
+    index, bit = divmod(part_number - 1, 8)
+    data = bytearray(bitmap)
+    if index >= len(data):
+        data.extend(bytes(index + 1 - len(data)))
+    if data[index] >> bit & 1:
+        return bytes(data), False
+    data[index] |= 1 << bit
+    return bytes(data), True
+
+
+def count_parts(bitmap):
+    """Return the number of set bits."""
+    return int.from_bytes(bitmap, "little").bit_count()
+
+
+def missing_parts(bitmap, total_parts):
+    """Yield the part numbers in 1..total_parts whose bits are clear.
+
+    Fully received bytes are skipped whole, so a nearly complete bitmap
+    is scanned at byte speed.
+    """
+    for index in range((total_parts + 7) // 8):
+        byte = bitmap[index] if index < len(bitmap) else 0
+        if byte == 0xFF:
+            continue
+        for bit in range(8):
+            part_number = index * 8 + bit + 1
+            if part_number > total_parts:
+                return
+            if not byte >> bit & 1:
+                yield part_number
+
+
+def format_ranges(part_numbers):
+    """Range-encode ascending part numbers, e.g. ``"1-40,57,90-120"``.
+
+    Args:
+        part_numbers: Iterable of ascending ints.
+
+    Returns:
+        The encoded string ("" when empty).
+    """
+    ranges = []
+    start = end = None
+    for n in part_numbers:
+        if end is not None and n == end + 1:
+            end = n
+            continue
+        if start is not None:
+            ranges.append(f"{start}-{end}" if end > start else str(start))
+        start = end = n
+    if start is not None:
+        ranges.append(f"{start}-{end}" if end > start else str(start))
+    return ",".join(ranges)
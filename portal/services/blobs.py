@@ -0,0 +1,191 @@
+"""Portal blob services for content-addressed, deduplicated file storage."""
+
+import logging
+from datetime import timedelta
+
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
+
+from portal.models import StoredBlob, UploadFile
+
+logger = logging.getLogger(__name__)
+
+BLOB_PREFIX = "blobs"
+# Unreferenced blobs are kept this long before purge, so a blob is not
+# deleted and rewritten for every upload of popular content. Uploads in
+# flight are protected by ``acquire_blob()`` re-checking the content.
+UNREFERENCED_BLOB_GRACE = timedelta(hours=1)
+
+
+def _storage():
+    return UploadFile._meta.get_field("file").storage
+
+
+def blob_storage_key(sha256):
+    """Return the storage name for content with the given SHA-256.
+
+    Keys fan out over two directory levels to keep listings small:
+    ``blobs/ab/cd/abcd...``.
+
+    Args:
+        sha256: Hex-encoded SHA-256 of the content.
+
+    Returns:
+        Storage name string.
+    """
+    return f"{BLOB_PREFIX}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def store_blob_content(file, sha256):
+    """Write file content to its content-addressed key unless already present.
+
+    Does not touch the database, so it is safe to call outside a
+    transaction (and from worker threads).
+
+    Args:
+        file: A Django File/UploadedFile whose content hashes to sha256.
+        sha256: Hex-encoded SHA-256 of the content.
+
+    Returns:
+        The storage key holding the content.
+    """
+    storage = _storage()
+    key = blob_storage_key(sha256)
+    if storage.exists(key):
+        logger.info("Blob already stored, skipping write: key=%s", key)
+        return key
+
+    file.seek(0)
+    saved_name = storage.save(key, file)
+    if saved_name != key:
+        # A concurrent writer stored the same content first; the storage
+        # picked an alternate name for ours. Identical bytes, so drop it.
+        storage.delete(saved_name)
+    return key
+
+
+def acquire_blob(sha256, size_bytes, storage_key, count=1, file=None):
+    """Take references on the blob for sha256, creating its row if needed.
+
+    Must be called inside the transaction that creates the referencing
+    UploadFile rows, so the reference count and the rows commit together.
+
+    The blob row is locked first. When it is created here or had no
+    references (so ``purge_unreferenced_blobs()`` may have deleted the
+    content after ``store_blob_content()`` found it), the content is
+    checked under the lock and rewritten from ``file`` if it is gone.
+
+    Args:
+        sha256: Hex-encoded SHA-256 of the content.
+        size_bytes: Content size in bytes.
+        storage_key: Storage name returned by ``store_blob_content()``.
+        count: Number of references to add (one per UploadFile row).
+        file: The uploaded content, used to restore a purged blob.
+            Without it the content is not checked.
+
+    Returns:
+        The StoredBlob instance, with ref_count already incremented.
+    """
+    blob = StoredBlob.objects.select_for_update().filter(sha256=sha256).first()
+    if blob is None:
+        try:
+            with transaction.atomic():
+                blob = StoredBlob.objects.create(
+                    sha256=sha256,
+                    storage_key=storage_key,
+                    size_bytes=size_bytes,
+                    ref_count=0,
+                )
+        except IntegrityError:
+            # Lost a creation race; the row exists now.
+            blob = StoredBlob.objects.select_for_update().get(sha256=sha256)
+
+    if blob.ref_count == 0 and file is not None:
+        _restore_blob_content(blob, file)
+
+    StoredBlob.objects.filter(pk=blob.pk).update(
+        ref_count=models.F("ref_count") + count,
+        updated_at=timezone.now(),
+    )
+    blob.refresh_from_db()
+    return blob
+
+
+def _restore_blob_content(blob, file):
+    """Rewrite a blob's content if a purge removed it from storage."""
+    storage = _storage()
+    if storage.exists(blob.storage_key):
+        return
+    logger.warning("Blob content missing, rewriting: key=%s", blob.storage_key)
+    file.seek(0)
+    saved_name = storage.save(blob.storage_key, file)
+    if saved_name != blob.storage_key:
+        storage.delete(saved_name)
+
+
+def release_blob(blob_id, count=1):
+    """Drop references on a blob.
+
+    The blob row and its content are not deleted here; blobs that reach
+    zero references are removed by ``purge_unreferenced_blobs()`` once
+    the grace period has passed.
+
+    Args:
+        blob_id: Primary key of the StoredBlob.
+        count: Number of references to drop.
+
+    Returns:
+        Number of blob rows updated (0 if the blob no longer exists).
+    """
+    return StoredBlob.objects.filter(pk=blob_id, ref_count__gte=count).update(
+        ref_count=models.F("ref_count") - count,
+        updated_at=timezone.now(),
+    )
+
+
+def purge_unreferenced_blobs(grace=UNREFERENCED_BLOB_GRACE):
+    """Delete blobs that have had no references for longer than ``grace``.
+
+    Each candidate is re-checked under a row lock, so a blob that gained
+    a reference since the scan is kept. The storage object is deleted
+    while the lock is held: an ``acquire_blob()`` waiting on the row then
+    finds the content gone and rewrites it, instead of finding it still
+    present and losing it to a delete that runs after commit.
+
+    Args:
+        grace: How long a blob must have been unreferenced.
+
+    Returns:
+        Number of blobs deleted.
+    """
+    cutoff = timezone.now() - grace
+    candidate_pks = list(
+        StoredBlob.objects.filter(ref_count=0, updated_at__lt=cutoff).values_list(
+            "pk", flat=True
+        )
+    )
+
+    storage = _storage()
+    purged = 0
+    for pk in candidate_pks:
+        with transaction.atomic():
+            blob = (
+                StoredBlob.objects.select_for_update()
+                .filter(pk=pk, ref_count=0, updated_at__lt=cutoff)
+                .first()
+            )
+            if blob is None:
+                continue
+            if UploadFile.objects.filter(blob_id=pk).exists():
+                logger.warning(
+                    "Blob has ref_count=0 but is still referenced, skipping: pk=%s",
+                    pk,
+                )
+                continue
+            storage.delete(blob.storage_key)
+            blob.delete()
+        purged += 1
+
+    if purged:
+        logger.info("Purged %d unreferenced blobs.", purged)
+    return purged
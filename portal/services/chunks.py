@@ -0,0 +1,202 @@
+"""Portal chunk services: positional writes of session parts into a staging file.
+
+Every chunked upload session stages its bytes in one local file,
+preallocated (sparse) to ``UploadSession.total_size_bytes``. Each part is
+written at its own offset with ``os.pwrite``, so parts can arrive out of
+order and from concurrent requests, and the staging file is the
+assembled file once the last part lands. Callers claim a part
+(``portal.services.sessions.claim_upload_parts()``) before writing it,
+so two requests never write the same offsets.
+"""
+
+import hashlib
+import logging
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+from portal.models import UploadFile
+from portal.services.assembly import local_path
+
+logger = logging.getLogger(__name__)
+
+WRITE_CHUNK_SIZE = 1_048_576  # 1 MB
+
+
+def staging_dir():
+    """Return the directory holding session staging files.
+
+    ``settings.FILE_UPLOAD_SESSION_DIR`` when set, otherwise a
+    subdirectory of ``FILE_UPLOAD_TEMP_DIR`` (or the system temp dir).
+    """
+    configured = settings.FILE_UPLOAD_SESSION_DIR
+    if configured:
+        return str(configured)
+    base = settings.FILE_UPLOAD_TEMP_DIR or tempfile.gettempdir()
+    return os.path.join(base, "doorito-upload-sessions")
+
+
+def staging_path(session):
+    """Return the staging file path for an upload session."""
+    return os.path.join(staging_dir(), f"{session.pk}.part")
+
+
+def part_range(session, part_number):
+    """Return the byte range a part covers within the session's file.
+
+    Args:
+        session: An UploadSession instance.
+        part_number: 1-indexed chunk ordinal.
+
+    Returns:
+        A tuple of (offset_bytes, size_bytes).
+
+    Raises:
+        ValidationError: If part_number is outside 1..total_parts.
+    """
+    if not 1 <= part_number <= session.total_parts:
+        raise ValidationError(
+            f"Part number {part_number} is out of range (1-{session.total_parts}).",
+            code="invalid_part_number",
+        )
+    offset = (part_number - 1) * session.chunk_size_bytes
+    size = min(session.chunk_size_bytes, session.total_size_bytes - offset)
+    return offset, size
+
+
+def _open_staging_file(session):
+    """Open (creating and preallocating if needed) the staging file."""
+    path = staging_path(session)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    try:
+        if os.fstat(fd).st_size < session.total_size_bytes:
+            # Sparse preallocation: no blocks are written, concurrent
+            # callers truncating to the same size is harmless.
+            os.ftruncate(fd, session.total_size_bytes)
+    except BaseException:
+        os.close(fd)
+        raise
+    return fd, path
+
+
+def _pwrite_all(fd, data, offset):
+    view = memoryview(data)
+    while view:
+        written = os.pwrite(fd, view, offset)
+        view = view[written:]
+        offset += written
+
+
+def stage_upload_part(session, part_number, stream, write=True):
+    """Write a part's bytes at its offset in the session staging file.
+
+    Reads ``stream`` in 1 MB chunks, hashing as it goes. Does not touch
+    the database, so it is safe to call from worker threads.
+
+    Args:
+        session: An UploadSession instance.
+        part_number: 1-indexed chunk ordinal.
+        stream: File-like object yielding the part's raw bytes.
+        write: When False, only hash and size-check the bytes (used to
+            compare a retried part against the one already received).
+
+    Returns:
+        dict: {"part_number": int, "offset_bytes": int, "size_bytes": int,
+        "sha256": str, "temp_storage_key": str}
+
+    Raises:
+        ValidationError: If the part number is out of range or the body
+            length does not match the part's expected size.
+    """
+    offset, expected_size = part_range(session, part_number)
+    hasher = hashlib.sha256()
+    received = 0
+
+    fd, path = _open_staging_file(session) if write else (None, staging_path(session))
+    try:
+        while True:
+            chunk = stream.read(WRITE_CHUNK_SIZE)
+            if not chunk:
+                break
+            if received + len(chunk) > expected_size:
+                received += len(chunk)  # Oversized body; rejected below
+                break
+            hasher.update(chunk)
+            if fd is not None:
+                _pwrite_all(fd, chunk, offset + received)
+            received += len(chunk)
+    finally:
+        if fd is not None:
+            os.close(fd)
+
+    if received != expected_size:
+        raise ValidationError(
+            f"Part {part_number} must be {expected_size} bytes.",
+            code="invalid_part_size",
+        )
+
+    if write:
+        logger.info(
+            "Upload part staged: session=%s part=%d offset=%d size=%d",
+            session.pk,
+            part_number,
+            offset,
+            received,
+        )
+    return {
+        "part_number": part_number,
+        "offset_bytes": offset,
+        "size_bytes": received,
+        "sha256": hasher.hexdigest(),
+        "temp_storage_key": path,
+    }
+
+
+def discard_staging_file(session):
+    """Delete a session's staging file if it exists.
+
+    Returns:
+        True if a file was removed.
+    """
+    try:
+        os.remove(staging_path(session))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def move_staging_file(session, name):
+    """Move a fully received staging file into local storage by renaming it.
+
+    O(1), with no data copied, when the default storage is local and the
+    staging directory shares its filesystem with ``MEDIA_ROOT``.
+
+    Args:
+        session: An UploadSession instance whose parts are all staged.
+        name: Desired storage name (an available name is chosen).
+
+    Returns:
+        The storage name, or None if the file cannot be renamed into
+        storage (remote storage or a different filesystem); use
+        ``portal.services.assembly.assemble_segments()`` then.
+    """
+    storage = UploadFile._meta.get_field("file").storage
+    name = storage.get_available_name(name)
+    target = local_path(storage, name)
+    if target is None:
+        return None  # Remote storage (e.g. S3)
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(staging_path(session), target)
+    except FileExistsError:
+        return move_staging_file(session, name)  # Lost a race for the name
+    except OSError:
+        return None  # Cross-device
+    os.remove(staging_path(session))
+    if storage.file_permissions_mode is not None:
+        os.chmod(target, storage.file_permissions_mode)
+    return name
@@ -0,0 +1,150 @@
+"""Portal integrity services: a Merkle tree hash over upload session parts.
+
+The tree follows RFC 6962 (Certificate Transparency) Merkle Tree Hash
+rules over the ordered part digests, with domain-separated nodes:
+
+    leaf = SHA-256(0x00 || part_sha256)
+    node = SHA-256(0x01 || left || right)
+
+and a tree of n leaves split at the largest power of two below n. The
+root is deterministic for a given ordered list of parts, regardless of
+the order in which parts arrived. It can be built incrementally from a
+"frontier" of O(log n) perfect-subtree roots as consecutive parts are
+recorded, and any single part can be checked against the root with an
+O(log n) inclusion proof, without reading the rest of the file.
+"""
+
+import hashlib
+
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+
+def leaf_hash(part_sha256):
+    """Return the leaf node (hex) for a part's hex SHA-256."""
+    return hashlib.sha256(LEAF_PREFIX + bytes.fromhex(part_sha256)).hexdigest()
+
+
+def node_hash(left, right):
+    """Return the parent node (hex) of two hex child nodes."""
+    return hashlib.sha256(
+        NODE_PREFIX + bytes.fromhex(left) + bytes.fromhex(right)
+    ).hexdigest()
+
+
+def _split(n):
+    """Largest power of two strictly less than n (n >= 2)."""
+    k = 1
+    while k * 2 < n:
+        k *= 2
+    return k
+
+
+def _root_of_leaves(leaves):
+    if len(leaves) == 1:
+        return leaves[0]
+    k = _split(len(leaves))
+    return node_hash(_root_of_leaves(leaves[:k]), _root_of_leaves(leaves[k:]))
+
+
+def tree_root(part_sha256s):
+    """Compute the tree hash of an ordered list of part digests.
+
+    Args:
+        part_sha256s: Hex SHA-256 digests of the parts, in part order.
+
+    Returns:
+        Hex root hash, or "" for an empty list.
+    """
+    if not part_sha256s:
+        return ""
+    return _root_of_leaves([leaf_hash(d) for d in part_sha256s])
+
+
+def frontier_append(frontier, part_sha256):
+    """Fold the next part (in order) into a frontier, in place.
+
+    A frontier is a list of ``[size, hex]`` perfect-subtree roots with
+    strictly decreasing power-of-two sizes; it covers the first
+    ``frontier_size(frontier)`` parts.
+
+    Returns:
+        The same frontier list.
+    """
+    frontier.append([1, leaf_hash(part_sha256)])
+    while len(frontier) >= 2 and frontier[-1][0] == frontier[-2][0]:
+        size, right = frontier.pop()
+        _size, left = frontier.pop()
+        frontier.append([size * 2, node_hash(left, right)])
+    return frontier
+
+
+def frontier_size(frontier):
+    """Return how many parts a frontier covers."""
+    return sum(size for size, _node in frontier)
+
+
+def frontier_root(frontier):
+    """Return the tree hash of the parts covered by a frontier."""
+    if not frontier:
+        return ""
+    root = frontier[-1][1]
+    for _size, node in reversed(frontier[:-1]):
+        root = node_hash(node, root)
+    return root
+
+
+def inclusion_proof(part_sha256s, index):
+    """Return the audit path proving part ``index`` (0-based) is in the tree.
+
+    Args:
+        part_sha256s: Hex SHA-256 digests of all parts, in part order.
+        index: 0-based position of the part.
+
+    Returns:
+        List of hex sibling nodes, leaf level first.
+    """
+    leaves = [leaf_hash(d) for d in part_sha256s]
+
+    def path(m, nodes):
+        if len(nodes) == 1:
+            return []
+        k = _split(len(nodes))
+        if m < k:
+            return path(m, nodes[:k]) + [_root_of_leaves(nodes[k:])]
+        return path(m - k, nodes[k:]) + [_root_of_leaves(nodes[:k])]
+
+    return path(index, leaves)
+
+
+def verify_inclusion(part_sha256, index, total_parts, proof, root):
+    """Check that a part digest sits at ``index`` in a tree with ``root``.
+
+    Args:
+        part_sha256: Hex SHA-256 of the part's bytes.
+        index: 0-based position of the part.
+        total_parts: Number of parts in the tree.
+        proof: Audit path from ``inclusion_proof()``.
+        root: Expected hex tree hash.
+
+    Returns:
+        True if the proof is valid.
+    """
+    if not 0 <= index < total_parts:
+        return False
+    # RFC 9162 section 2.1.3.2 verification algorithm
+    fn, sn = index, total_parts - 1
+    node = leaf_hash(part_sha256)
+    for sibling in proof:
+        if sn == 0:
+            return False
+        if fn % 2 == 1 or fn == sn:
+            node = node_hash(sibling, node)
+            while fn % 2 == 0 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            node = node_hash(node, sibling)
+        fn >>= 1
+        sn >>= 1
+    return sn == 0 and node == root
@@ -0,0 +1,233 @@
+"""Portal multipart services: stream session parts straight to S3.
+
+When default storage is S3, each chunked upload session opens a native S3
+multipart upload and every part is sent as a multipart part, so S3
+assembles the final object server-side. There is no local staging copy
+and no second full upload at completion. The ETag S3 returns for each part
+is kept in ``UploadPart.temp_storage_key``.
+"""
+
+import hashlib
+import logging
+import math
+import tempfile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from storages.backends.s3 import S3Storage
+from storages.utils import clean_name, safe_join
+
+from portal.models import UploadFile
+from portal.services.chunks import WRITE_CHUNK_SIZE, part_range
+
+logger = logging.getLogger(__name__)
+
+# S3 limits: parts other than the last must be at least 5 MiB, no part
+# may exceed 5 GiB, at most 10,000 parts per upload.
+S3_MIN_PART_SIZE = 5_242_880
+S3_MAX_PART_SIZE = 5_368_709_120
+S3_MAX_PARTS = 10_000
+
+
+def _storage():
+    return UploadFile._meta.get_field("file").storage
+
+
+def multipart_enabled():
+    """Return True when default storage is S3 (django-storages)."""
+    return isinstance(_storage(), S3Storage)
+
+
+def _client_and_key(storage, name):
+    key = safe_join(storage.location, clean_name(name))
+    return storage.connection.meta.client, storage.bucket_name, key
+
+
+def validate_multipart_layout(total_size_bytes, chunk_size_bytes):
+    """Check a session's part layout against S3 multipart limits.
+
+    Raises:
+        ValidationError: If parts would be smaller than 5 MiB (code
+            ``chunk_too_small``), larger than 5 GiB (code
+            ``chunk_too_large``) or exceed 10,000 (code ``too_many_parts``).
+    """
+    if chunk_size_bytes < S3_MIN_PART_SIZE and chunk_size_bytes < total_size_bytes:
+        raise ValidationError(
+            f"Chunk size must be at least {S3_MIN_PART_SIZE} bytes.",
+            code="chunk_too_small",
+        )
+    if min(chunk_size_bytes, total_size_bytes) > S3_MAX_PART_SIZE:
+        raise ValidationError(
+            f"Chunk size must be at most {S3_MAX_PART_SIZE} bytes.",
+            code="chunk_too_large",
+        )
+    if math.ceil(total_size_bytes / chunk_size_bytes) > S3_MAX_PARTS:
+        raise ValidationError(
+            f"A session may have at most {S3_MAX_PARTS} parts.",
+            code="too_many_parts",
+        )
+
+
+def open_multipart_upload(session):
+    """Start an S3 multipart upload for a session's file.
+
+    Call it outside any transaction, after the session row has committed:
+    the S3 calls are not rolled back with the database. If recording the
+    upload id fails, the multipart upload is aborted before re-raising.
+
+    Args:
+        session: An UploadSession instance (with ``file`` loaded).
+
+    Returns:
+        The updated UploadSession, with ``multipart_upload_id`` set.
+    """
+    storage = _storage()
+    upload = session.file
+    name = storage.get_available_name(upload.file.name)
+    client, bucket, key = _client_and_key(storage, name)
+
+    response = client.create_multipart_upload(
+        Bucket=bucket, Key=key, ContentType=upload.content_type
+    )
+    session.multipart_upload_id = response["UploadId"]
+    renamed = name != upload.file.name
+    upload.file.name = name
+    try:
+        with transaction.atomic():
+            session.save(update_fields=["multipart_upload_id", "updated_at"])
+            if renamed:
+                upload.save(update_fields=["file", "updated_at"])
+    except BaseException:
+        abort_multipart_upload(session)
+        raise
+
+    logger.info("S3 multipart upload opened: session=%s key=%s", session.pk, key)
+    return session
+
+
+def upload_multipart_part(session, part_number, stream):
+    """Send one part's bytes to S3 as a multipart part.
+
+    The body is hashed while it is read into a spooled buffer (in memory
+    up to ``FILE_UPLOAD_MAX_MEMORY_SIZE``), so S3 receives a sized,
+    rewindable body it can retry. Does not touch the database.
+
+    Args:
+        session: An UploadSession with an open multipart upload.
+        part_number: 1-indexed chunk ordinal (the S3 part number).
+        stream: File-like object yielding the part's raw bytes.
+
+    Returns:
+        dict shaped like ``stage_upload_part()``'s, with the part's ETag
+        in ``temp_storage_key``.
+
+    Raises:
+        ValidationError: If the part number is out of range or the body
+            length does not match the part's expected size.
+    """
+    offset, expected_size = part_range(session, part_number)
+    hasher = hashlib.sha256()
+    received = 0
+
+    with tempfile.SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+        dir=settings.FILE_UPLOAD_TEMP_DIR,
+    ) as body:
+        while received <= expected_size:
+            chunk = stream.read(WRITE_CHUNK_SIZE)
+            if not chunk:
+                break
+            hasher.update(chunk)
+            body.write(chunk)
+            received += len(chunk)
+
+        if received != expected_size:
+            raise ValidationError(
+                f"Part {part_number} must be {expected_size} bytes.",
+                code="invalid_part_size",
+            )
+
+        body.seek(0)
+        storage = _storage()
+        client, bucket, key = _client_and_key(storage, session.file.file.name)
+        response = client.upload_part(
+            Bucket=bucket,
+            Key=key,
+            UploadId=session.multipart_upload_id,
+            PartNumber=part_number,
+            Body=body,
+            ContentLength=received,
+        )
+
+    logger.info(
+        "S3 multipart part uploaded: session=%s part=%d size=%d",
+        session.pk,
+        part_number,
+        received,
+    )
+    return {
+        "part_number": part_number,
+        "offset_bytes": offset,
+        "size_bytes": received,
+        "sha256": hasher.hexdigest(),
+        "temp_storage_key": response["ETag"],
+    }
+
+
+def complete_multipart_upload(session):
+    """Ask S3 to assemble the session's parts into the final object.
+
+    Args:
+        session: An UploadSession whose parts were all uploaded with
+            ``upload_multipart_part()``.
+
+    Returns:
+        The storage name of the assembled object.
+    """
+    storage = _storage()
+    name = session.file.file.name
+    client, bucket, key = _client_and_key(storage, name)
+    parts = [
+        {"PartNumber": number, "ETag": etag}
+        for number, etag in session.parts.order_by("part_number").values_list(
+            "part_number", "temp_storage_key"
+        )
+    ]
+    client.complete_multipart_upload(
+        Bucket=bucket,
+        Key=key,
+        UploadId=session.multipart_upload_id,
+        MultipartUpload={"Parts": parts},
+    )
+    logger.info(
+        "S3 multipart upload completed: session=%s key=%s parts=%d",
+        session.pk,
+        key,
+        len(parts),
+    )
+    return name
+
+
+def abort_multipart_upload(session):
+    """Abort a session's multipart upload so S3 discards its parts."""
+    storage = _storage()
+    client, bucket, key = _client_and_key(storage, session.file.file.name)
+    client.abort_multipart_upload(
+        Bucket=bucket, Key=key, UploadId=session.multipart_upload_id
+    )
+    logger.info("S3 multipart upload aborted: session=%s", session.pk)
+
+
+def hash_stored_object(name):
+    """Compute the SHA-256 of a stored object by streaming it back.
+
+    Used only when a client asks for whole-file verification of a
+    multipart session, since S3 cannot report a whole-object SHA-256 for
+    multipart uploads.
+    """
+    hasher = hashlib.sha256()
+    with _storage().open(name, "rb") as fh:
+        for chunk in fh.chunks(chunk_size=WRITE_CHUNK_SIZE):
+            hasher.update(chunk)
+    return hasher.hexdigest()
@@ -2,13 +2,48 @@
 
 import logging
 import math
+import os
+from datetime import timedelta
+from types import SimpleNamespace
 
-from django.db import models, transaction
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, models, transaction
+from django.utils import timezone
 
 from portal.models import UploadFile, UploadPart, UploadSession
+from portal.services.assembly import assemble_segments
+from portal.services.bitmap import empty_bitmap, set_part
+from portal.services.chunks import (
+    discard_staging_file,
+    move_staging_file,
+    part_range,
+    staging_path,
+)
+from portal.services.integrity import (
+    frontier_append,
+    frontier_root,
+    frontier_size,
+    inclusion_proof,
+)
+from portal.services.multipart import (
+    complete_multipart_upload,
+    hash_stored_object,
+    multipart_enabled,
+    open_multipart_upload,
+    validate_multipart_layout,
+)
+from portal.services.uploads import adjust_batch_counters, validate_file
 
 logger = logging.getLogger(__name__)
 
+# A PENDING part older than this is a claim abandoned by a request that
+# died mid-write, and may be claimed again.
+PART_CLAIM_TIMEOUT = timedelta(minutes=10)
+# A session COMPLETING for longer than this was left behind by a request
+# that died while placing the file; the next complete takes it over.
+COMPLETION_TIMEOUT = timedelta(minutes=30)
+
 
 def create_upload_session(upload_file, total_size_bytes, chunk_size_bytes=None):
     """Create an upload session for chunked file upload.
@@ -31,6 +66,7 @@ def create_upload_session(upload_file, total_size_bytes, chunk_size_bytes=None):
         total_size_bytes=total_size_bytes,
         chunk_size_bytes=chunk_size_bytes,
         total_parts=total_parts,
+        received_parts=empty_bitmap(total_parts),
     )
     logger.info(
         "Upload session created: pk=%s file=%s parts=%d",
@@ -41,34 +77,172 @@ def create_upload_session(upload_file, total_size_bytes, chunk_size_bytes=None):
     return session
 
 
-def record_upload_part(session, part_number, offset_bytes, size_bytes, sha256=""):
+def start_upload_session(user, filename, total_size_bytes, chunk_size_bytes=None):
+    """Create an UPLOADING file record and its chunked upload session.
+
+    The file is validated by name and declared size only; its bytes
+    arrive later as parts (see ``portal/services/chunks.py``). When
+    default storage is S3, an S3 multipart upload is opened and parts
+    stream straight to it (see ``portal/services/multipart.py``). The
+    records are created in one transaction and the multipart upload is
+    opened only after it commits, so a rollback never leaves an orphaned
+    upload in S3; if opening fails, the session and file are marked
+    FAILED and the error is re-raised.
+
+    Args:
+        user: The User instance starting the upload (or None).
+        filename: Original filename of the file.
+        total_size_bytes: Total file size in bytes.
+        chunk_size_bytes: Target chunk size in bytes. Defaults to 5 MB.
+
+    Returns:
+        An UploadSession instance (with ``file`` set).
+
+    Raises:
+        ValidationError: If the size exceeds
+            ``settings.FILE_UPLOAD_SESSION_MAX_SIZE``, the type is not
+            allowed, the sizes are not positive, or (S3) the part layout
+            breaks multipart limits.
+    """
+    if total_size_bytes <= 0 or (
+        chunk_size_bytes is not None and chunk_size_bytes <= 0
+    ):
+        raise ValidationError("Sizes must be positive.", code="invalid_size")
+    content_type, size_bytes = validate_file(
+        SimpleNamespace(name=filename, size=total_size_bytes),
+        max_size=settings.FILE_UPLOAD_SESSION_MAX_SIZE,
+    )
+
+    use_multipart = multipart_enabled()
+    if use_multipart:
+        validate_multipart_layout(total_size_bytes, chunk_size_bytes or 5_242_880)
+
+    field = UploadFile._meta.get_field("file")
+    with transaction.atomic():
+        upload_file = UploadFile.objects.create(
+            uploaded_by=user,
+            file=field.generate_filename(None, filename),
+            original_filename=filename,
+            content_type=content_type,
+            size_bytes=size_bytes,
+            status=UploadFile.Status.UPLOADING,
+        )
+        session = create_upload_session(upload_file, total_size_bytes, chunk_size_bytes)
+
+    if use_multipart:
+        try:
+            open_multipart_upload(session)
+        except Exception as exc:
+            with transaction.atomic():
+                UploadSession.objects.filter(pk=session.pk).update(
+                    status=UploadSession.Status.FAILED
+                )
+                UploadFile.objects.filter(pk=upload_file.pk).update(
+                    status=UploadFile.Status.FAILED,
+                    error_message=f"Could not open multipart upload: {exc}",
+                )
+            raise
+    return session
+
+
+def _fold_tree(session, part_number):
+    """Fold newly consecutive parts into a locked session's Merkle frontier.
+
+    Only the leading run of consecutive parts can be folded, so a part
+    arriving out of order is folded later, by the call that closes the
+    gap.
+
+    Returns:
+        The new frontier, or None if it did not change.
+    """
+    frontier = session.tree_frontier
+    expected = frontier_size(frontier) + 1
+    if part_number != expected:
+        return None
+
+    following = (
+        UploadPart.objects.filter(session_id=session.pk, part_number__gte=expected)
+        .order_by("part_number")
+        .values_list("part_number", "sha256")
+    )
+    for number, sha256 in following.iterator():
+        if number != expected or not sha256:
+            break
+        frontier_append(frontier, sha256)
+        expected += 1
+    return frontier
+
+
+def _advance_session(session_id, parts):
+    """Apply newly inserted parts to the session row in one UPDATE.
+
+    Locks the session, sets each part's bit in ``received_parts`` and
+    moves the counters only for bits that were newly set, and folds the
+    Merkle frontier. Must run inside the transaction that inserted parts.
+    """
+    locked = (
+        UploadSession.objects.select_for_update()
+        .only("pk", "received_parts", "tree_frontier")
+        .get(pk=session_id)
+    )
+    bitmap = locked.received_parts
+    newly_received = 0
+    new_bytes = 0
+    for part in parts:
+        bitmap, newly_set = set_part(bitmap, part.part_number)
+        if newly_set:
+            newly_received += 1
+            new_bytes += part.size_bytes
+
+    updates = {"status": UploadSession.Status.IN_PROGRESS}
+    if newly_received:
+        updates["received_parts"] = bitmap
+        updates["completed_parts"] = models.F("completed_parts") + newly_received
+        updates["bytes_received"] = models.F("bytes_received") + new_bytes
+    next_part = frontier_size(locked.tree_frontier) + 1
+    if any(p.part_number == next_part and p.sha256 for p in parts):
+        frontier = _fold_tree(locked, next_part)
+        if frontier is not None:
+            updates["tree_frontier"] = frontier
+
+    # One statement for progress counters, bitmap and tree frontier
+    UploadSession.objects.filter(pk=session_id).update(**updates)
+
+
+def record_upload_part(
+    session, part_number, offset_bytes, size_bytes, sha256="", temp_storage_key=""
+):
     """Record a received chunk within an upload session.
 
+    The session row is locked while the part's bit is set in
+    ``received_parts``; counters only move when the bit was newly set,
+    so retries never inflate them. When the part carries a SHA-256 it
+    also advances the session's incremental Merkle tree hash (see
+    ``portal/services/integrity.py``).
+
     Args:
         session: An UploadSession instance.
         part_number: 1-indexed chunk ordinal.
         offset_bytes: Byte offset of this part in the file.
         size_bytes: Size of this part in bytes.
         sha256: Optional SHA-256 hash of the chunk.
+        temp_storage_key: Where the part's bytes are staged.
 
     Returns:
         An UploadPart instance with status RECEIVED.
     """
-    part = UploadPart.objects.create(
-        session=session,
-        part_number=part_number,
-        offset_bytes=offset_bytes,
-        size_bytes=size_bytes,
-        sha256=sha256,
-        status=UploadPart.Status.RECEIVED,
-    )
+    with transaction.atomic():
+        part = UploadPart.objects.create(
+            session=session,
+            part_number=part_number,
+            offset_bytes=offset_bytes,
+            size_bytes=size_bytes,
+            sha256=sha256,
+            status=UploadPart.Status.RECEIVED,
+            temp_storage_key=temp_storage_key,
+        )
 
-    # Update session progress counters
-    UploadSession.objects.filter(pk=session.pk).update(
-        completed_parts=models.F("completed_parts") + 1,
-        bytes_received=models.F("bytes_received") + size_bytes,
-        status=UploadSession.Status.IN_PROGRESS,
-    )
+        _advance_session(session.pk, [part])
 
     logger.info(
         "Upload part recorded: session=%s part=%d size=%d",
@@ -79,41 +253,509 @@ def record_upload_part(session, part_number, offset_bytes, size_bytes, sha256=""
     return part
 
 
-@transaction.atomic
-def complete_upload_session(session):
+def session_tree_sha256(session):
+    """Return the Merkle tree hash over all of a session's parts.
+
+    Starts from the incrementally folded frontier, so only parts that
+    arrived out of order are hashed here: O(parts), never O(bytes).
+
+    Args:
+        session: An UploadSession instance with every part received.
+
+    Returns:
+        Hex tree hash, or "" if any part was recorded without a SHA-256.
+    """
+    frontier = list(session.tree_frontier)
+    remaining = session.parts.filter(
+        part_number__gt=frontier_size(frontier)
+    ).values_list("sha256", flat=True)
+    for sha256 in remaining.order_by("part_number").iterator():
+        if not sha256:
+            return ""
+        frontier_append(frontier, sha256)
+    if frontier_size(frontier) != session.total_parts:
+        return ""
+    return frontier_root(frontier)
+
+
+def upload_part_proof(session, part_number):
+    """Build an inclusion proof that one part belongs to a completed file.
+
+    A consumer can fetch just the part's byte range, hash it, and check
+    it against ``tree_sha256`` with
+    ``portal.services.integrity.verify_inclusion()``.
+
+    Args:
+        session: A completed UploadSession instance.
+        part_number: 1-indexed chunk ordinal.
+
+    Returns:
+        dict: {"part_number": int, "offset_bytes": int, "size_bytes": int,
+        "sha256": str, "total_parts": int, "tree_sha256": str,
+        "proof": list[str]}
+
+    Raises:
+        ValidationError: If the part number is out of range.
+        ValueError: If the session has no tree hash yet.
+    """
+    offset, size = part_range(session, part_number)
+    if not session.tree_sha256:
+        raise ValueError(f"Session {session.pk} has no tree hash.")
+    digests = list(
+        session.parts.order_by("part_number").values_list("sha256", flat=True)
+    )
+    return {
+        "part_number": part_number,
+        "offset_bytes": offset,
+        "size_bytes": size,
+        "sha256": digests[part_number - 1],
+        "total_parts": session.total_parts,
+        "tree_sha256": session.tree_sha256,
+        "proof": inclusion_proof(digests, part_number - 1),
+    }
+
+
+def _check_open(session, status=None):
+    status = status or session.status
+    if status not in (UploadSession.Status.INIT, UploadSession.Status.IN_PROGRESS):
+        raise ValidationError(
+            f"Session {session.pk} is {status}.", code="session_closed"
+        )
+
+
+def _part_in_progress(number):
+    return ValidationError(
+        f"Part {number} is being uploaded by another request.",
+        code="part_in_progress",
+    )
+
+
+def claim_upload_parts(session, part_numbers):
+    """Claim parts for writing by inserting PENDING UploadPart rows.
+
+    The ``(session, part_number)`` unique constraint makes the insert the
+    claim: only the request that claims a part may write its bytes, so
+    two concurrent uploads of one part can never overwrite each other in
+    the staging file (or replace each other's S3 part). Parts already
+    received are returned for comparison instead. A PENDING part older
+    than ``PART_CLAIM_TIMEOUT`` is claimed again.
+
+    Args:
+        session: An UploadSession instance.
+        part_numbers: Iterable of 1-indexed chunk ordinals.
+
+    Returns:
+        dict: {"claimed": {part_number: UploadPart},
+        "received": {part_number: UploadPart}}. Claimed parts must be
+        recorded (``accept_upload_part(claim=...)``,
+        ``record_upload_parts(claims=...)``) or released
+        (``release_upload_parts()``).
+
+    Raises:
+        ValidationError: If the session is closed (code
+            ``session_closed``), a part number is out of range, or another
+            request holds a live claim on one of the parts (code
+            ``part_in_progress``; nothing is claimed then).
+    """
+    _check_open(session)
+    numbers = list(dict.fromkeys(part_numbers))
+    candidates = []
+    for number in numbers:
+        offset, size = part_range(session, number)
+        candidates.append(
+            UploadPart(
+                session=session,
+                part_number=number,
+                offset_bytes=offset,
+                size_bytes=size,
+                status=UploadPart.Status.PENDING,
+            )
+        )
+
+    claimed = {}
+    received = {}
+    with transaction.atomic():
+        UploadPart.objects.bulk_create(candidates, ignore_conflicts=True)
+        inserted = set(
+            UploadPart.objects.filter(
+                pk__in=[part.pk for part in candidates]
+            ).values_list("pk", flat=True)
+        )
+        claimed = {part.part_number: part for part in candidates if part.pk in inserted}
+
+        now = timezone.now()
+        others = session.parts.filter(part_number__in=numbers).exclude(pk__in=inserted)
+        for part in others:
+            if part.status == UploadPart.Status.RECEIVED:
+                received[part.part_number] = part
+                continue
+            taken = UploadPart.objects.filter(
+                pk=part.pk,
+                status=UploadPart.Status.PENDING,
+                updated_at=part.updated_at,
+                updated_at__lt=now - PART_CLAIM_TIMEOUT,
+            ).update(updated_at=now)
+            if not taken:
+                raise _part_in_progress(part.part_number)  # Rolls back our claims
+            logger.warning(
+                "Stale part claim taken over: session=%s part=%d",
+                session.pk,
+                part.part_number,
+            )
+            part.updated_at = now
+            claimed[part.part_number] = part
+    return {"claimed": claimed, "received": received}
+
+
+def release_upload_parts(claimed):
+    """Delete PENDING parts claimed by ``claim_upload_parts()``.
+
+    Call when writing claimed parts failed, so they can be sent again.
+    A claim that was since taken over by another request is left alone.
+
+    Args:
+        claimed: Iterable of claimed UploadPart instances.
+
+    Returns:
+        Number of claims released.
+    """
+    tokens = {part.pk: part.updated_at for part in claimed}
+    if not tokens:
+        return 0
+    current = UploadPart.objects.filter(
+        pk__in=tokens, status=UploadPart.Status.PENDING
+    ).values_list("pk", "updated_at")
+    pks = [pk for pk, updated_at in current if tokens[pk] == updated_at]
+    deleted, _ = UploadPart.objects.filter(
+        pk__in=pks, status=UploadPart.Status.PENDING
+    ).delete()
+    return deleted
+
+
+def accept_upload_part(session, staged, claim=None):
+    """Record a part staged by ``stage_upload_part()``, tolerating retries.
+
+    A part number that was already received with the same SHA-256 is an
+    idempotent retry and is returned unchanged.
+
+    Args:
+        session: An UploadSession instance.
+        staged: A dict returned by ``stage_upload_part()``.
+        claim: The part's UploadPart from ``claim_upload_parts()``, if
+            it was claimed before being written.
+
+    Returns:
+        A tuple of (UploadPart, created).
+
+    Raises:
+        ValidationError: If the session is no longer accepting parts
+            (code ``session_closed``), the part was already received
+            with different content (code ``part_conflict``), or another
+            request holds its claim (code ``part_in_progress``).
+    """
+    _check_open(session)
+    claims = {staged["part_number"]: claim} if claim is not None else None
+    [(part, created)] = record_upload_parts(session, [staged], claims=claims)
+    return part, created
+
+
+def _record_parts(session, staged_parts, claims):
+    """Insert (or fill in claimed) manifest parts under the session row lock."""
+    locked = (
+        UploadSession.objects.select_for_update()
+        .only("pk", "status")
+        .get(pk=session.pk)
+    )
+    _check_open(session, locked.status)
+
+    numbers = [staged["part_number"] for staged in staged_parts]
+    existing = {
+        part.part_number: part for part in session.parts.filter(part_number__in=numbers)
+    }
+    results = {}
+    new_parts = []
+    filled = []
+    now = timezone.now()
+    for staged in staged_parts:
+        number = staged["part_number"]
+        claim = claims.get(number)
+        if number not in results and claim is not None:
+            held = existing.get(number)
+            if (
+                held is None
+                or held.status != UploadPart.Status.PENDING
+                or held.updated_at != claim.updated_at
+            ):
+                raise _part_in_progress(number)  # Claim expired and taken over
+            claim.sha256 = staged["sha256"]
+            claim.temp_storage_key = staged["temp_storage_key"]
+            claim.status = UploadPart.Status.RECEIVED
+            claim.updated_at = now
+            filled.append(claim)
+            results[number] = (claim, True)
+            continue
+
+        known = results[number][0] if number in results else existing.get(number)
+        if known is not None:
+            if known.status == UploadPart.Status.PENDING:
+                raise _part_in_progress(number)
+            if known.sha256 != staged["sha256"]:
+                raise ValidationError(
+                    f"Part {number} was already received with different content.",
+                    code="part_conflict",
+                )
+            results.setdefault(number, (known, False))
+            continue
+        part = UploadPart(
+            session=session,
+            part_number=number,
+            offset_bytes=staged["offset_bytes"],
+            size_bytes=staged["size_bytes"],
+            sha256=staged["sha256"],
+            status=UploadPart.Status.RECEIVED,
+            temp_storage_key=staged["temp_storage_key"],
+        )
+        new_parts.append(part)
+        results[number] = (part, True)
+
+    if new_parts:
+        UploadPart.objects.bulk_create(new_parts)
+    if filled:
+        UploadPart.objects.bulk_update(
+            filled, ["sha256", "temp_storage_key", "status", "updated_at"]
+        )
+    if new_parts or filled:
+        _advance_session(session.pk, new_parts + filled)
+    return [results[number] for number in dict.fromkeys(numbers)]
+
+
+def record_upload_parts(session, staged_parts, claims=None):
+    """Record many staged parts with one INSERT and one session UPDATE.
+
+    Parts already received with the same SHA-256 (including duplicates
+    within the manifest) are idempotent retries; the whole manifest is
+    rejected if any part conflicts. Parts claimed with
+    ``claim_upload_parts()`` are filled in (one bulk UPDATE) instead of
+    inserted.
+
+    Args:
+        session: An UploadSession instance.
+        staged_parts: Dicts returned by ``stage_upload_part()`` or
+            ``upload_multipart_part()``.
+        claims: Optional ``{part_number: UploadPart}`` of claimed parts.
+
+    Returns:
+        List of (UploadPart, created) tuples, one per distinct part
+        number, in manifest order.
+
+    Raises:
+        ValidationError: If the session is no longer accepting parts
+            (code ``session_closed``), a part was already received
+            with different content (code ``part_conflict``), or another
+            request holds a part's claim (code ``part_in_progress``).
+    """
+    claims = claims or {}
+    try:
+        with transaction.atomic():
+            results = _record_parts(session, staged_parts, claims)
+    except IntegrityError:
+        # A concurrent request recorded one of these parts first; re-check
+        with transaction.atomic():
+            results = _record_parts(session, staged_parts, claims)
+
+    logger.info(
+        "Upload parts recorded: session=%s parts=%d new=%d",
+        session.pk,
+        len(results),
+        sum(1 for _part, created in results if created),
+    )
+    return results
+
+
+def _place_staged_file(session, expected_sha256):
+    """Put a session's staged bytes into storage; return the file updates."""
+    name = session.file.file.name
+    if not expected_sha256:
+        # Parts written at their offsets already form the whole file
+        moved = move_staging_file(session, name)
+        if moved is not None:
+            logger.info("Staged file moved into storage: session=%s", session.pk)
+            return {"file": moved}
+
+    segments = session.parts.filter(status=UploadPart.Status.RECEIVED).values_list(
+        "temp_storage_key", "offset_bytes", "size_bytes"
+    )
+    result = assemble_segments(segments, name, expected_sha256=expected_sha256)
+    discard_staging_file(session)
+    updates = {"file": result["name"]}
+    if result["sha256"]:
+        updates["sha256"] = result["sha256"]
+    return updates
+
+
+def _verify_multipart_object(name, expected_sha256):
+    """Re-read a completed multipart object; delete it on mismatch.
+
+    Returns:
+        The mismatch error message, or None when the object verifies.
+    """
+    sha256 = hash_stored_object(name)
+    if sha256 == expected_sha256.lower():
+        return None
+    UploadFile._meta.get_field("file").storage.delete(name)
+    return f"Assembled file SHA-256 {sha256} does not match {expected_sha256}."
+
+
+def complete_upload_session(session, expected_sha256=None, expected_tree_sha256=None):
     """Complete an upload session after all parts are received.
 
-    Validates that all expected parts have been received, then
-    transitions the session to COMPLETE.
+    Runs in three steps so no transaction or row lock is held while the
+    file is placed:
+
+    1. A short locked transaction re-checks the status and the
+       ``completed_parts`` counter (kept exact by the ``received_parts``
+       bitmap, so no UploadPart scan), finishes the session's Merkle
+       tree hash and moves the session to COMPLETING. Part uploads are
+       refused from then on.
+    2. With no transaction open, the staged part data is placed in
+       storage (see ``portal/services/chunks.py``) or the S3 multipart
+       upload is completed, and verified when asked to.
+    3. A second short transaction marks the session COMPLETE (or
+       FAILED) and the file STORED (or FAILED), with the batch counters.
+
+    A COMPLETE session is returned unchanged, so retries are idempotent.
+    A session COMPLETING for longer than ``COMPLETION_TIMEOUT`` was
+    abandoned mid-placement and is taken over: placement steps that
+    already happened (the staging file moved, the S3 object assembled)
+    are skipped. If placement raises, the session goes back to
+    IN_PROGRESS so the client can retry.
 
     Args:
         session: An UploadSession instance.
+        expected_sha256: Optional whole-file SHA-256. When given, staged
+            data is assembled with a streaming copy that verifies it in
+            the same pass, and the digest is stored on the UploadFile.
+            For S3 multipart sessions the completed object is read back
+            to verify it; a mismatch deletes it and fails the session.
+        expected_tree_sha256: Optional Merkle tree hash computed by the
+            client from its own part digests. Checked in O(parts) against
+            the server-side part hashes before anything is placed.
 
     Returns:
         The updated UploadSession instance.
 
     Raises:
         ValueError: If not all parts have been received.
+        ValidationError: If another request is completing the session
+            (code ``session_completing``), the session is FAILED or
+            ABORTED (code ``session_closed``), the assembled file does
+            not match ``expected_sha256`` (code ``checksum_mismatch``)
+            or the part hashes do not match ``expected_tree_sha256``
+            (code ``tree_hash_mismatch``).
     """
-    session.refresh_from_db()
-    received_count = session.parts.filter(
-        status=UploadPart.Status.RECEIVED,
-    ).count()
+    with transaction.atomic():
+        session.refresh_from_db(from_queryset=UploadSession.objects.select_for_update())
+        if session.status == UploadSession.Status.COMPLETE:
+            return session  # Already completed by an earlier call
+        resuming = session.status == UploadSession.Status.COMPLETING
+        if resuming and session.updated_at > timezone.now() - COMPLETION_TIMEOUT:
+            raise ValidationError(
+                f"Session {session.pk} is being completed by another request.",
+                code="session_completing",
+            )
+        if not resuming:
+            _check_open(session)
+        tree_sha256 = _check_completable(session, expected_tree_sha256)
+        session.status = UploadSession.Status.COMPLETING
+        session.tree_sha256 = tree_sha256
+        session.save(update_fields=["status", "tree_sha256", "updated_at"])
+    token = session.updated_at
 
-    if received_count < session.total_parts:
+    try:
+        file_updates, error = _place_session_file(session, expected_sha256, resuming)
+    except BaseException:
+        UploadSession.objects.filter(
+            pk=session.pk, status=UploadSession.Status.COMPLETING, updated_at=token
+        ).update(status=UploadSession.Status.IN_PROGRESS, updated_at=timezone.now())
+        raise
+
+    file_updates["tree_sha256"] = session.tree_sha256
+    _finish_session(session, token, file_updates, error)
+    if error:
+        raise ValidationError(error, code="checksum_mismatch")
+    logger.info("Upload session completed: pk=%s", session.pk)
+    return session
+
+
+def _check_completable(session, expected_tree_sha256):
+    """Check a locked session's parts and tree hash; return the tree hash."""
+    if session.completed_parts < session.total_parts:
         raise ValueError(
             f"Cannot complete session {session.pk}: "
-            f"received {received_count} of {session.total_parts} parts."
+            f"received {session.completed_parts} of {session.total_parts} parts."
+        )
+
+    tree_sha256 = session_tree_sha256(session)
+    if expected_tree_sha256 and tree_sha256 != expected_tree_sha256.lower():
+        raise ValidationError(
+            f"Part tree hash {tree_sha256 or '(unavailable)'} does not match "
+            f"{expected_tree_sha256}.",
+            code="tree_hash_mismatch",
         )
+    return tree_sha256
 
-    session.status = UploadSession.Status.COMPLETE
-    session.save(update_fields=["status", "updated_at"])
 
-    # Transition the associated file to STORED
-    UploadFile.objects.filter(
-        pk=session.file_id,
-        status=UploadFile.Status.UPLOADING,
-    ).update(status=UploadFile.Status.STORED)
+def _place_session_file(session, expected_sha256, resuming):
+    """Place a COMPLETING session's file in storage, outside any transaction.
 
-    logger.info("Upload session completed: pk=%s", session.pk)
-    return session
+    Returns:
+        A tuple of (UploadFile field updates, multipart checksum mismatch
+        error or None).
+    """
+    file_updates = {}
+    if session.multipart_upload_id:
+        name = session.file.file.name
+        storage = UploadFile._meta.get_field("file").storage
+        if not (resuming and storage.exists(name)):
+            name = complete_multipart_upload(session)
+        file_updates["file"] = name
+        if expected_sha256:
+            error = _verify_multipart_object(name, expected_sha256)
+            if error:
+                return file_updates, error
+            file_updates["sha256"] = expected_sha256.lower()
+    elif os.path.exists(staging_path(session)):
+        file_updates.update(_place_staged_file(session, expected_sha256))
+    return file_updates, None
+
+
+def _finish_session(session, token, file_updates, error):
+    """Mark a COMPLETING session COMPLETE (or FAILED on ``error``)."""
+    if error:
+        session_status = UploadSession.Status.FAILED
+        file_updates = {"status": UploadFile.Status.FAILED, "error_message": error}
+        counters = {"failed": 1}
+    else:
+        session_status = UploadSession.Status.COMPLETE
+        file_updates = {**file_updates, "status": UploadFile.Status.STORED}
+        counters = {"stored": 1}
+
+    with transaction.atomic():
+        now = timezone.now()
+        finished = UploadSession.objects.filter(
+            pk=session.pk, status=UploadSession.Status.COMPLETING, updated_at=token
+        ).update(status=session_status, updated_at=now)
+        if not finished:
+            # Taken over after COMPLETION_TIMEOUT; that request finishes it
+            logger.warning("Upload session completion lost: pk=%s", session.pk)
+            session.refresh_from_db()
+            return
+        session.status = session_status
+        session.updated_at = now
+
+        updated = UploadFile.objects.filter(
+            pk=session.file_id,
+            status=UploadFile.Status.UPLOADING,
+        ).update(**file_updates)
+        if updated:
+            adjust_batch_counters(session.file.batch_id, **counters)
@@ -3,15 +3,21 @@
 import hashlib
 import logging
 import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import timedelta
 
-from common.services.outbox import emit_event
+from common.services.outbox import emit_event, emit_events
+from common.services.sweep import run_sweep
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import IntegrityError, transaction
+from django.db import IntegrityError, models, transaction
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
 from portal.models import UploadBatch, UploadFile
+from portal.services.blobs import acquire_blob, store_blob_content
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +25,10 @@ logger = logging.getLogger(__name__)
 def validate_file(file, max_size=None):
     """Validate an uploaded file's size and MIME type.
 
+    Size comes from ``file.size`` and never requires reading the file.
+    The MIME type is guessed from the extension; when that fails, the
+    type sniffed by the hashing upload handlers is used if available.
+
     Args:
         file: A Django UploadedFile instance.
         max_size: Maximum file size in bytes. Defaults to
@@ -42,7 +52,9 @@ def validate_file(file, max_size=None):
 
     content_type, _ = mimetypes.guess_type(file.name)
     if content_type is None:
-        content_type = "application/octet-stream"
+        content_type = (
+            getattr(file, "sniffed_content_type", None) or "application/octet-stream"
+        )
 
     allowed_types = settings.FILE_UPLOAD_ALLOWED_TYPES
     if allowed_types is not None and content_type not in allowed_types:
@@ -58,8 +70,11 @@ def validate_file(file, max_size=None):
 def compute_sha256(file):
     """Compute SHA-256 hash of a file.
 
-    Reads the file in 64 KB chunks. Seeks back to the start after hashing
-    so the file can be saved by Django's FileField afterward.
+    Files received through ``portal.upload_handlers`` already carry a
+    ``sha256`` computed while the request streamed in; that digest is
+    returned without touching the file. Otherwise reads the file in
+    64 KB chunks and seeks back to the start after hashing so the file
+    can be saved by Django's FileField afterward.
 
     Args:
         file: A Django UploadedFile instance.
@@ -67,6 +82,10 @@ def compute_sha256(file):
     Returns:
         Hex-encoded SHA-256 hash string (64 characters).
     """
+    precomputed = getattr(file, "sha256", None)
+    if precomputed:
+        return precomputed
+
     hasher = hashlib.sha256()
     file.seek(0)
     for chunk in file.chunks(chunk_size=65_536):
@@ -75,79 +94,360 @@ def compute_sha256(file):
     return hasher.hexdigest()
 
 
-def create_upload_file(user, file, batch=None):
-    """Validate, hash, and store an upload file.
+def _store_content(file):
+    """Save file content under the FileField's upload_to path.
+
+    Mirrors what ``FieldFile.save()`` does on model save, so the content
+    can be written before (and outside of) the database transaction.
+
+    Returns:
+        The storage name the content was saved under.
+    """
+    field = UploadFile._meta.get_field("file")
+    name = field.generate_filename(None, file.name)
+    file.seek(0)
+    return field.storage.save(name, file, max_length=field.max_length)
+
+
+def prepare_upload_file(file):
+    """Validate, hash, and store the content of an upload file.
+
+    This is the I/O-heavy half of ``create_upload_file()``. It does not
+    touch the database, so several files can be prepared concurrently
+    on worker threads (see ``prepare_upload_files()``).
 
     Args:
-        user: The User instance who uploaded the file (or None).
         file: A Django UploadedFile instance.
-        batch: Optional UploadBatch to associate with.
 
     Returns:
-        An UploadFile instance with status STORED (success) or FAILED
-        (validation error).
+        dict: {"name": str, "content_type": str, "size_bytes": int,
+        "sha256": str, "storage_key": str, "error": str, "file": File}.
+        ``error`` is non-empty when validation failed; ``file`` is kept
+        so ``acquire_blob()`` can restore purged blob content.
     """
     try:
         content_type, size_bytes = validate_file(file)
     except ValidationError as exc:
-        upload = UploadFile.objects.create(
+        return {
+            "name": file.name,
+            "content_type": "unknown",
+            "size_bytes": file.size,
+            "sha256": "",
+            "storage_key": _store_content(file),
+            "error": str(exc.message),
+            "file": file,
+        }
+
+    sha256 = compute_sha256(file)
+    if settings.FILE_UPLOAD_DEDUPLICATE:
+        storage_key = store_blob_content(file, sha256)
+    else:
+        storage_key = _store_content(file)
+
+    return {
+        "name": file.name,
+        "content_type": content_type,
+        "size_bytes": size_bytes,
+        "sha256": sha256,
+        "storage_key": storage_key,
+        "error": "",
+        "file": file,
+    }
+
+
+def prepare_upload_files(files, max_workers=None):
+    """Prepare several upload files, overlapping their hashing and storage I/O.
+
+    Hashing (hashlib releases the GIL) and storage writes (disk or S3
+    network I/O) run on a bounded thread pool. Results are returned in
+    the same order as ``files``.
+
+    Args:
+        files: Iterable of Django UploadedFile instances.
+        max_workers: Thread pool size. Defaults to
+            ``settings.FILE_UPLOAD_WORKERS``; 1 disables the pool.
+
+    Returns:
+        List of dicts as returned by ``prepare_upload_file()``.
+    """
+    files = list(files)
+    if max_workers is None:
+        max_workers = settings.FILE_UPLOAD_WORKERS
+    max_workers = min(max_workers, len(files))
+
+    if max_workers <= 1:
+        return [prepare_upload_file(f) for f in files]
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="upload-prepare"
+    ) as executor:
+        return list(executor.map(prepare_upload_file, files))
+
+
+def _build_upload_file(user, prepared, batch, blob=None):
+    """Return an unsaved UploadFile for a prepared dict."""
+    if prepared["error"]:
+        return UploadFile(
             uploaded_by=user,
-            file=file,
-            original_filename=file.name,
-            content_type="unknown",
-            size_bytes=file.size,
+            file=prepared["storage_key"],
+            original_filename=prepared["name"],
+            content_type=prepared["content_type"],
+            size_bytes=prepared["size_bytes"],
             batch=batch,
             status=UploadFile.Status.FAILED,
-            error_message=str(exc.message),
+            error_message=prepared["error"],
+        )
+    return UploadFile(
+        uploaded_by=user,
+        file=prepared["storage_key"],
+        blob=blob,
+        original_filename=prepared["name"],
+        content_type=prepared["content_type"],
+        size_bytes=prepared["size_bytes"],
+        sha256=prepared["sha256"],
+        batch=batch,
+        status=UploadFile.Status.STORED,
+    )
+
+
+_deferred_counters = ContextVar("deferred_batch_counters", default=None)
+
+
+def adjust_batch_counters(batch_id, total=0, stored=0, failed=0):
+    """Apply deltas to a batch's file counters with one F() UPDATE.
+
+    Call inside the transaction that changes the files, so counters and
+    file rows commit together. No-op for files outside a batch. Counters
+    are clamped at zero, so a drifted counter never fails the UPDATE.
+    Inside ``deferred_batch_counters()`` the deltas are only collected.
+
+    Args:
+        batch_id: UploadBatch primary key (or None).
+        total: Change in ``total_count``.
+        stored: Change in ``stored_count``.
+        failed: Change in ``failed_count``.
+    """
+    if batch_id is None:
+        return
+    deferred = _deferred_counters.get()
+    if deferred is not None:
+        pending = deferred.setdefault(batch_id, {"total": 0, "stored": 0, "failed": 0})
+        pending["total"] += total
+        pending["stored"] += stored
+        pending["failed"] += failed
+        return
+
+    updates = {
+        field: models.F(field) + delta
+        if delta > 0
+        else Greatest(models.F(field) + delta, 0)
+        for field, delta in (
+            ("total_count", total),
+            ("stored_count", stored),
+            ("failed_count", failed),
         )
+        if delta
+    }
+    if updates:
+        UploadBatch.objects.filter(pk=batch_id).update(**updates)
+
+
+@contextmanager
+def deferred_batch_counters():
+    """Sum ``adjust_batch_counters()`` deltas and apply them once per batch.
+
+    Used around bulk deletes, where the post_delete signal would
+    otherwise issue one UPDATE per file. Open it inside the transaction
+    that changes the files; the summed deltas are applied on a clean
+    exit, and dropped if the block raises.
+    """
+    deferred = {}
+    token = _deferred_counters.set(deferred)
+    try:
+        yield
+    finally:
+        _deferred_counters.reset(token)
+    for batch_id, deltas in deferred.items():
+        adjust_batch_counters(batch_id, **deltas)
+
+
+def _file_stored_event(upload):
+    """Return the ``emit_event()`` arguments for a stored upload."""
+    return {
+        "aggregate_type": "UploadFile",
+        "aggregate_id": str(upload.pk),
+        "event_type": "file.stored",
+        "payload": {
+            "file_id": str(upload.pk),
+            "original_filename": upload.original_filename,
+            "content_type": upload.content_type,
+            "size_bytes": upload.size_bytes,
+            "sha256": upload.sha256,
+            "url": upload.file.url,
+        },
+    }
+
+
+def record_upload_file(user, prepared, batch=None):
+    """Create the UploadFile row (and file.stored event) for prepared content.
+
+    This is the database half of ``create_upload_file()``.
+
+    Args:
+        user: The User instance who uploaded the file (or None).
+        prepared: A dict returned by ``prepare_upload_file()``.
+        batch: Optional UploadBatch to associate with.
+
+    Returns:
+        An UploadFile instance with status STORED (success) or FAILED
+        (validation error).
+    """
+    if prepared["error"]:
+        upload = _build_upload_file(user, prepared, batch)
+        with transaction.atomic():
+            upload.save(force_insert=True)  # post_save counts it in the batch
         logger.warning(
             "Upload file failed validation: pk=%s user=%s error=%s",
             upload.pk,
             user.pk if user else None,
-            exc.message,
+            prepared["error"],
         )
         return upload
 
-    sha256 = compute_sha256(file)
-
     with transaction.atomic():
-        upload = UploadFile.objects.create(
-            uploaded_by=user,
-            file=file,
-            original_filename=file.name,
-            content_type=content_type,
-            size_bytes=size_bytes,
-            sha256=sha256,
-            batch=batch,
-            status=UploadFile.Status.STORED,
-        )
-        emit_event(
-            aggregate_type="UploadFile",
-            aggregate_id=str(upload.pk),
-            event_type="file.stored",
-            payload={
-                "file_id": str(upload.pk),
-                "original_filename": upload.original_filename,
-                "content_type": upload.content_type,
-                "size_bytes": upload.size_bytes,
-                "sha256": upload.sha256,
-                "url": upload.file.url,
-            },
-        )
+        blob = None
+        if settings.FILE_UPLOAD_DEDUPLICATE:
+            blob = acquire_blob(
+                prepared["sha256"],
+                prepared["size_bytes"],
+                prepared["storage_key"],
+                file=prepared["file"],
+            )
+        upload = _build_upload_file(user, prepared, batch, blob=blob)
+        upload.save(force_insert=True)  # post_save counts it in the batch
+        emit_event(**_file_stored_event(upload))
     logger.info(
         "Upload file created: pk=%s user=%s file=%s size=%d sha256=%s",
         upload.pk,
         user.pk if user else None,
-        file.name,
-        size_bytes,
-        sha256[:16],
+        prepared["name"],
+        prepared["size_bytes"],
+        prepared["sha256"][:16],
     )
     return upload
 
 
+def record_upload_files(user, prepared, batch=None):
+    """Create UploadFile rows and file.stored events for prepared content.
+
+    The database half of ``create_upload_files()``: all rows are written
+    in one transaction with a single ``bulk_create`` for the UploadFile
+    rows, one ``acquire_blob()`` per distinct SHA-256 in dedup mode, one
+    batch counter update, and a single ``emit_events()`` insert for the
+    ``file.stored`` events (one delivery task dispatched on commit).
+
+    Args:
+        user: The User instance who uploaded the files (or None).
+        prepared: List of dicts returned by ``prepare_upload_file()``.
+        batch: Optional UploadBatch to associate with.
+
+    Returns:
+        List of UploadFile instances in input order, each with status
+        STORED (success) or FAILED (validation error).
+    """
+    if not prepared:
+        return []
+
+    with transaction.atomic():
+        blobs = {}
+        if settings.FILE_UPLOAD_DEDUPLICATE:
+            by_sha = {}
+            for p in prepared:
+                if not p["error"]:
+                    by_sha.setdefault(p["sha256"], []).append(p)
+            for sha256, group in by_sha.items():
+                blobs[sha256] = acquire_blob(
+                    sha256,
+                    group[0]["size_bytes"],
+                    group[0]["storage_key"],
+                    count=len(group),
+                    file=group[0]["file"],
+                )
+
+        uploads = UploadFile.objects.bulk_create(
+            [
+                _build_upload_file(user, p, batch, blob=blobs.get(p["sha256"]))
+                for p in prepared
+            ]
+        )
+        # bulk_create sends no post_save, so count the rows here
+        stored = sum(1 for u in uploads if u.status == UploadFile.Status.STORED)
+        adjust_batch_counters(
+            batch.pk if batch else None,
+            total=len(uploads),
+            stored=stored,
+            failed=len(uploads) - stored,
+        )
+        emit_events(
+            _file_stored_event(u)
+            for u in uploads
+            if u.status == UploadFile.Status.STORED
+        )
+
+    logger.info(
+        "Upload files created: batch=%s user=%s stored=%d failed=%d",
+        batch.pk if batch else None,
+        user.pk if user else None,
+        stored,
+        len(uploads) - stored,
+    )
+    return uploads
+
+
+def create_upload_files(user, files, batch=None, max_workers=None):
+    """Validate, hash, and store several upload files with bulk writes.
+
+    Content is prepared concurrently via ``prepare_upload_files()``, then
+    written with ``record_upload_files()`` in a single transaction.
+
+    Args:
+        user: The User instance who uploaded the files (or None).
+        files: Iterable of Django UploadedFile instances.
+        batch: Optional UploadBatch to associate with.
+        max_workers: Thread pool size for ``prepare_upload_files()``.
+
+    Returns:
+        List of UploadFile instances in input order, each with status
+        STORED (success) or FAILED (validation error).
+    """
+    prepared = prepare_upload_files(files, max_workers=max_workers)
+    return record_upload_files(user, prepared, batch=batch)
+
+
+def create_upload_file(user, file, batch=None):
+    """Validate, hash, and store an upload file.
+
+    With ``FILE_UPLOAD_DEDUPLICATE`` enabled, the content is stored once
+    under a SHA-256-derived key and the new row references the shared
+    StoredBlob instead of writing another copy.
+
+    Args:
+        user: The User instance who uploaded the file (or None).
+        file: A Django UploadedFile instance.
+        batch: Optional UploadBatch to associate with.
+
+    Returns:
+        An UploadFile instance with status STORED (success) or FAILED
+        (validation error).
+    """
+    return record_upload_file(user, prepare_upload_file(file), batch=batch)
+
+
 def mark_file_failed(upload_file, error=""):
     """Transition an upload file to FAILED status.
 
+    Moves the file between its batch's counters in the same transaction.
+
     Args:
         upload_file: An UploadFile instance.
         error: Error message describing the failure.
@@ -155,9 +455,21 @@ def mark_file_failed(upload_file, error=""):
     Returns:
         The updated UploadFile instance.
     """
-    upload_file.status = UploadFile.Status.FAILED
-    upload_file.error_message = error
-    upload_file.save(update_fields=["status", "error_message", "updated_at"])
+    with transaction.atomic():
+        previous = (
+            UploadFile.objects.select_for_update()
+            .values_list("status", flat=True)
+            .get(pk=upload_file.pk)
+        )
+        upload_file.status = UploadFile.Status.FAILED
+        upload_file.error_message = error
+        upload_file.save(update_fields=["status", "error_message", "updated_at"])
+        if previous != UploadFile.Status.FAILED:
+            adjust_batch_counters(
+                upload_file.batch_id,
+                stored=-1 if previous == UploadFile.Status.STORED else 0,
+                failed=1,
+            )
     logger.warning("Upload file failed: pk=%s error=%s", upload_file.pk, error)
     return upload_file
 
@@ -189,6 +501,11 @@ def create_batch(user, idempotency_key=""):
 def finalize_batch(batch):
     """Finalize a batch based on its files' statuses.
 
+    Reads the batch's denormalized counters, so the cost does not grow
+    with the number of files. The batch row stays locked from that read
+    until the status is written, so a concurrent counter update cannot
+    slip in between.
+
     Transitions batch to:
     - COMPLETE: all files are STORED
     - PARTIAL: some files are STORED, some FAILED
@@ -200,41 +517,87 @@ def finalize_batch(batch):
     Returns:
         The updated UploadBatch instance.
     """
-    file_statuses = list(batch.files.values_list("status", flat=True))
+    batch.refresh_from_db(
+        fields=["total_count", "stored_count", "failed_count"],
+        from_queryset=UploadBatch.objects.select_for_update(),
+    )
 
-    if not file_statuses:
+    if batch.total_count == 0:
+        batch.status = UploadBatch.Status.FAILED
+    elif batch.failed_count == 0:
+        batch.status = UploadBatch.Status.COMPLETE
+    elif batch.stored_count == 0:
         batch.status = UploadBatch.Status.FAILED
     else:
-        success_statuses = {UploadFile.Status.STORED}
-        successes = sum(1 for s in file_statuses if s in success_statuses)
-        failures = sum(1 for s in file_statuses if s == UploadFile.Status.FAILED)
-
-        if failures == 0:
-            batch.status = UploadBatch.Status.COMPLETE
-        elif successes == 0:
-            batch.status = UploadBatch.Status.FAILED
-        else:
-            batch.status = UploadBatch.Status.PARTIAL
+        batch.status = UploadBatch.Status.PARTIAL
 
     batch.save(update_fields=["status", "updated_at"])
     logger.info("Upload batch finalized: pk=%s status=%s", batch.pk, batch.status)
     return batch
 
 
-def notify_expiring_files(ttl_hours=None, notify_hours=None):
+def recompute_batch_counters(batch_ids=None, dry_run=False):
+    """Recompute batch file counters from the UploadFile rows.
+
+    Args:
+        batch_ids: Optional iterable of UploadBatch primary keys; all
+            batches when None.
+        dry_run: Report drift without writing.
+
+    Returns:
+        dict: {"checked": int, "repaired": int}
+    """
+    batches = UploadBatch.objects.annotate(
+        n_total=models.Count("files"),
+        n_stored=models.Count("files", filter=models.Q(files__status="stored")),
+        n_failed=models.Count("files", filter=models.Q(files__status="failed")),
+    ).only("pk", "total_count", "stored_count", "failed_count")
+    if batch_ids is not None:
+        batches = batches.filter(pk__in=list(batch_ids))
+
+    checked = 0
+    drifted = []
+    for batch in batches.iterator():
+        checked += 1
+        actual = (batch.n_total, batch.n_stored, batch.n_failed)
+        if actual != (batch.total_count, batch.stored_count, batch.failed_count):
+            batch.total_count, batch.stored_count, batch.failed_count = actual
+            drifted.append(batch)
+
+    if drifted and not dry_run:
+        UploadBatch.objects.bulk_update(
+            drifted, ["total_count", "stored_count", "failed_count"], batch_size=500
+        )
+    logger.info(
+        "Batch counters recomputed: checked=%d repaired=%d dry_run=%s",
+        checked,
+        len(drifted),
+        dry_run,
+    )
+    return {"checked": checked, "repaired": len(drifted)}
+
+
+def notify_expiring_files(
+    ttl_hours=None, notify_hours=None, *, cursor=None, budget=None
+):
     """Emit file.expiring events for files approaching TTL expiry.
 
     Queries files with status=STORED that are within notify_hours of
     their TTL expiry. Relies on the outbox idempotency constraint
-    to prevent duplicate notifications across sweep runs.
+    to prevent duplicate notifications across sweep runs. Files are
+    walked in pk order by a time-budgeted ``run_sweep()``; an unfinished
+    sweep returns a cursor to resume from.
 
     Args:
         ttl_hours: File TTL in hours. Defaults to settings.FILE_UPLOAD_TTL_HOURS.
         notify_hours: Hours before expiry to notify. Defaults to
             settings.FILE_UPLOAD_EXPIRY_NOTIFY_HOURS.
+        cursor: Resume after this UploadFile pk.
+        budget: Sweep time budget in seconds (default ``sweep_budget()``).
 
     Returns:
-        dict: {"notified": int, "skipped": int}
+        dict: {"notified": int, "skipped": int, "rows_per_sec": float,
+        "done": bool, "cursor": str|None}
     """
     if ttl_hours is None:
         ttl_hours = settings.FILE_UPLOAD_TTL_HOURS
@@ -249,32 +612,46 @@ def notify_expiring_files(ttl_hours=None, notify_hours=None):
 
     notified = 0
     skipped = 0
-    for upload in expiring_qs.iterator():
-        try:
-            with transaction.atomic():
-                emit_event(
-                    aggregate_type="UploadFile",
-                    aggregate_id=str(upload.pk),
-                    event_type="file.expiring",
-                    payload={
-                        "file_id": str(upload.pk),
-                        "original_filename": upload.original_filename,
-                        "content_type": upload.content_type,
-                        "size_bytes": upload.size_bytes,
-                        "sha256": upload.sha256,
-                        "url": upload.file.url,
-                        "expires_at": str(
-                            upload.created_at + timedelta(hours=ttl_hours)
-                        ),
-                    },
-                )
-            notified += 1
-        except IntegrityError:
-            skipped += 1  # Already notified (idempotency constraint)
+
+    def notify_chunk(pks):
+        nonlocal notified, skipped
+        for upload in UploadFile.objects.filter(pk__in=pks).order_by("pk"):
+            try:
+                with transaction.atomic():
+                    emit_event(
+                        aggregate_type="UploadFile",
+                        aggregate_id=str(upload.pk),
+                        event_type="file.expiring",
+                        payload={
+                            "file_id": str(upload.pk),
+                            "original_filename": upload.original_filename,
+                            "content_type": upload.content_type,
+                            "size_bytes": upload.size_bytes,
+                            "sha256": upload.sha256,
+                            "url": upload.file.url,
+                            "expires_at": str(
+                                upload.created_at + timedelta(hours=ttl_hours)
+                            ),
+                        },
+                    )
+                notified += 1
+            except IntegrityError:
+                skipped += 1  # Already notified (idempotency constraint)
+        return len(pks)
+
+    sweep = run_sweep(expiring_qs, notify_chunk, cursor=cursor, budget=budget)
 
     logger.info(
-        "Expiring file notifications: %d notified, %d skipped (already notified).",
+        "Expiring file notifications: %d notified, %d skipped (already notified), "
+        "%.1f rows/s.",
         notified,
         skipped,
+        sweep["rows_per_sec"],
     )
-    return {"notified": notified, "skipped": skipped}
+    return {
+        "notified": notified,
+        "skipped": skipped,
+        "rows_per_sec": sweep["rows_per_sec"],
+        "done": sweep["done"],
+        "cursor": sweep["cursor"],
+    }
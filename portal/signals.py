@@ -0,0 +1,66 @@
+"""Signal handlers for the portal app."""
+
+import logging
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+
+@receiver(post_save, sender="portal.UploadFile")
+def on_upload_file_create(sender, instance, created, raw=False, **kwargs):
+    """Count a new file in its batch's counters.
+
+    Pairs with ``on_upload_file_delete()``, so files created outside the
+    upload services are counted too. ``bulk_create`` sends no post_save;
+    its callers adjust the counters themselves.
+    """
+    if not created or raw or instance.batch_id is None:
+        return
+
+    from portal.services.uploads import adjust_batch_counters
+
+    adjust_batch_counters(
+        instance.batch_id,
+        total=1,
+        stored=1 if instance.status == instance.Status.STORED else 0,
+        failed=1 if instance.status == instance.Status.FAILED else 0,
+    )
+
+
+@receiver(post_delete, sender="portal.UploadFile")
+def on_upload_file_delete(sender, instance, **kwargs):
+    """Drop the file from its batch's counters and its blob's references."""
+    if instance.batch_id is not None:
+        from portal.services.uploads import adjust_batch_counters
+
+        adjust_batch_counters(
+            instance.batch_id,
+            total=-1,
+            stored=-1 if instance.status == instance.Status.STORED else 0,
+            failed=-1 if instance.status == instance.Status.FAILED else 0,
+        )
+
+    if instance.blob_id is None:
+        return
+
+    from portal.services.blobs import release_blob
+
+    release_blob(instance.blob_id)
+
+
+@receiver(post_delete, sender="portal.UploadSession")
+def on_upload_session_delete(sender, instance, **kwargs):
+    """Discard the session's staged parts (local file or S3 multipart upload)."""
+    from portal.services.chunks import discard_staging_file
+
+    discard_staging_file(instance)
+
+    if instance.multipart_upload_id and instance.status != instance.Status.COMPLETE:
+        from common.utils import safe_dispatch
+
+        from portal.services.multipart import abort_multipart_upload
+
+        with safe_dispatch("abort S3 multipart upload", logger):
+            abort_multipart_upload(instance)
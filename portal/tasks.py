@@ -18,52 +18,81 @@ BATCH_SIZE = 1000
     max_retries=2,
     default_retry_delay=60,
 )
-def cleanup_expired_upload_files_task(self):
+def cleanup_expired_upload_files_task(self, cursor=None):
     """Delete upload files older than FILE_UPLOAD_TTL_HOURS.
 
-    Processes at most BATCH_SIZE (1000) expired records per run to
-    stay within CELERY_TASK_TIME_LIMIT (300s). Logs the remaining
-    count for operational visibility.
+    Sweeps the expired records in BATCH_SIZE (1000) chunks until none
+    are left or SWEEP_TIME_BUDGET_SECONDS (below the soft time limit) is
+    spent, then re-enqueues itself from the last pk so a large backlog
+    drains in back-to-back runs. Logs the rows/sec and the remaining
+    count (via ``count_backlog()``) for operational visibility.
+
+    Files backed by a shared StoredBlob only drop their reference (via
+    the post_delete signal); the blob content is deleted once its last
+    reference has expired and the purge grace period has passed.
+
+    Args:
+        cursor: Resume after this UploadFile pk (set by the re-enqueue).
 
     Returns:
-        dict: {"deleted": int, "remaining": int}
+        dict: {"deleted": int, "remaining": int, "rows_per_sec": float,
+        "done": bool, "cursor": str|None}
     """
+    from common.services.backlog import count_backlog
+    from common.services.sweep import continue_sweep, run_sweep
     from django.conf import settings
+    from django.db import transaction
 
     from portal.models import UploadFile
+    from portal.services.blobs import purge_unreferenced_blobs
+    from portal.services.uploads import deferred_batch_counters
 
     ttl_hours = getattr(settings, "FILE_UPLOAD_TTL_HOURS", 24)
     cutoff = timezone.now() - timedelta(hours=ttl_hours)
-    expired_qs = UploadFile.objects.filter(created_at__lt=cutoff)
-    total_expired = expired_qs.count()
 
-    if total_expired == 0:
-        logger.info("No expired upload files to clean up.")
-        return {"deleted": 0, "remaining": 0}
-
-    batch_pks = list(
-        expired_qs.order_by("pk").values_list("pk", flat=True)[:BATCH_SIZE]
-    )
-    batch = UploadFile.objects.filter(pk__in=batch_pks)
+    # Blobs whose last reference expired on an earlier run (grace elapsed)
+    if cursor is None:
+        purge_unreferenced_blobs()
 
+    expired_qs = UploadFile.objects.filter(created_at__lt=cutoff)
     deleted_files = 0
-    for upload in batch.iterator():
-        try:
-            upload.file.delete(save=False)
-            deleted_files += 1
-        except FileNotFoundError:
-            deleted_files += 1  # File already gone, still count it
-
-    deleted_count, _ = batch.delete()
-    remaining = max(0, total_expired - deleted_count)
-
-    logger.info(
-        "Cleaned up %d expired upload files (%d files removed), %d remaining.",
-        deleted_count,
-        deleted_files,
-        remaining,
-    )
-    return {"deleted": deleted_count, "remaining": remaining}
+
+    def delete_chunk(pks):
+        nonlocal deleted_files
+        batch = UploadFile.objects.filter(pk__in=pks)
+        for upload in batch.filter(blob__isnull=True).iterator():
+            try:
+                upload.file.delete(save=False)
+                deleted_files += 1
+            except FileNotFoundError:
+                deleted_files += 1  # File already gone, still count it
+        # One counter UPDATE per batch for the chunk, not one per file
+        with transaction.atomic(), deferred_batch_counters():
+            _, per_model = batch.delete()
+        return per_model.get(UploadFile._meta.label, 0)
+
+    sweep = run_sweep(expired_qs, delete_chunk, chunk_size=BATCH_SIZE, cursor=cursor)
+    continue_sweep(self, sweep)
+    remaining = 0 if sweep["done"] else count_backlog(expired_qs)
+
+    if not sweep["handled"]:
+        logger.info("No expired upload files to clean up.")
+    else:
+        logger.info(
+            "Cleaned up %d expired upload files (%d files removed, %.1f rows/s), "
+            "%d remaining.",
+            sweep["handled"],
+            deleted_files,
+            sweep["rows_per_sec"],
+            remaining,
+        )
+    return {
+        "deleted": sweep["handled"],
+        "remaining": remaining,
+        "rows_per_sec": sweep["rows_per_sec"],
+        "done": sweep["done"],
+        "cursor": sweep["cursor"],
+    }
 
 
 @shared_task(
@@ -72,18 +101,26 @@ def cleanup_expired_upload_files_task(self):
     max_retries=2,
     default_retry_delay=60,
 )
-def notify_expiring_files_task(self):
+def notify_expiring_files_task(self, cursor=None):
     """Emit file.expiring events for files approaching TTL expiry.
 
     Runs hourly via celery-beat. Relies on outbox idempotency
-    constraint to prevent duplicate notifications.
+    constraint to prevent duplicate notifications. A sweep that runs
+    out of its time budget re-enqueues itself from its cursor.
+
+    Args:
+        cursor: Resume after this UploadFile pk (set by the re-enqueue).
 
     Returns:
-        dict: {"notified": int, "skipped": int}
+        dict: {"notified": int, "skipped": int, "rows_per_sec": float,
+        "done": bool, "cursor": str|None}
     """
+    from common.services.sweep import continue_sweep
+
     from portal.services.uploads import notify_expiring_files
 
-    result = notify_expiring_files()
+    result = notify_expiring_files(cursor=cursor)
+    continue_sweep(self, result)
     if result["notified"] > 0:
         logger.info(
             "Notified %d expiring files, %d skipped.",
@@ -91,3 +128,69 @@ def notify_expiring_files_task(self):
             result["skipped"],
         )
     return result
+
+
+@shared_task(
+    name="portal.tasks.cleanup_portal_event_outbox_task",
+    bind=True,
+    max_retries=2,
+    default_retry_delay=60,
+)
+def cleanup_portal_event_outbox_task(self, cursor=None):
+    """Retire terminal portal outbox entries older than OUTBOX_RETENTION_HOURS.
+
+    On PostgreSQL, a fresh sweep (no ``cursor``) first drops whole day
+    partitions past the cutoff (and creates the upcoming ones) via
+    ``maintain_partitions()``. The remaining terminal entries -- all of
+    them on SQLite -- are deleted in BATCH_SIZE (1000) chunks by a
+    time-budgeted sweep that re-enqueues itself until drained.
+
+    Args:
+        cursor: Resume after this entry pk (set by the re-enqueue).
+
+    Returns:
+        dict: {"deleted": int, "partitions_dropped": int,
+        "rows_per_sec": float, "done": bool, "cursor": str|None}
+    """
+    from common.services.partitions import maintain_partitions
+    from common.services.sweep import continue_sweep, run_sweep
+    from django.conf import settings
+
+    from portal.models import PortalEventOutbox
+
+    retention_hours = getattr(settings, "OUTBOX_RETENTION_HOURS", 168)
+    cutoff = timezone.now() - timedelta(hours=retention_hours)
+
+    partitions = {"dropped": 0, "rows": 0}
+    if cursor is None:
+        partitions = maintain_partitions(PortalEventOutbox._meta.db_table, cutoff)
+    terminal_qs = PortalEventOutbox.objects.filter(
+        status__in=[
+            PortalEventOutbox.Status.DELIVERED,
+            PortalEventOutbox.Status.FAILED,
+        ],
+        created_at__lt=cutoff,
+    )
+
+    def delete_chunk(pks):
+        deleted, _ = PortalEventOutbox.objects.filter(pk__in=pks).delete()
+        return deleted
+
+    sweep = run_sweep(terminal_qs, delete_chunk, chunk_size=BATCH_SIZE, cursor=cursor)
+    continue_sweep(self, sweep)
+
+    deleted = partitions["rows"] + sweep["handled"]
+    if deleted:
+        logger.info(
+            "Cleaned up %d portal outbox entries (%d partitions dropped, %.1f rows/s).",
+            deleted,
+            partitions["dropped"],
+            sweep["rows_per_sec"],
+        )
+    return {
+        "deleted": deleted,
+        "partitions_dropped": partitions["dropped"],
+        "rows_per_sec": sweep["rows_per_sec"],
+        "done": sweep["done"],
+        "cursor": sweep["cursor"],
+    }
@@ -0,0 +1,139 @@
+"""Unit tests for the chunk assembly engine."""
+
+import hashlib
+import io
+import os
+
+import pytest
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+
+from portal.models import UploadFile, UploadSession
+from portal.services.assembly import assemble_segments, coalesce_segments
+from portal.services.chunks import part_range, stage_upload_part, staging_path
+from portal.services.sessions import (
+    accept_upload_part,
+    complete_upload_session,
+    start_upload_session,
+)
+
+CONTENT = os.urandom(50_000)
+
+
+@pytest.fixture
+def sources(tmp_path, settings):
+    """Two local source files and a local MEDIA_ROOT."""
+    settings.MEDIA_ROOT = tmp_path / "media"
+    first = tmp_path / "first.bin"
+    second = tmp_path / "second.bin"
+    first.write_bytes(CONTENT[:30_000])
+    second.write_bytes(b"pad" + CONTENT[30_000:])
+    return [(str(first), 0, 30_000), (str(second), 3, 20_000)]
+
+
+@pytest.fixture
+def in_memory_storage(settings):
+    settings.STORAGES = {
+        **settings.STORAGES,
+        "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+    }
+
+
+class TestCoalesceSegments:
+    """Tests for coalesce_segments()."""
+
+    def test_adjacent_ranges_merge(self):
+        segments = [("a", 0, 10), ("a", 10, 5), ("b", 0, 3), ("a", 15, 1)]
+        assert coalesce_segments(segments) == [("a", 0, 15), ("b", 0, 3), ("a", 15, 1)]
+
+    def test_gap_is_kept(self):
+        assert coalesce_segments([("a", 0, 10), ("a", 11, 5)]) == [
+            ("a", 0, 10),
+            ("a", 11, 5),
+        ]
+
+
+class TestAssembleSegments:
+    """Tests for assemble_segments()."""
+
+    def test_local_uses_kernel_copy(self, sources, tmp_path):
+        result = assemble_segments(sources, "uploads/out.bin")
+
+        assert result["method"] in {"copy_file_range", "sendfile"}
+        assert result["bytes"] == len(CONTENT)
+        assert result["throughput_bytes_per_sec"] > 0
+        assert result["sha256"] == ""
+        assert (tmp_path / "media" / result["name"]).read_bytes() == CONTENT
+
+    def test_verification_streams_and_hashes(self, sources, tmp_path):
+        expected = hashlib.sha256(CONTENT).hexdigest()
+        result = assemble_segments(sources, "uploads/out.bin", expected)
+
+        assert result["method"] == "stream"
+        assert result["sha256"] == expected
+        assert (tmp_path / "media" / result["name"]).read_bytes() == CONTENT
+
+    def test_checksum_mismatch_deletes_output(self, sources, tmp_path):
+        with pytest.raises(ValidationError) as exc:
+            assemble_segments(sources, "uploads/out.bin", "0" * 64)
+        assert exc.value.code == "checksum_mismatch"
+        assert not (tmp_path / "media" / "uploads" / "out.bin").exists()
+
+    def test_remote_storage_streams(self, sources, in_memory_storage):
+        expected = hashlib.sha256(CONTENT).hexdigest()
+        result = assemble_segments(sources, "uploads/out.bin", expected)
+
+        assert result["method"] == "stream"
+        with default_storage.open(result["name"]) as fh:
+            assert fh.read() == CONTENT
+
+
+@pytest.mark.django_db
+class TestCompleteWithAssembly:
+    """complete_upload_session assembles when a rename is not possible."""
+
+    def _upload_all(self, user, tmp_path, settings):
+        settings.FILE_UPLOAD_SESSION_DIR = tmp_path / "sessions"
+        session = start_upload_session(user, "data.bin", len(CONTENT), 16_384)
+        for n in range(1, session.total_parts + 1):
+            offset, size = part_range(session, n)
+            chunk = io.BytesIO(CONTENT[offset : offset + size])
+            accept_upload_part(session, stage_upload_part(session, n, chunk))
+        return session
+
+    def test_expected_sha256_verified_and_stored(self, user, tmp_path, settings):
+        settings.MEDIA_ROOT = tmp_path / "media"
+        session = self._upload_all(user, tmp_path, settings)
+        expected = hashlib.sha256(CONTENT).hexdigest()
+
+        complete_upload_session(session, expected_sha256=expected)
+
+        upload = UploadFile.objects.get(pk=session.file_id)
+        assert upload.sha256 == expected
+        assert upload.status == UploadFile.Status.STORED
+        assert (tmp_path / "media" / upload.file.name).read_bytes() == CONTENT
+        assert not os.path.exists(staging_path(session))
+
+    def test_mismatch_leaves_session_open(self, user, tmp_path, settings):
+        settings.MEDIA_ROOT = tmp_path / "media"
+        session = self._upload_all(user, tmp_path, settings)
+
+        with pytest.raises(ValidationError):
+            complete_upload_session(session, expected_sha256="0" * 64)
+
+        assert UploadFile.objects.get(pk=session.file_id).status == (
+            UploadFile.Status.UPLOADING
+        )
+        session.refresh_from_db()
+        assert session.status == UploadSession.Status.IN_PROGRESS
+        assert os.path.exists(staging_path(session))
+
+    def test_remote_storage_assembles(
+        self, user, tmp_path, settings, in_memory_storage
+    ):
+        session = self._upload_all(user, tmp_path, settings)
+        complete_upload_session(session)
+
+        upload = UploadFile.objects.get(pk=session.file_id)
+        with default_storage.open(upload.file.name) as fh:
+            assert fh.read() == CONTENT
@@ -0,0 +1,55 @@
+"""Unit tests for received-part bitmaps."""
+
+from portal.services.bitmap import (
+    count_parts,
+    empty_bitmap,
+    format_ranges,
+    has_part,
+    missing_parts,
+    set_part,
+)
+
+
+class TestBitmap:
+    """Tests for the bitmap helpers."""
+
+    def test_empty_bitmap_size(self):
+        assert empty_bitmap(1) == b"\x00"
+        assert empty_bitmap(8) == b"\x00"
+        assert len(empty_bitmap(10_000)) == 1250
+
+    def test_set_part_is_idempotent(self):
+        bitmap, newly_set = set_part(empty_bitmap(10), 9)
+        assert newly_set
+        assert has_part(bitmap, 9)
+        assert not has_part(bitmap, 1)
+
+        again, newly_set = set_part(bitmap, 9)
+        assert not newly_set
+        assert again == bitmap
+
+    def test_set_part_grows_short_bitmap(self):
+        bitmap, newly_set = set_part(b"", 17)
+        assert newly_set
+        assert len(bitmap) == 3
+        assert count_parts(bitmap) == 1
+
+    def test_missing_parts(self):
+        bitmap = empty_bitmap(20)
+        for n in list(range(1, 9)) + [10, 20]:
+            bitmap, _ = set_part(bitmap, n)
+        assert list(missing_parts(bitmap, 20)) == [9, *range(11, 20)]
+        assert count_parts(bitmap) == 10
+
+    def test_full_bitmap_has_no_missing_parts(self):
+        bitmap = empty_bitmap(10_000)
+        for n in range(1, 10_001):
+            bitmap, _ = set_part(bitmap, n)
+        assert list(missing_parts(bitmap, 10_000)) == []
+        assert count_parts(bitmap) == 10_000
+
+    def test_format_ranges(self):
+        numbers = [*range(1, 41), 57, *range(90, 121)]
+        assert format_ranges(numbers) == "1-40,57,90-120"
+        assert format_ranges([3]) == "3"
+        assert format_ranges([]) == ""
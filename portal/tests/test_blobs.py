@@ -0,0 +1,152 @@
+"""Unit tests for content-addressed blob storage services."""
+
+import hashlib
+from datetime import timedelta
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
+
+from portal.models import StoredBlob, UploadFile
+from portal.services.blobs import (
+    acquire_blob,
+    blob_storage_key,
+    purge_unreferenced_blobs,
+    release_blob,
+)
+from portal.services.uploads import (
+    create_upload_file,
+    prepare_upload_file,
+    record_upload_file,
+)
+from portal.tasks import cleanup_expired_upload_files_task
+
+
+@pytest.fixture
+def dedupe(tmp_path, settings):
+    """Enable content-addressed storage with a temporary MEDIA_ROOT."""
+    settings.MEDIA_ROOT = tmp_path
+    settings.FILE_UPLOAD_DEDUPLICATE = True
+    return tmp_path
+
+
+def _expire(upload, hours=25):
+    old_time = timezone.now() - timedelta(hours=hours)
+    UploadFile.objects.filter(pk=upload.pk).update(created_at=old_time)
+
+
+class TestBlobStorageKey:
+    """Tests for blob_storage_key()."""
+
+    def test_fans_out_by_hash_prefix(self):
+        sha = "abcdef" + "0" * 58
+        assert blob_storage_key(sha) == f"blobs/ab/cd/{sha}"
+
+
+@pytest.mark.django_db
+class TestDeduplicatedUploads:
+    """create_upload_file in content-addressed storage mode."""
+
+    def test_identical_uploads_share_one_blob(self, user, dedupe):
+        content = b"same corpus bytes"
+        first = create_upload_file(user, SimpleUploadedFile("a.pdf", content))
+        second = create_upload_file(user, SimpleUploadedFile("b.pdf", content))
+
+        sha = hashlib.sha256(content).hexdigest()
+        blob = StoredBlob.objects.get(sha256=sha)
+        assert blob.ref_count == 2
+        assert first.blob == blob
+        assert second.blob == blob
+        assert first.file.name == second.file.name == blob_storage_key(sha)
+        assert (dedupe / blob.storage_key).read_bytes() == content
+        assert not (dedupe / "uploads").exists()
+
+    def test_different_content_gets_separate_blobs(self, user, dedupe):
+        create_upload_file(user, SimpleUploadedFile("a.pdf", b"one"))
+        create_upload_file(user, SimpleUploadedFile("b.pdf", b"two"))
+        assert StoredBlob.objects.count() == 2
+
+    def test_disabled_mode_writes_per_file_copies(self, user, tmp_path, settings):
+        settings.MEDIA_ROOT = tmp_path
+        upload = create_upload_file(user, SimpleUploadedFile("a.pdf", b"data"))
+        assert upload.blob is None
+        assert upload.file.name.startswith("uploads/")
+        assert not StoredBlob.objects.exists()
+
+
+@pytest.mark.django_db
+class TestBlobReferenceCounting:
+    """Reference counting across deletes, cleanup, and purge."""
+
+    def test_acquire_existing_blob_increments(self, dedupe):
+        blob = acquire_blob("f" * 64, 10, blob_storage_key("f" * 64))
+        again = acquire_blob("f" * 64, 10, blob_storage_key("f" * 64), count=3)
+        assert again.pk == blob.pk
+        assert again.ref_count == 4
+
+    def test_release_never_goes_negative(self, dedupe):
+        blob = acquire_blob("e" * 64, 10, blob_storage_key("e" * 64))
+        assert release_blob(blob.pk, count=2) == 0
+        blob.refresh_from_db()
+        assert blob.ref_count == 1
+
+    def test_deleting_upload_releases_reference(self, user, dedupe):
+        upload = create_upload_file(user, SimpleUploadedFile("a.pdf", b"data"))
+        upload.delete()
+        assert StoredBlob.objects.get().ref_count == 0
+
+    def test_cleanup_keeps_blob_while_referenced(self, user, dedupe):
+        old = create_upload_file(user, SimpleUploadedFile("a.pdf", b"data"))
+        create_upload_file(user, SimpleUploadedFile("b.pdf", b"data"))
+        _expire(old)
+
+        result = cleanup_expired_upload_files_task()
+
+        assert result["deleted"] == 1
+        blob = StoredBlob.objects.get()
+        assert blob.ref_count == 1
+        assert (dedupe / blob.storage_key).exists()
+
+    def test_unreferenced_blob_purged_after_grace(self, user, dedupe):
+        upload = create_upload_file(user, SimpleUploadedFile("a.pdf", b"data"))
+        key = upload.blob.storage_key
+        _expire(upload)
+        cleanup_expired_upload_files_task()
+
+        # Within the grace period the blob is kept for late acquirers
+        assert purge_unreferenced_blobs() == 0
+        assert StoredBlob.objects.get().ref_count == 0
+
+        assert purge_unreferenced_blobs(grace=timedelta(0)) == 1
+        assert not StoredBlob.objects.exists()
+        assert not (dedupe / key).exists()
+
+    def test_purge_between_store_and_acquire_restores_content(self, user, dedupe):
+        """An upload that skipped the write keeps its data if purge runs first."""
+        old = create_upload_file(user, SimpleUploadedFile("a.pdf", b"data"))
+        key = old.blob.storage_key
+        old.delete()
+
+        # Content is still in storage, so the new upload skips the write...
+        prepared = prepare_upload_file(SimpleUploadedFile("b.pdf", b"data"))
+        assert prepared["storage_key"] == key
+        # ...and the purge removes both row and content before it records.
+        assert purge_unreferenced_blobs(grace=timedelta(0)) == 1
+        assert not (dedupe / key).exists()
+
+        upload = record_upload_file(user, prepared)
+
+        assert upload.blob.ref_count == 1
+        assert (dedupe / key).read_bytes() == b"data"
+
+    def test_acquire_restores_content_of_unreferenced_blob(self, user, dedupe):
+        """A blob left at zero references without content is rewritten."""
+        old = create_upload_file(user, SimpleUploadedFile("a.pdf", b"data"))
+        key = old.blob.storage_key
+        old.delete()
+        (dedupe / key).unlink()  # e.g. a purge that deleted and rolled back
+
+        upload = create_upload_file(user, SimpleUploadedFile("b.pdf", b"data"))
+
+        assert upload.blob.ref_count == 1
+        assert (dedupe / key).read_bytes() == b"data"
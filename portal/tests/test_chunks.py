@@ -0,0 +1,173 @@
+"""Unit tests for positional chunk staging and session completion."""
+
+import io
+import os
+
+import pytest
+from django.core.exceptions import ValidationError
+
+from portal.models import UploadFile, UploadPart, UploadSession
+from portal.services.chunks import part_range, stage_upload_part, staging_path
+from portal.services.sessions import (
+    PART_CLAIM_TIMEOUT,
+    accept_upload_part,
+    claim_upload_parts,
+    complete_upload_session,
+    release_upload_parts,
+    start_upload_session,
+)
+
+CONTENT = bytes(range(256)) * 40  # 10240 bytes
+
+
+@pytest.fixture
+def session(user, tmp_path, settings):
+    """A 10240-byte session with 4096-byte parts (3 parts)."""
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.FILE_UPLOAD_SESSION_DIR = tmp_path / "sessions"
+    return start_upload_session(user, "data.bin", len(CONTENT), 4096)
+
+
+def _stage(session, n, write=True):
+    offset, size = part_range(session, n)
+    return stage_upload_part(
+        session, n, io.BytesIO(CONTENT[offset : offset + size]), write=write
+    )
+
+
+@pytest.mark.django_db
+class TestStartUploadSession:
+    """Tests for start_upload_session."""
+
+    def test_creates_uploading_file_and_session(self, session):
+        assert session.total_parts == 3
+        assert session.file.status == UploadFile.Status.UPLOADING
+        assert session.file.original_filename == "data.bin"
+        assert session.file.file.name.startswith("uploads/")
+
+    def test_rejects_oversized_declaration(self, user, settings):
+        settings.FILE_UPLOAD_SESSION_MAX_SIZE = 100
+        with pytest.raises(ValidationError) as exc:
+            start_upload_session(user, "big.bin", 101)
+        assert exc.value.code == "file_too_large"
+
+
+@pytest.mark.django_db
+class TestStageUploadPart:
+    """Tests for stage_upload_part."""
+
+    def test_part_range_last_part_is_short(self, session):
+        assert part_range(session, 3) == (8192, 2048)
+
+    def test_invalid_part_number(self, session):
+        with pytest.raises(ValidationError) as exc:
+            stage_upload_part(session, 4, io.BytesIO(b""))
+        assert exc.value.code == "invalid_part_number"
+
+    def test_wrong_size_rejected(self, session):
+        with pytest.raises(ValidationError) as exc:
+            stage_upload_part(session, 1, io.BytesIO(b"short"))
+        assert exc.value.code == "invalid_part_size"
+
+    def test_preallocates_sparse_file(self, session):
+        staged = _stage(session, 3)
+        assert staged["temp_storage_key"] == staging_path(session)
+        assert os.path.getsize(staging_path(session)) == len(CONTENT)
+
+    def test_out_of_order_parts_assemble_in_place(self, session):
+        for n in (3, 1, 2):
+            _stage(session, n)
+        with open(staging_path(session), "rb") as fh:
+            assert fh.read() == CONTENT
+
+
+@pytest.mark.django_db
+class TestAcceptUploadPart:
+    """Tests for accept_upload_part retry handling."""
+
+    def test_identical_retry_is_idempotent(self, session):
+        part, created = accept_upload_part(session, _stage(session, 1))
+        again, created_again = accept_upload_part(session, _stage(session, 1, False))
+        assert created and not created_again
+        assert again.pk == part.pk
+        session.refresh_from_db()
+        assert session.completed_parts == 1
+
+    def test_conflicting_retry_rejected(self, session):
+        accept_upload_part(session, _stage(session, 1))
+        staged = stage_upload_part(session, 1, io.BytesIO(b"x" * 4096), write=False)
+        with pytest.raises(ValidationError) as exc:
+            accept_upload_part(session, staged)
+        assert exc.value.code == "part_conflict"
+
+    def test_closed_session_rejected(self, session):
+        session.status = UploadSession.Status.ABORTED
+        with pytest.raises(ValidationError) as exc:
+            accept_upload_part(session, _stage(session, 1))
+        assert exc.value.code == "session_closed"
+
+
+@pytest.mark.django_db
+class TestClaimUploadParts:
+    """Tests for claiming parts before they are written."""
+
+    def test_claims_new_parts_and_reports_received(self, session):
+        accept_upload_part(session, _stage(session, 1))
+
+        claims = claim_upload_parts(session, [1, 2])
+
+        assert list(claims["received"]) == [1]
+        assert list(claims["claimed"]) == [2]
+        assert claims["claimed"][2].status == UploadPart.Status.PENDING
+
+    def test_live_claim_refuses_second_claim(self, session):
+        claim_upload_parts(session, [2])
+        with pytest.raises(ValidationError) as exc:
+            claim_upload_parts(session, [1, 2])
+        assert exc.value.code == "part_in_progress"
+        assert not session.parts.filter(part_number=1).exists()
+
+    def test_stale_claim_is_taken_over(self, session):
+        stale = claim_upload_parts(session, [1])["claimed"][1]
+        UploadPart.objects.filter(pk=stale.pk).update(
+            updated_at=stale.updated_at - PART_CLAIM_TIMEOUT
+        )
+
+        claim = claim_upload_parts(session, [1])["claimed"][1]
+        part, created = accept_upload_part(session, _stage(session, 1), claim=claim)
+
+        assert created and part.pk == stale.pk
+        assert part.status == UploadPart.Status.RECEIVED
+        session.refresh_from_db()
+        assert session.completed_parts == 1
+
+    def test_release_frees_the_part(self, session):
+        claim = claim_upload_parts(session, [1])["claimed"][1]
+        assert release_upload_parts([claim]) == 1
+        assert list(claim_upload_parts(session, [1])["claimed"]) == [1]
+
+    def test_unclaimed_accept_refused_while_claimed(self, session):
+        claim_upload_parts(session, [1])
+        with pytest.raises(ValidationError) as exc:
+            accept_upload_part(session, _stage(session, 1, False))
+        assert exc.value.code == "part_in_progress"
+
+
+@pytest.mark.django_db
+class TestCompleteStagedSession:
+    """complete_upload_session places the staging file without reassembly."""
+
+    def test_staging_file_moved_into_storage(self, session, tmp_path):
+        for n in (2, 3, 1):
+            accept_upload_part(session, _stage(session, n))
+        complete_upload_session(session)
+
+        upload = UploadFile.objects.get(pk=session.file_id)
+        assert upload.status == UploadFile.Status.STORED
+        assert (tmp_path / "media" / upload.file.name).read_bytes() == CONTENT
+        assert not os.path.exists(staging_path(session))
+
+    def test_deleting_session_discards_staging_file(self, session):
+        _stage(session, 1)
+        session.delete()
+        assert not os.path.exists(staging_path(session))
@@ -0,0 +1,32 @@
+"""Tests for portal management commands."""
+
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from portal.models import UploadBatch
+
+
+@pytest.mark.django_db
+class TestRepairBatchCounters:
+    """Tests for the repair_batch_counters command."""
+
+    def test_repairs_and_reports_json(self, user):
+        batch = UploadBatch.objects.create(created_by=user, total_count=5)
+        out = StringIO()
+        call_command("repair_batch_counters", "--json", stdout=out)
+
+        assert json.loads(out.getvalue())["repaired"] == 1
+        batch.refresh_from_db()
+        assert batch.total_count == 0
+
+    def test_dry_run_writes_nothing(self, user):
+        batch = UploadBatch.objects.create(created_by=user, total_count=5)
+        out = StringIO()
+        call_command("repair_batch_counters", str(batch.pk), "--dry-run", stdout=out)
+
+        assert "would repair 1" in out.getvalue()
+        batch.refresh_from_db()
+        assert batch.total_count == 5
@@ -0,0 +1,137 @@
+"""Unit tests for the Merkle tree hash over upload session parts."""
+
+import hashlib
+import io
+
+import pytest
+from django.core.exceptions import ValidationError
+
+from portal.models import UploadFile
+from portal.services.chunks import part_range, stage_upload_part
+from portal.services.integrity import (
+    frontier_append,
+    frontier_root,
+    frontier_size,
+    inclusion_proof,
+    leaf_hash,
+    node_hash,
+    tree_root,
+    verify_inclusion,
+)
+from portal.services.sessions import (
+    accept_upload_part,
+    complete_upload_session,
+    start_upload_session,
+    upload_part_proof,
+)
+
+CONTENT = bytes(range(256)) * 40  # 10240 bytes
+
+
+def _digests(n):
+    return [hashlib.sha256(str(i).encode()).hexdigest() for i in range(n)]
+
+
+class TestTreeHash:
+    """Tests for the pure tree hash functions."""
+
+    def test_single_and_pair(self):
+        a, b = _digests(2)
+        assert tree_root([a]) == leaf_hash(a)
+        assert tree_root([a, b]) == node_hash(leaf_hash(a), leaf_hash(b))
+        assert tree_root([]) == ""
+
+    def test_order_matters(self):
+        a, b = _digests(2)
+        assert tree_root([a, b]) != tree_root([b, a])
+
+    @pytest.mark.parametrize("n", range(1, 18))
+    def test_frontier_matches_tree_root(self, n):
+        digests = _digests(n)
+        frontier = []
+        for digest in digests:
+            frontier_append(frontier, digest)
+        assert frontier_size(frontier) == n
+        assert len(frontier) == bin(n).count("1")
+        assert frontier_root(frontier) == tree_root(digests)
+
+    @pytest.mark.parametrize("n", [1, 2, 3, 5, 8, 13])
+    def test_inclusion_proofs_verify(self, n):
+        digests = _digests(n)
+        root = tree_root(digests)
+        for i, digest in enumerate(digests):
+            proof = inclusion_proof(digests, i)
+            assert verify_inclusion(digest, i, n, proof, root)
+            assert not verify_inclusion(_digests(n + 1)[-1], i, n, proof, root)
+            if n > 1:
+                assert not verify_inclusion(digest, (i + 1) % n, n, proof, root)
+
+
+@pytest.fixture
+def session(user, tmp_path, settings):
+    """A 10240-byte session with 4096-byte parts (3 parts)."""
+    settings.MEDIA_ROOT = tmp_path / "media"
+    settings.FILE_UPLOAD_SESSION_DIR = tmp_path / "sessions"
+    return start_upload_session(user, "data.bin", len(CONTENT), 4096)
+
+
+def _accept(session, n):
+    offset, size = part_range(session, n)
+    staged = stage_upload_part(session, n, io.BytesIO(CONTENT[offset : offset + size]))
+    return accept_upload_part(session, staged)[0]
+
+
+def _part_digests():
+    return [hashlib.sha256(CONTENT[i : i + 4096]).hexdigest() for i in (0, 4096, 8192)]
+
+
+@pytest.mark.django_db
+class TestSessionTreeHash:
+    """Tests for the incremental session tree hash."""
+
+    def test_frontier_folds_only_consecutive_parts(self, session):
+        _accept(session, 2)
+        session.refresh_from_db()
+        assert session.tree_frontier == []
+
+        _accept(session, 1)  # Closes the gap: folds parts 1 and 2
+        session.refresh_from_db()
+        assert frontier_size(session.tree_frontier) == 2
+
+    @pytest.mark.parametrize("order", [(1, 2, 3), (3, 1, 2), (2, 3, 1)])
+    def test_tree_hash_independent_of_arrival_order(self, session, order):
+        for n in order:
+            _accept(session, n)
+        session = complete_upload_session(session)
+
+        expected = tree_root(_part_digests())
+        assert session.tree_sha256 == expected
+        assert UploadFile.objects.get(pk=session.file_id).tree_sha256 == expected
+
+    def test_complete_verifies_expected_tree_hash(self, session):
+        for n in (1, 2, 3):
+            _accept(session, n)
+        with pytest.raises(ValidationError) as exc:
+            complete_upload_session(session, expected_tree_sha256="0" * 64)
+        assert exc.value.code == "tree_hash_mismatch"
+
+        expected = tree_root(_part_digests())
+        session = complete_upload_session(session, expected_tree_sha256=expected)
+        assert session.tree_sha256 == expected
+
+    def test_part_proof_verifies_range(self, session):
+        for n in (1, 2, 3):
+            _accept(session, n)
+        with pytest.raises(ValueError):
+            upload_part_proof(session, 2)
+
+        session = complete_upload_session(session)
+        proof = upload_part_proof(session, 2)
+        start, end = proof["offset_bytes"], proof["offset_bytes"] + proof["size_bytes"]
+        assert verify_inclusion(
+            hashlib.sha256(CONTENT[start:end]).hexdigest(),
+            1,
+            proof["total_parts"],
+            proof["proof"],
+            proof["tree_sha256"],
+        )
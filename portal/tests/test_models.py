@@ -230,6 +230,7 @@ class TestModelDefaults:
         assert set(UploadSession.Status.values) == {
             "init",
             "in_progress",
+            "completing",
             "complete",
             "failed",
             "aborted",
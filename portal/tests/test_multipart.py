@@ -0,0 +1,156 @@
+"""Tests for S3 multipart passthrough of chunked sessions (moto stand-in)."""
+
+import hashlib
+import io
+import os
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.db import DatabaseError
+from moto import mock_aws
+
+from portal.models import UploadFile, UploadSession
+from portal.services.chunks import part_range, staging_path
+from portal.services.multipart import (
+    S3_MAX_PART_SIZE,
+    S3_MIN_PART_SIZE,
+    open_multipart_upload,
+    upload_multipart_part,
+    validate_multipart_layout,
+)
+from portal.services.sessions import (
+    accept_upload_part,
+    complete_upload_session,
+    create_upload_session,
+    start_upload_session,
+)
+
+BUCKET = "doorito-test"
+CONTENT = os.urandom(S3_MIN_PART_SIZE + 1000)  # Two parts at the minimum size
+
+
+@pytest.fixture
+def s3(settings, monkeypatch, tmp_path):
+    """Point default storage at a moto-backed S3 bucket."""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    settings.AWS_STORAGE_BUCKET_NAME = BUCKET
+    settings.AWS_S3_REGION_NAME = "us-east-1"
+    settings.AWS_S3_ENDPOINT_URL = None
+    settings.AWS_ACCESS_KEY_ID = "testing"
+    settings.AWS_SECRET_ACCESS_KEY = "testing"
+    settings.FILE_UPLOAD_SESSION_DIR = tmp_path / "sessions"
+    with mock_aws():
+        client = boto3.client("s3", region_name="us-east-1")
+        client.create_bucket(Bucket=BUCKET)
+        settings.STORAGES = {
+            **settings.STORAGES,
+            "default": {"BACKEND": "storages.backends.s3.S3Storage"},
+        }
+        yield client
+
+
+def _send_all(session):
+    for n in (2, 1):
+        offset, size = part_range(session, n)
+        stream = io.BytesIO(CONTENT[offset : offset + size])
+        accept_upload_part(session, upload_multipart_part(session, n, stream))
+
+
+@pytest.mark.django_db
+class TestMultipartSessions:
+    """Chunked sessions on S3 storage."""
+
+    def test_session_opens_multipart_upload(self, user, s3):
+        session = start_upload_session(user, "big.bin", len(CONTENT))
+
+        assert session.multipart_upload_id
+        uploads = s3.list_multipart_uploads(Bucket=BUCKET)["Uploads"]
+        assert [u["UploadId"] for u in uploads] == [session.multipart_upload_id]
+
+    def test_small_chunks_rejected(self, user, s3):
+        with pytest.raises(ValidationError) as exc:
+            start_upload_session(user, "big.bin", len(CONTENT), 1024)
+        assert exc.value.code == "chunk_too_small"
+
+    def test_oversized_parts_rejected(self):
+        with pytest.raises(ValidationError) as exc:
+            validate_multipart_layout(S3_MAX_PART_SIZE * 2, S3_MAX_PART_SIZE + 1)
+        assert exc.value.code == "chunk_too_large"
+        # A single part may use a large chunk size if the file itself fits
+        validate_multipart_layout(S3_MAX_PART_SIZE, S3_MAX_PART_SIZE * 2)
+
+    def test_failed_open_fails_session(self, user, s3):
+        s3.delete_bucket(Bucket=BUCKET)
+
+        with pytest.raises(ClientError, match="NoSuchBucket"):
+            start_upload_session(user, "big.bin", len(CONTENT))
+
+        session = UploadSession.objects.get()
+        assert session.status == UploadSession.Status.FAILED
+        assert not session.multipart_upload_id
+        assert session.file.status == UploadFile.Status.FAILED
+
+    def test_open_aborted_when_upload_id_not_saved(self, user, s3, monkeypatch):
+        upload = UploadFile.objects.create(
+            uploaded_by=user,
+            file="uploads/big.bin",
+            original_filename="big.bin",
+            content_type="application/octet-stream",
+            size_bytes=len(CONTENT),
+            status=UploadFile.Status.UPLOADING,
+        )
+        session = create_upload_session(upload, len(CONTENT))
+
+        def fail(*args, **kwargs):
+            raise DatabaseError("connection lost")
+
+        monkeypatch.setattr(session, "save", fail)
+        with pytest.raises(DatabaseError):
+            open_multipart_upload(session)
+
+        assert "Uploads" not in s3.list_multipart_uploads(Bucket=BUCKET)
+
+    def test_parts_stream_to_s3_and_complete_server_side(self, user, s3):
+        session = start_upload_session(user, "big.bin", len(CONTENT))
+        _send_all(session)
+
+        part = session.parts.get(part_number=1)
+        assert part.temp_storage_key.startswith('"')  # S3 ETag
+        assert not os.path.exists(staging_path(session))
+
+        complete_upload_session(session)
+
+        upload = UploadFile.objects.get(pk=session.file_id)
+        assert upload.status == UploadFile.Status.STORED
+        with default_storage.open(upload.file.name) as fh:
+            assert fh.read() == CONTENT
+        assert "Uploads" not in s3.list_multipart_uploads(Bucket=BUCKET)
+
+    def test_expected_sha256_verified(self, user, s3):
+        session = start_upload_session(user, "big.bin", len(CONTENT))
+        _send_all(session)
+        expected = hashlib.sha256(CONTENT).hexdigest()
+
+        complete_upload_session(session, expected_sha256=expected)
+
+        assert UploadFile.objects.get(pk=session.file_id).sha256 == expected
+
+    def test_sha256_mismatch_fails_session(self, user, s3):
+        session = start_upload_session(user, "big.bin", len(CONTENT))
+        _send_all(session)
+
+        with pytest.raises(ValidationError):
+            complete_upload_session(session, expected_sha256="0" * 64)
+
+        session.refresh_from_db()
+        assert session.status == UploadSession.Status.FAILED
+        assert s3.list_objects_v2(Bucket=BUCKET)["KeyCount"] == 0
+
+    def test_deleting_open_session_aborts_upload(self, user, s3):
+        session = start_upload_session(user, "big.bin", len(CONTENT))
+        session.file.delete()
+        assert "Uploads" not in s3.list_multipart_uploads(Bucket=BUCKET)
@@ -7,17 +7,25 @@ import pytest
 from common.models import OutboxEvent
 from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from portal.models import UploadBatch, UploadFile
 from portal.services.uploads import (
+    adjust_batch_counters,
     compute_sha256,
     create_batch,
     create_upload_file,
+    create_upload_files,
+    deferred_batch_counters,
     finalize_batch,
     mark_file_failed,
     notify_expiring_files,
+    prepare_upload_files,
+    recompute_batch_counters,
+    record_upload_file,
     validate_file,
 )
 
@@ -124,6 +132,108 @@ class TestCreateUploadFile:
         assert upload.status == UploadFile.Status.STORED
 
 
+class TestPrepareUploadFiles:
+    """Tests for prepare_upload_files / record_upload_file."""
+
+    @pytest.mark.parametrize("workers", [1, 4])
+    def test_results_keep_input_order(self, tmp_path, settings, workers):
+        """Prepared results line up with the input files."""
+        settings.MEDIA_ROOT = tmp_path
+        files = [SimpleUploadedFile(f"doc{i}.pdf", b"x" * i) for i in range(1, 9)]
+        prepared = prepare_upload_files(files, max_workers=workers)
+
+        assert [p["name"] for p in prepared] == [f.name for f in files]
+        assert [p["size_bytes"] for p in prepared] == list(range(1, 9))
+        assert prepared[2]["sha256"] == hashlib.sha256(b"xxx").hexdigest()
+        for p in prepared:
+            assert (tmp_path / p["storage_key"]).exists()
+
+    def test_validation_failure_is_reported_not_raised(self, tmp_path, settings):
+        """A failing file does not abort the rest of the batch."""
+        settings.MEDIA_ROOT = tmp_path
+        settings.FILE_UPLOAD_MAX_SIZE = 10
+        files = [
+            SimpleUploadedFile("ok.pdf", b"small"),
+            SimpleUploadedFile("big.pdf", b"x" * 100),
+        ]
+        ok, big = prepare_upload_files(files, max_workers=2)
+
+        assert ok["error"] == ""
+        assert "exceeds maximum" in big["error"]
+
+    @pytest.mark.django_db
+    def test_record_creates_rows_in_order(self, user, tmp_path, settings):
+        """Rows are recorded in input order against the batch."""
+        settings.MEDIA_ROOT = tmp_path
+        batch = UploadBatch.objects.create(created_by=user)
+        files = [SimpleUploadedFile(f"doc{i}.pdf", b"data") for i in range(3)]
+        uploads = [
+            record_upload_file(user, p, batch=batch)
+            for p in prepare_upload_files(files)
+        ]
+
+        assert [u.original_filename for u in uploads] == [f.name for f in files]
+        assert list(
+            batch.files.order_by("pk").values_list("original_filename", flat=True)
+        ) == [f.name for f in files]
+
+
+@pytest.mark.django_db
+class TestCreateUploadFiles:
+    """Tests for create_upload_files bulk service."""
+
+    def test_creates_rows_and_events_in_order(self, user, tmp_path, settings):
+        """Stored files get one file.stored event each; failures get none."""
+        settings.MEDIA_ROOT = tmp_path
+        settings.FILE_UPLOAD_MAX_SIZE = 10
+        batch = UploadBatch.objects.create(created_by=user)
+        files = [
+            SimpleUploadedFile("a.pdf", b"aaa"),
+            SimpleUploadedFile("big.pdf", b"x" * 100),
+            SimpleUploadedFile("c.pdf", b"ccc"),
+        ]
+        uploads = create_upload_files(user, files, batch=batch)
+
+        assert [u.original_filename for u in uploads] == ["a.pdf", "big.pdf", "c.pdf"]
+        assert [u.status for u in uploads] == [
+            UploadFile.Status.STORED,
+            UploadFile.Status.FAILED,
+            UploadFile.Status.STORED,
+        ]
+        assert batch.files.count() == 3
+        event_ids = set(
+            OutboxEvent.objects.filter(event_type="file.stored").values_list(
+                "aggregate_id", flat=True
+            )
+        )
+        assert event_ids == {str(uploads[0].pk), str(uploads[2].pk)}
+
+    def test_single_commit_dispatch(
+        self, user, tmp_path, settings, django_capture_on_commit_callbacks
+    ):
+        """The whole batch schedules one delivery task."""
+        settings.MEDIA_ROOT = tmp_path
+        files = [SimpleUploadedFile(f"{i}.pdf", b"data") for i in range(4)]
+        with django_capture_on_commit_callbacks() as callbacks:
+            create_upload_files(user, files)
+        assert len(callbacks) == 1
+
+    def test_dedup_mode_acquires_grouped_references(self, user, tmp_path, settings):
+        """Identical contents in one batch take one grouped blob reference."""
+        settings.MEDIA_ROOT = tmp_path
+        settings.FILE_UPLOAD_DEDUPLICATE = True
+        files = [
+            SimpleUploadedFile("a.pdf", b"same"),
+            SimpleUploadedFile("b.pdf", b"same"),
+            SimpleUploadedFile("c.pdf", b"other"),
+        ]
+        uploads = create_upload_files(user, files)
+
+        assert uploads[0].blob_id == uploads[1].blob_id != uploads[2].blob_id
+        assert uploads[0].blob.ref_count == 2
+        assert uploads[2].blob.ref_count == 1
+
+
 @pytest.mark.django_db
 class TestMarkFileFailed:
     """Tests for mark_file_failed service."""
@@ -196,6 +306,117 @@ class TestFinalizeBatch:
         assert result.status == UploadBatch.Status.FAILED
 
 
+@pytest.mark.django_db
+class TestBatchCounters:
+    """Tests for the denormalized UploadBatch file counters."""
+
+    def _counters(self, batch):
+        batch.refresh_from_db()
+        return batch.total_count, batch.stored_count, batch.failed_count
+
+    def test_create_and_fail_update_counters(self, user, tmp_path, settings):
+        settings.MEDIA_ROOT = tmp_path
+        batch = create_batch(user)
+        create_upload_files(
+            user,
+            [SimpleUploadedFile("a.pdf", b"a"), SimpleUploadedFile("b.pdf", b"b")],
+            batch=batch,
+        )
+        upload = create_upload_file(user, SimpleUploadedFile("c.pdf", b"c"), batch)
+        assert self._counters(batch) == (3, 3, 0)
+
+        mark_file_failed(upload, "virus")
+        mark_file_failed(upload, "virus again")  # Already FAILED: no change
+        assert self._counters(batch) == (3, 2, 1)
+
+        upload.delete()
+        assert self._counters(batch) == (2, 2, 0)
+
+    def test_directly_created_file_is_counted(self, user, tmp_path, settings):
+        """Files created outside the services are counted, then uncounted."""
+        settings.MEDIA_ROOT = tmp_path
+        batch = create_batch(user)
+        upload = UploadFile.objects.create(
+            uploaded_by=user,
+            batch=batch,
+            file=SimpleUploadedFile("a.pdf", b"a"),
+            original_filename="a.pdf",
+            size_bytes=1,
+            status=UploadFile.Status.FAILED,
+        )
+        assert self._counters(batch) == (1, 0, 1)
+
+        upload.delete()
+
+        assert self._counters(batch) == (0, 0, 0)
+        assert recompute_batch_counters([batch.pk])["repaired"] == 0
+
+    def test_deferred_deltas_applied_once_per_batch(self, user, tmp_path, settings):
+        settings.MEDIA_ROOT = tmp_path
+        batch = create_batch(user)
+        create_upload_files(
+            user,
+            [SimpleUploadedFile(f"{n}.pdf", b"x") for n in range(3)],
+            batch=batch,
+        )
+        upload = UploadFile.objects.filter(batch=batch).first()
+        mark_file_failed(upload, "virus")
+
+        with CaptureQueriesContext(connection) as queries, deferred_batch_counters():
+            UploadFile.objects.filter(batch=batch).delete()
+
+        batch_updates = [
+            q["sql"]
+            for q in queries.captured_queries
+            if q["sql"].startswith('UPDATE "portal_upload_batch"')
+        ]
+        assert len(batch_updates) == 1
+        assert self._counters(batch) == (0, 0, 0)
+
+    def test_deferred_deltas_dropped_on_error(self, user):
+        batch = create_batch(user)
+        adjust_batch_counters(batch.pk, total=2, stored=2)
+
+        with pytest.raises(RuntimeError), deferred_batch_counters():
+            adjust_batch_counters(batch.pk, total=-1, stored=-1)
+            raise RuntimeError
+
+        assert self._counters(batch) == (2, 2, 0)
+
+    def test_negative_deltas_clamped_at_zero(self, user):
+        batch = create_batch(user)
+        adjust_batch_counters(batch.pk, total=1, failed=1)
+
+        adjust_batch_counters(batch.pk, total=-3, stored=-1, failed=-2)
+
+        assert self._counters(batch) == (0, 0, 0)
+
+    def test_finalize_reads_no_file_rows(
+        self, user, tmp_path, settings, django_assert_num_queries
+    ):
+        settings.MEDIA_ROOT = tmp_path
+        batch = create_batch(user)
+        create_upload_file(user, SimpleUploadedFile("a.pdf", b"a"), batch)
+
+        # Savepoint, locked counter read, status update, release
+        with django_assert_num_queries(4):
+            result = finalize_batch(batch)
+        assert result.status == UploadBatch.Status.COMPLETE
+
+    def test_recompute_repairs_drift(self, user, tmp_path, settings):
+        settings.MEDIA_ROOT = tmp_path
+        batch = create_batch(user)
+        create_upload_file(user, SimpleUploadedFile("a.pdf", b"a"), batch)
+        UploadBatch.objects.filter(pk=batch.pk).update(
+            total_count=9, stored_count=0, failed_count=4
+        )
+
+        assert recompute_batch_counters(dry_run=True) == {"checked": 1, "repaired": 1}
+        assert self._counters(batch) == (9, 0, 4)
+        assert recompute_batch_counters([batch.pk]) == {"checked": 1, "repaired": 1}
+        assert self._counters(batch) == (1, 1, 0)
+
+
 @pytest.mark.django_db
 class TestCreateUploadFileOutboxEvent:
     """Tests for file.stored outbox event emission in create_upload_file."""
@@ -307,3 +528,25 @@ class TestNotifyExpiringFiles:
 
         event = OutboxEvent.objects.get(event_type="file.expiring")
         assert "expires_at" in event.payload
+
+    def test_spent_budget_resumes_from_cursor(self, user, tmp_path, settings):
+        """A sweep out of budget returns a cursor the next run resumes from."""
+        from common.services import sweep
+
+        for _ in range(3):
+            self._create_old_upload(user, tmp_path, settings, hours_ago=23.5)
+        OutboxEvent.objects.filter(event_type="file.stored").delete()
+
+        original = sweep.SWEEP_CHUNK_SIZE
+        sweep.SWEEP_CHUNK_SIZE = 2
+        try:
+            first = notify_expiring_files(ttl_hours=24, notify_hours=1, budget=0)
+            second = notify_expiring_files(
+                ttl_hours=24, notify_hours=1, cursor=first["cursor"], budget=0
+            )
+        finally:
+            sweep.SWEEP_CHUNK_SIZE = original
+
+        assert (first["notified"], first["done"]) == (2, False)
+        assert (second["notified"], second["skipped"], second["done"]) == (1, 0, True)
+        assert OutboxEvent.objects.filter(event_type="file.expiring").count() == 3
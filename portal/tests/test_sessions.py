@@ -1,13 +1,20 @@
 """Unit tests for upload session services."""
 
+from unittest import mock
+
 import pytest
+from django.core.exceptions import ValidationError
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.utils import timezone
 
 from portal.models import UploadFile, UploadSession
+from portal.services.bitmap import has_part, missing_parts
 from portal.services.sessions import (
+    COMPLETION_TIMEOUT,
     complete_upload_session,
     create_upload_session,
     record_upload_part,
+    record_upload_parts,
 )
 
 
@@ -77,6 +84,93 @@ class TestRecordUploadPart:
         assert session.bytes_received == 500
         assert session.status == UploadSession.Status.IN_PROGRESS
 
+    def test_sets_received_bit(self, upload_file):
+        """Recording a part sets its bit in the received_parts bitmap."""
+        session = create_upload_session(
+            upload_file, total_size_bytes=1000, chunk_size_bytes=100
+        )
+        record_upload_part(session, part_number=3, offset_bytes=200, size_bytes=100)
+
+        session.refresh_from_db()
+        assert has_part(session.received_parts, 3)
+        assert list(missing_parts(session.received_parts, 10)) == [
+            1,
+            2,
+            *range(4, 11),
+        ]
+
+    def test_rerecorded_part_does_not_inflate_counters(self, upload_file):
+        """A part recorded again (its bit already set) is not counted twice."""
+        session = create_upload_session(upload_file, total_size_bytes=1000)
+        part = record_upload_part(
+            session, part_number=1, offset_bytes=0, size_bytes=500
+        )
+        part.delete()
+        record_upload_part(session, part_number=1, offset_bytes=0, size_bytes=500)
+
+        session.refresh_from_db()
+        assert session.completed_parts == 1
+        assert session.bytes_received == 500
+
+
+def _staged(n, sha256=None, size=100):
+    return {
+        "part_number": n,
+        "offset_bytes": (n - 1) * size,
+        "size_bytes": size,
+        "sha256": sha256 or f"{n:064x}",
+        "temp_storage_key": "",
+    }
+
+
+@pytest.mark.django_db
+class TestRecordUploadParts:
+    """Tests for record_upload_parts service."""
+
+    def test_records_manifest_in_few_queries(
+        self, upload_file, django_assert_max_num_queries
+    ):
+        """A whole manifest costs a constant number of queries."""
+        session = create_upload_session(
+            upload_file, total_size_bytes=10_000, chunk_size_bytes=100
+        )
+        with django_assert_max_num_queries(10):
+            results = record_upload_parts(session, [_staged(n) for n in range(1, 101)])
+
+        assert all(created for _part, created in results)
+        session.refresh_from_db()
+        assert session.completed_parts == 100
+        assert session.bytes_received == 10_000
+        assert list(missing_parts(session.received_parts, 100)) == []
+
+    def test_duplicates_are_idempotent(self, upload_file):
+        """Known parts and repeats within the manifest are not recounted."""
+        session = create_upload_session(
+            upload_file, total_size_bytes=1000, chunk_size_bytes=100
+        )
+        record_upload_parts(session, [_staged(1)])
+        results = record_upload_parts(session, [_staged(1), _staged(2), _staged(2)])
+
+        assert [(p.part_number, created) for p, created in results] == [
+            (1, False),
+            (2, True),
+        ]
+        session.refresh_from_db()
+        assert session.completed_parts == 2
+        assert session.bytes_received == 200
+
+    def test_conflict_rejects_whole_manifest(self, upload_file):
+        """A part received with other content fails the manifest."""
+        session = create_upload_session(
+            upload_file, total_size_bytes=1000, chunk_size_bytes=100
+        )
+        record_upload_parts(session, [_staged(1)])
+        with pytest.raises(ValidationError) as exc:
+            record_upload_parts(session, [_staged(2), _staged(1, sha256="f" * 64)])
+
+        assert exc.value.code == "part_conflict"
+        assert session.parts.count() == 1
+
 
 @pytest.mark.django_db
 class TestCompleteUploadSession:
@@ -109,3 +203,111 @@ class TestCompleteUploadSession:
 
         with pytest.raises(ValueError, match="received 1 of 2 parts"):
             complete_upload_session(session)
+
+    def test_completed_session_is_returned_unchanged(self, upload_file):
+        """A second complete is a no-op that returns the COMPLETE session."""
+        session = create_upload_session(
+            upload_file,
+            total_size_bytes=1000,
+            chunk_size_bytes=500,
+        )
+        record_upload_part(session, part_number=1, offset_bytes=0, size_bytes=500)
+        record_upload_part(session, part_number=2, offset_bytes=500, size_bytes=500)
+        complete_upload_session(session)
+        stale = UploadSession.objects.get(pk=session.pk)
+        stale.status = UploadSession.Status.IN_PROGRESS  # Loaded before the first
+
+        result = complete_upload_session(stale)
+
+        assert result.status == UploadSession.Status.COMPLETE
+        assert result.updated_at == session.updated_at
+        upload_file.refresh_from_db()
+        assert upload_file.status == UploadFile.Status.STORED
+
+    @pytest.mark.parametrize(
+        "status", [UploadSession.Status.FAILED, UploadSession.Status.ABORTED]
+    )
+    def test_closed_session_raises_session_closed(self, upload_file, status):
+        session = create_upload_session(
+            upload_file,
+            total_size_bytes=500,
+            chunk_size_bytes=500,
+        )
+        record_upload_part(session, part_number=1, offset_bytes=0, size_bytes=500)
+        UploadSession.objects.filter(pk=session.pk).update(status=status)
+
+        with pytest.raises(ValidationError) as exc:
+            complete_upload_session(session)
+
+        assert exc.value.code == "session_closed"
+        upload_file.refresh_from_db()
+        assert upload_file.status == UploadFile.Status.UPLOADING
+
+    def _received_session(self, upload_file):
+        session = create_upload_session(
+            upload_file,
+            total_size_bytes=500,
+            chunk_size_bytes=500,
+        )
+        record_upload_part(session, part_number=1, offset_bytes=0, size_bytes=500)
+        return session
+
+    def test_completing_session_raises_session_completing(self, upload_file):
+        """A complete while another request places the file is refused."""
+        session = self._received_session(upload_file)
+        UploadSession.objects.filter(pk=session.pk).update(
+            status=UploadSession.Status.COMPLETING, updated_at=timezone.now()
+        )
+
+        with pytest.raises(ValidationError) as exc:
+            complete_upload_session(session)
+
+        assert exc.value.code == "session_completing"
+        upload_file.refresh_from_db()
+        assert upload_file.status == UploadFile.Status.UPLOADING
+
+    def test_completing_session_refuses_parts(self, upload_file):
+        session = create_upload_session(
+            upload_file, total_size_bytes=1000, chunk_size_bytes=500
+        )
+        UploadSession.objects.filter(pk=session.pk).update(
+            status=UploadSession.Status.COMPLETING
+        )
+
+        with pytest.raises(ValidationError) as exc:
+            record_upload_parts(session, [_staged(1)])
+
+        assert exc.value.code == "session_closed"
+
+    def test_abandoned_completion_is_taken_over(self, upload_file):
+        """A session left COMPLETING past the timeout is completed."""
+        session = self._received_session(upload_file)
+        UploadSession.objects.filter(pk=session.pk).update(
+            status=UploadSession.Status.COMPLETING,
+            updated_at=timezone.now() - COMPLETION_TIMEOUT * 2,
+        )
+
+        result = complete_upload_session(session)
+
+        assert result.status == UploadSession.Status.COMPLETE
+        upload_file.refresh_from_db()
+        assert upload_file.status == UploadFile.Status.STORED
+
+    def test_failed_placement_reopens_session(self, upload_file):
+        """Placement runs outside the lock; an error hands the session back."""
+        session = self._received_session(upload_file)
+
+        with (
+            mock.patch(
+                "portal.services.sessions._place_session_file",
+                side_effect=OSError("disk full"),
+            ),
+            pytest.raises(OSError),
+        ):
+            complete_upload_session(session)
+
+        session.refresh_from_db()
+        assert session.status == UploadSession.Status.IN_PROGRESS
+        assert complete_upload_session(session).status == (
+            UploadSession.Status.COMPLETE
+        )
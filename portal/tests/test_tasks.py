@@ -6,8 +6,11 @@ import pytest
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.utils import timezone
 
-from portal.models import UploadFile
-from portal.tasks import cleanup_expired_upload_files_task
+from portal.models import PortalEventOutbox, UploadBatch, UploadFile
+from portal.tasks import (
+    cleanup_expired_upload_files_task,
+    cleanup_portal_event_outbox_task,
+)
 
 
 @pytest.fixture
@@ -46,7 +49,30 @@ class TestCleanupExpiredUploadFilesTask:
     def test_no_expired_uploads(self, user, _media_root):
         """No expired upload files returns deleted=0, remaining=0."""
         result = cleanup_expired_upload_files_task()
-        assert result == {"deleted": 0, "remaining": 0}
+        assert result == {
+            "deleted": 0,
+            "remaining": 0,
+            "rows_per_sec": 0.0,
+            "done": True,
+            "cursor": None,
+        }
+
+    def test_batch_counters_follow_deleted_files(self, user, make_upload):
+        batch = UploadBatch.objects.create(created_by=user)
+        for status in (UploadFile.Status.STORED, UploadFile.Status.FAILED):
+            upload = make_upload(hours_old=25, status=status)
+            UploadFile.objects.filter(pk=upload.pk).update(batch=batch)
+        kept = make_upload(hours_old=1)
+        UploadFile.objects.filter(pk=kept.pk).update(batch=batch)
+        UploadBatch.objects.filter(pk=batch.pk).update(
+            total_count=3, stored_count=2, failed_count=1
+        )
+
+        result = cleanup_expired_upload_files_task()
+
+        assert result["deleted"] == 2
+        batch.refresh_from_db()
+        assert (batch.total_count, batch.stored_count, batch.failed_count) == (1, 1, 0)
 
     def test_expired_upload_deleted(self, make_upload, tmp_path):
         """Expired upload file with file on disk deletes both record and file."""
@@ -78,15 +104,22 @@ class TestCleanupExpiredUploadFilesTask:
 
         result = cleanup_expired_upload_files_task()
 
-        assert result == {"deleted": 0, "remaining": 0}
+        assert result == {
+            "deleted": 0,
+            "remaining": 0,
+            "rows_per_sec": 0.0,
+            "done": True,
+            "cursor": None,
+        }
         assert UploadFile.objects.filter(pk=upload.pk).exists()
 
     def test_batch_limit_honored(self, make_upload, settings):
-        """Only BATCH_SIZE upload files are deleted per run."""
+        """A run out of time budget stops after one BATCH_SIZE chunk."""
         from portal import tasks
 
         original_batch_size = tasks.BATCH_SIZE
         tasks.BATCH_SIZE = 3
+        settings.SWEEP_TIME_BUDGET_SECONDS = 0
 
         try:
             for _ in range(5):
@@ -96,6 +129,41 @@ class TestCleanupExpiredUploadFilesTask:
 
             assert result["deleted"] == 3
             assert result["remaining"] == 2
+            assert result["done"] is False
+            assert result["cursor"] is not None
             assert UploadFile.objects.count() == 2
         finally:
             tasks.BATCH_SIZE = original_batch_size
+
+
+@pytest.mark.django_db
+class TestCleanupPortalEventOutboxTask:
+    """Tests for cleanup_portal_event_outbox_task (plain-table fallback)."""
+
+    def _make_entry(self, key, status, hours_old):
+        entry = PortalEventOutbox.objects.create(
+            aggregate_type="UploadFile",
+            aggregate_id=key,
+            event_type="file.stored",
+            idempotency_key=key,
+            status=status,
+        )
+        PortalEventOutbox.objects.filter(pk=entry.pk).update(
+            created_at=timezone.now() - timedelta(hours=hours_old)
+        )
+        return entry
+
+    def test_deletes_only_old_terminal_entries(self, settings):
+        settings.OUTBOX_RETENTION_HOURS = 24
+        self._make_entry("a", PortalEventOutbox.Status.DELIVERED, 48)
+        self._make_entry("b", PortalEventOutbox.Status.FAILED, 48)
+        old_pending = self._make_entry("c", PortalEventOutbox.Status.PENDING, 48)
+        young = self._make_entry("d", PortalEventOutbox.Status.DELIVERED, 1)
+
+        result = cleanup_portal_event_outbox_task()
+
+        assert result["deleted"] == 2
+        assert result["partitions_dropped"] == 0
+        assert result["done"] is True
+        remaining = set(PortalEventOutbox.objects.values_list("pk", flat=True))
+        assert remaining == {old_pending.pk, young.pk}
@@ -0,0 +1,106 @@
+"""Unit tests for the hashing upload handlers."""
+
+import hashlib
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import StopFutureHandlers
+from django.test import Client
+
+from portal.models import UploadFile
+from portal.services.uploads import compute_sha256, validate_file
+from portal.upload_handlers import (
+    HashingMemoryFileUploadHandler,
+    HashingTemporaryFileUploadHandler,
+    sniff_content_type,
+)
+
+
+def _stream(handler, name, content, chunk_size=4):
+    """Feed content through an upload handler the way MultiPartParser does."""
+    handler.new_file("files", name, "application/octet-stream", len(content))
+    for start in range(0, len(content), chunk_size):
+        handler.receive_data_chunk(content[start : start + chunk_size], start)
+    return handler.file_complete(len(content))
+
+
+class TestSniffContentType:
+    """Tests for sniff_content_type()."""
+
+    def test_pdf_signature(self):
+        assert sniff_content_type(b"%PDF-1.7\n") == "application/pdf"
+
+    def test_png_signature(self):
+        assert sniff_content_type(b"\x89PNG\r\n\x1a\n\x00") == "image/png"
+
+    def test_unknown_returns_none(self):
+        assert sniff_content_type(b"plain text") is None
+
+
+class TestHashingHandlers:
+    """Tests for hashing upload handlers."""
+
+    def test_memory_handler_attaches_sha256_and_sniff(self):
+        content = b"%PDF-1.4 streamed body"
+        handler = HashingMemoryFileUploadHandler()
+        handler.activated = True
+        with pytest.raises(StopFutureHandlers):
+            handler.new_file("files", "doc", "application/pdf", len(content))
+
+        for start in range(0, len(content), 5):
+            handler.receive_data_chunk(content[start : start + 5], start)
+        file = handler.file_complete(len(content))
+
+        assert file.sha256 == hashlib.sha256(content).hexdigest()
+        assert file.sniffed_content_type == "application/pdf"
+        assert file.size == len(content)
+
+    def test_inactive_memory_handler_does_not_hash(self):
+        handler = HashingMemoryFileUploadHandler()
+        handler.activated = False
+        handler.new_file("files", "doc", "application/pdf", 3)
+        assert handler.receive_data_chunk(b"abc", 0) == b"abc"
+        assert handler.file_complete(3) is None
+        assert handler._hasher.hexdigest() == hashlib.sha256(b"").hexdigest()
+
+    def test_temporary_handler_attaches_sha256(self):
+        content = b"x" * 1000
+        file = _stream(HashingTemporaryFileUploadHandler(), "big.bin", content, 64)
+        try:
+            assert file.sha256 == hashlib.sha256(content).hexdigest()
+            assert file.sniffed_content_type is None
+            assert file.read() == content
+        finally:
+            file.close()
+
+
+class TestPrecomputedValues:
+    """Services reuse values computed by the handlers."""
+
+    def test_compute_sha256_uses_precomputed_digest(self):
+        file = SimpleUploadedFile("doc.pdf", b"content")
+        file.sha256 = "a" * 64
+        assert compute_sha256(file) == "a" * 64
+
+    def test_validate_file_falls_back_to_sniffed_type(self):
+        file = SimpleUploadedFile("scan", b"%PDF-1.4")
+        file.sniffed_content_type = "application/pdf"
+        content_type, _size = validate_file(file)
+        assert content_type == "application/pdf"
+
+    @pytest.mark.django_db
+    def test_upload_view_stores_streamed_hash(self, user, tmp_path, settings):
+        settings.MEDIA_ROOT = tmp_path
+        settings.STORAGES = {
+            "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+            "staticfiles": {
+                "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+            },
+        }
+        content = b"%PDF-1.4 uploaded through the view"
+        client = Client()
+        client.force_login(user)
+        client.post("/app/upload/", {"files": [SimpleUploadedFile("a.pdf", content)]})
+
+        upload = UploadFile.objects.get()
+        assert upload.sha256 == hashlib.sha256(content).hexdigest()
@@ -0,0 +1,401 @@
+"""Tests for the async portal upload API."""
+
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from asgiref.sync import async_to_sync
+from common.models import OutboxEvent
+from django.conf import settings as django_settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import AsyncClient, Client
+from django.utils.crypto import get_random_string
+
+from portal import views
+from portal.models import UploadBatch, UploadFile, UploadSession
+from portal.services.chunks import stage_upload_part, staging_path
+from portal.services.integrity import tree_root, verify_inclusion
+from portal.services.sessions import accept_upload_part, claim_upload_parts
+
+URL = "/uploads/files/"
+NO_SESSION = "00000000-0000-0000-0000-000000000000"
+
+
+@pytest.fixture
+def client(user, tmp_path, settings):
+    settings.MEDIA_ROOT = tmp_path
+    settings.STORAGES = {
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {
+            "BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"
+        },
+    }
+    client = Client()
+    client.force_login(user)
+    return client
+
+
+def test_view_is_async():
+    assert asyncio.iscoroutinefunction(views.upload_files_view)
+
+
+@pytest.mark.django_db
+class TestUploadFilesView:
+    """Tests for POST /uploads/files/."""
+
+    def test_stores_files_and_returns_batch(self, client):
+        response = client.post(
+            URL,
+            {
+                "files": [
+                    SimpleUploadedFile("a.pdf", b"first"),
+                    SimpleUploadedFile("b.pdf", b"second"),
+                ]
+            },
+        )
+
+        assert response.status_code == 201
+        data = response.json()
+        batch = UploadBatch.objects.get(pk=data["batch_id"])
+        assert data["status"] == UploadBatch.Status.COMPLETE == batch.status
+        assert [f["original_filename"] for f in data["files"]] == ["a.pdf", "b.pdf"]
+        assert data["files"][0]["sha256"] == hashlib.sha256(b"first").hexdigest()
+        assert OutboxEvent.objects.filter(event_type="file.stored").count() == 2
+
+    def test_failed_file_reported(self, client, settings):
+        settings.FILE_UPLOAD_MAX_SIZE = 10
+        response = client.post(
+            URL,
+            {
+                "files": [
+                    SimpleUploadedFile("a.pdf", b"ok"),
+                    SimpleUploadedFile("big.pdf", b"x" * 100),
+                ]
+            },
+        )
+
+        data = response.json()
+        assert data["status"] == UploadBatch.Status.PARTIAL
+        assert data["files"][1]["status"] == UploadFile.Status.FAILED
+        assert "exceeds maximum" in data["files"][1]["error_message"]
+
+    def test_prepare_threads_bounded_by_workers(self, client, settings, monkeypatch):
+        from portal.services import uploads
+
+        settings.FILE_UPLOAD_WORKERS = 2
+        pools = []
+        real_pool = uploads.ThreadPoolExecutor
+
+        def recording_pool(max_workers, **kwargs):
+            pools.append(max_workers)
+            return real_pool(max_workers=max_workers, **kwargs)
+
+        monkeypatch.setattr(uploads, "ThreadPoolExecutor", recording_pool)
+        files = [SimpleUploadedFile(f"{i}.pdf", b"x") for i in range(5)]
+
+        assert client.post(URL, {"files": files}).status_code == 201
+        assert pools == [2]
+
+    def test_no_files_returns_400(self, client):
+        assert client.post(URL, {}).status_code == 400
+
+    def test_too_many_files_returns_400(self, client):
+        files = [
+            SimpleUploadedFile(f"{i}.pdf", b"x")
+            for i in range(views.MAX_FILES_PER_REQUEST + 1)
+        ]
+        assert client.post(URL, {"files": files}).status_code == 400
+        assert not UploadFile.objects.exists()
+
+    def test_unauthenticated_returns_401(self):
+        response = Client().post(URL, {"files": [SimpleUploadedFile("a.pdf", b"x")]})
+        assert response.status_code == 401
+
+    def test_get_not_allowed(self, client):
+        assert client.get(URL).status_code == 405
+
+
+@pytest.mark.django_db
+class TestCsrfProtection:
+    """Session-authenticated unsafe endpoints reject requests without a token."""
+
+    ENDPOINTS = [
+        ("post", URL),
+        ("post", "/uploads/sessions/"),
+        ("put", f"/uploads/sessions/{NO_SESSION}/parts/1"),
+        ("put", f"/uploads/sessions/{NO_SESSION}/parts/1-2"),
+        ("post", f"/uploads/sessions/{NO_SESSION}/complete/"),
+    ]
+
+    @pytest.fixture
+    def csrf_client(self, user):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(user)
+        return client
+
+    @pytest.fixture
+    def csrf_async_client(self, user):
+        client = AsyncClient(enforce_csrf_checks=True)
+        client.force_login(user)
+        return client
+
+    @pytest.mark.parametrize(("method", "url"), ENDPOINTS)
+    def test_missing_token_rejected(self, csrf_client, method, url):
+        response = getattr(csrf_client, method)(
+            url, b"{}", content_type="application/json"
+        )
+        assert response.status_code == 403
+
+    @pytest.mark.parametrize(("method", "url"), ENDPOINTS)
+    def test_missing_token_rejected_under_asgi(self, csrf_async_client, method, url):
+        request = getattr(csrf_async_client, method)
+        response = async_to_sync(request)(url, b"{}", content_type="application/json")
+        assert response.status_code == 403
+
+    def test_token_accepted_under_asgi(self, csrf_async_client, client):
+        token = get_random_string(32)
+        csrf_async_client.cookies[django_settings.CSRF_COOKIE_NAME] = token
+        response = async_to_sync(csrf_async_client.post)(
+            "/uploads/sessions/",
+            {"filename": "big.bin", "size_bytes": 10},
+            content_type="application/json",
+            headers={"X-CSRFToken": token},
+        )
+        assert response.status_code == 201
+
+
+@pytest.mark.django_db
+class TestChunkedSessionViews:
+    """Tests for the chunked session endpoints."""
+
+    @pytest.fixture(autouse=True)
+    def _session_dir(self, tmp_path, settings):
+        settings.FILE_UPLOAD_SESSION_DIR = tmp_path / "sessions"
+
+    def _create(self, client, size, chunk):
+        response = client.post(
+            "/uploads/sessions/",
+            {"filename": "big.bin", "size_bytes": size, "chunk_size_bytes": chunk},
+            content_type="application/json",
+        )
+        assert response.status_code == 201
+        return response.json()
+
+    def _put(self, client, session_id, n, body):
+        return client.put(
+            f"/uploads/sessions/{session_id}/parts/{n}",
+            body,
+            content_type="application/octet-stream",
+        )
+
+    def test_out_of_order_parts_then_complete(self, client, tmp_path):
+        content = os.urandom(10_000)
+        session = self._create(client, len(content), 4096)
+        assert session["total_parts"] == 3
+
+        for n in (3, 1, 2):
+            start = (n - 1) * 4096
+            body = content[start : start + 4096]
+            assert self._put(client, session["id"], n, body).status_code == 201
+
+        response = client.post(f"/uploads/sessions/{session['id']}/complete/")
+        assert response.status_code == 200
+        assert response.json()["status"] == UploadSession.Status.COMPLETE
+        upload = UploadFile.objects.get(pk=session["file_id"])
+        assert (tmp_path / upload.file.name).read_bytes() == content
+
+    def test_retry_and_conflict(self, client):
+        session = self._create(client, 8, 4)
+        assert self._put(client, session["id"], 1, b"abcd").status_code == 201
+        assert self._put(client, session["id"], 1, b"abcd").status_code == 200
+        assert self._put(client, session["id"], 1, b"zzzz").status_code == 409
+
+    def test_bad_part_size_returns_400(self, client):
+        session = self._create(client, 8, 4)
+        response = self._put(client, session["id"], 1, b"abc")
+        assert response.status_code == 400
+        assert response.json()["code"] == "invalid_part_size"
+        # The failed write released its claim, so the part can be resent
+        assert self._put(client, session["id"], 1, b"abcd").status_code == 201
+
+    def test_concurrent_same_part_does_not_overwrite(self, client, tmp_path):
+        """A second upload of a part in flight is refused before it writes."""
+        session_data = self._create(client, 8, 4)
+        session = UploadSession.objects.get(pk=session_data["id"])
+
+        # Request A claims part 1 and writes its bytes...
+        claim = claim_upload_parts(session, [1])["claimed"][1]
+        staged = stage_upload_part(session, 1, io.BytesIO(b"aaaa"))
+        # ...while request B sends other bytes for the same part
+        response = self._put(client, session_data["id"], 1, b"bbbb")
+        assert response.status_code == 409
+        assert response.json()["code"] == "part_in_progress"
+        assert self._put(client, session_data["id"], 1, b"aaaa").status_code == 409
+
+        _part, created = accept_upload_part(session, staged, claim=claim)
+        assert created
+        with open(staging_path(session), "rb") as fh:
+            assert fh.read(4) == b"aaaa"
+        assert self._put(client, session_data["id"], 1, b"bbbb").status_code == 409
+        assert self._put(client, session_data["id"], 1, b"aaaa").status_code == 200
+
+    def test_concurrent_part_run_refused(self, client):
+        session_data = self._create(client, 8, 4)
+        session = UploadSession.objects.get(pk=session_data["id"])
+        claim_upload_parts(session, [2])
+
+        response = client.put(
+            f"/uploads/sessions/{session_data['id']}/parts/1-2",
+            b"abcdefgh",
+            content_type="application/octet-stream",
+        )
+
+        assert response.status_code == 409
+        assert response.json()["code"] == "part_in_progress"
+        assert list(session.parts.values_list("part_number", flat=True)) == [2]
+
+    def test_complete_with_missing_parts_returns_409(self, client):
+        session = self._create(client, 8, 4)
+        self._put(client, session["id"], 1, b"abcd")
+        response = client.post(f"/uploads/sessions/{session['id']}/complete/")
+        assert response.status_code == 409
+
+    def test_repeated_complete_returns_existing_result(self, client, tmp_path):
+        session = self._create(client, 8, 4)
+        self._put(client, session["id"], 1, b"abcd")
+        self._put(client, session["id"], 2, b"efgh")
+        url = f"/uploads/sessions/{session['id']}/complete/"
+        first = client.post(url)
+        assert first.status_code == 200
+
+        again = client.post(url)
+
+        assert again.status_code == 200
+        assert again.json() == first.json()
+        upload = UploadFile.objects.get(pk=session["file_id"])
+        assert (tmp_path / upload.file.name).read_bytes() == b"abcdefgh"
+
+    def test_complete_aborted_session_returns_409(self, client):
+        session = self._create(client, 8, 4)
+        self._put(client, session["id"], 1, b"abcd")
+        self._put(client, session["id"], 2, b"efgh")
+        UploadSession.objects.filter(pk=session["id"]).update(
+            status=UploadSession.Status.ABORTED
+        )
+
+        response = client.post(f"/uploads/sessions/{session['id']}/complete/")
+
+        assert response.status_code == 409
+        assert response.json()["code"] == "session_closed"
+        upload = UploadFile.objects.get(pk=session["file_id"])
+        assert upload.status == UploadFile.Status.UPLOADING
+
+    def test_other_users_session_is_404(self, client, db, django_user_model):
+        session = self._create(client, 8, 4)
+        other = django_user_model.objects.create_user(
+            username="other", email="other@example.com", password="x"
+        )
+        other_client = Client()
+        other_client.force_login(other)
+        assert self._put(other_client, session["id"], 1, b"abcd").status_code == 404
+
+    def test_complete_verifies_sha256(self, client):
+        session = self._create(client, 8, 4)
+        self._put(client, session["id"], 1, b"abcd")
+        self._put(client, session["id"], 2, b"efgh")
+        url = f"/uploads/sessions/{session['id']}/complete/"
+
+        bad = client.post(url, {"sha256": "0" * 64}, content_type="application/json")
+        assert bad.status_code == 400
+        assert bad.json()["code"] == "checksum_mismatch"
+
+        digest = hashlib.sha256(b"abcdefgh").hexdigest()
+        ok = client.post(url, {"sha256": digest}, content_type="application/json")
+        assert ok.status_code == 200
+        assert UploadFile.objects.get(pk=session["file_id"]).sha256 == digest
+
+    def test_tree_hash_and_part_proof(self, client):
+        session = self._create(client, 8, 4)
+        self._put(client, session["id"], 2, b"efgh")
+        self._put(client, session["id"], 1, b"abcd")
+        proof_url = f"/uploads/sessions/{session['id']}/parts/2/proof/"
+        assert client.get(proof_url).status_code == 409
+
+        digests = [hashlib.sha256(b).hexdigest() for b in (b"abcd", b"efgh")]
+        response = client.post(
+            f"/uploads/sessions/{session['id']}/complete/",
+            {"tree_sha256": tree_root(digests)},
+            content_type="application/json",
+        )
+        assert response.status_code == 200
+        assert response.json()["tree_sha256"] == tree_root(digests)
+
+        proof = client.get(proof_url).json()
+        assert proof["offset_bytes"] == 4
+        assert verify_inclusion(digests[1], 1, 2, proof["proof"], tree_root(digests))
+
+    def test_status_reports_missing_ranges_with_etag(self, client):
+        session = self._create(client, 20, 4)
+        url = f"/uploads/sessions/{session['id']}/"
+        self._put(client, session["id"], 2, b"efgh")
+        self._put(client, session["id"], 3, b"ijkl")
+
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.json()["missing_parts"] == "1,4-5"
+        assert response.json()["bytes_received"] == 8
+        etag = response["ETag"]
+
+        assert client.get(url, headers={"if-none-match": etag}).status_code == 304
+
+        self._put(client, session["id"], 1, b"abcd")
+        changed = client.get(url, headers={"if-none-match": etag})
+        assert changed.status_code == 200
+        assert changed.json()["missing_parts"] == "4-5"
+        assert changed["ETag"] != etag
+
+    def test_part_run_records_many_parts(self, client):
+        session = self._create(client, 18, 4)
+        url = f"/uploads/sessions/{session['id']}/parts/1-5"
+        put = client.put(
+            url, b"abcdefghijklmnopqr", content_type="application/octet-stream"
+        )
+        assert put.status_code == 201
+        assert [p["created"] for p in put.json()["parts"]] == [True] * 5
+
+        status = client.get(f"/uploads/sessions/{session['id']}/").json()
+        assert status["missing_parts"] == ""
+        assert status["completed_parts"] == 5
+        assert status["bytes_received"] == 18
+
+        response = client.post(f"/uploads/sessions/{session['id']}/complete/")
+        assert response.status_code == 200
+        upload = UploadFile.objects.get(pk=session["file_id"])
+        assert upload.file.read() == b"abcdefghijklmnopqr"
+
+    def test_part_run_retry_conflict_and_size(self, client):
+        session = self._create(client, 12, 4)
+        assert self._put(client, session["id"], 2, b"efgh").status_code == 201
+        url = f"/uploads/sessions/{session['id']}/parts/1-2"
+
+        retry = client.put(url, b"abcdefgh", content_type="application/octet-stream")
+        assert retry.status_code == 201
+        assert [p["created"] for p in retry.json()["parts"]] == [True, False]
+
+        conflict = client.put(url, b"abcdzzzz", content_type="application/octet-stream")
+        assert conflict.status_code == 409
+
+        long_body = client.put(
+            f"/uploads/sessions/{session['id']}/parts/3-3",
+            b"ijklm",
+            content_type="application/octet-stream",
+        )
+        assert long_body.status_code == 400
+        out_of_range = client.put(
+            f"/uploads/sessions/{session['id']}/parts/3-4",
+            b"ijkl",
+            content_type="application/octet-stream",
+        )
+        assert out_of_range.json()["code"] == "invalid_part_number"
@@ -0,0 +1,94 @@
+"""Upload handlers that hash, size, and sniff files while the request streams in.
+
+Registered via ``settings.FILE_UPLOAD_HANDLERS`` in place of Django's
+defaults. Each handler attaches ``sha256`` and ``sniffed_content_type``
+to the UploadedFile it produces, so services can skip re-reading the
+file after the request body has been parsed.
+
+Large files land in a ``TemporaryUploadedFile``. With
+``FileSystemStorage``, saving one of those moves the file instead of
+copying it, so the body is read from the socket exactly once.
+"""
+
+import hashlib
+
+from django.core.files.uploadhandler import (
+    MemoryFileUploadHandler,
+    TemporaryFileUploadHandler,
+)
+
+SNIFF_BYTES = 16
+
+# Leading byte signatures for common ingest formats, checked in order.
+MAGIC_SIGNATURES = (
+    (b"%PDF-", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"PK\x03\x04", "application/zip"),
+    (b"\x1f\x8b", "application/gzip"),
+)
+
+
+def sniff_content_type(head):
+    """Guess a MIME type from the first bytes of a file.
+
+    Args:
+        head: Leading bytes of the file (at least ``SNIFF_BYTES`` if
+            the file is that long).
+
+    Returns:
+        A MIME type string, or None if no known signature matches.
+    """
+    for signature, content_type in MAGIC_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+
+class HashingUploadMixin:
+    """Track the SHA-256 and leading bytes of each uploaded file.
+
+    The byte count comes from Django itself (``file_size`` passed to
+    ``file_complete``), so ``UploadedFile.size`` needs no extra pass.
+
+    Subclasses decide whether they own the data via ``is_receiving()``;
+    a handler that passes chunks on to the next handler must not hash
+    them, or the same bytes would be hashed twice.
+    """
+
+    def new_file(self, *args, **kwargs):
+        # Reset before super(): MemoryFileUploadHandler.new_file raises
+        # StopFutureHandlers once it has claimed the file.
+        self._hasher = hashlib.sha256()
+        self._head = b""
+        super().new_file(*args, **kwargs)
+
+    def is_receiving(self):
+        return True
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.is_receiving():
+            self._hasher.update(raw_data)
+            if len(self._head) < SNIFF_BYTES:
+                self._head += raw_data[: SNIFF_BYTES - len(self._head)]
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        if file is not None:
+            file.sha256 = self._hasher.hexdigest()
+            file.sniffed_content_type = sniff_content_type(self._head)
+        return file
+
+
+class HashingMemoryFileUploadHandler(HashingUploadMixin, MemoryFileUploadHandler):
+    """In-memory upload handler (small files) that hashes as data arrives."""
+
+    def is_receiving(self):
+        return self.activated
+
+
+class HashingTemporaryFileUploadHandler(HashingUploadMixin, TemporaryFileUploadHandler):
+    """Temporary-file upload handler (large files) that hashes as data arrives."""
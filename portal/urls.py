@@ -0,0 +1,41 @@
+"""
+URL configuration for the portal upload API.
+
+All URLs are mounted under /uploads/ in boot/urls.py.
+"""
+
+from django.urls import path
+
+from portal import views
+
+app_name = "portal"
+
+urlpatterns = [
+    path("files/", views.upload_files_view, name="upload-files"),
+    path("sessions/", views.create_session_view, name="session-create"),
+    path(
+        "sessions/<uuid:session_id>/",
+        views.session_status_view,
+        name="session-status",
+    ),
+    path(
+        "sessions/<uuid:session_id>/parts/<int:part_number>",
+        views.upload_part_view,
+        name="session-part",
+    ),
+    path(
+        "sessions/<uuid:session_id>/parts/<int:first>-<int:last>",
+        views.upload_part_run_view,
+        name="session-part-run",
+    ),
+    path(
+        "sessions/<uuid:session_id>/parts/<int:part_number>/proof/",
+        views.part_proof_view,
+        name="session-part-proof",
+    ),
+    path(
+        "sessions/<uuid:session_id>/complete/",
+        views.complete_session_view,
+        name="session-complete",
+    ),
+]
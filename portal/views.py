@@ -0,0 +1,469 @@
+"""Async JSON upload API for the portal app.
+
+Served under ASGI (``boot.asgi`` with the uvicorn gunicorn worker), the
+request body is received by the event loop, so a slow client holds a
+coroutine rather than a worker process. Multipart parsing (which runs the
+hashing upload handlers), storage writes, and database writes are pushed
+to threads via ``sync_to_async`` so the event loop is never blocked.
+
+The API authenticates with the Django session cookie, so every unsafe
+(POST/PUT) endpoint is ``csrf_protect``-ed explicitly rather than relying
+on the middleware alone: clients send the ``csrftoken`` cookie value in
+an ``X-CSRFToken`` header.
+"""
+
+import json
+import logging
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.handlers.wsgi import LimitedStream
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.csrf import csrf_protect
+from django.views.decorators.http import (
+    require_GET,
+    require_http_methods,
+    require_POST,
+)
+
+from portal.models import UploadFile, UploadSession
+from portal.services.bitmap import format_ranges, missing_parts
+from portal.services.chunks import part_range, stage_upload_part
+from portal.services.multipart import upload_multipart_part
+from portal.services.sessions import (
+    accept_upload_part,
+    claim_upload_parts,
+    complete_upload_session,
+    record_upload_parts,
+    release_upload_parts,
+    start_upload_session,
+    upload_part_proof,
+)
+from portal.services.uploads import (
+    create_batch,
+    finalize_batch,
+    prepare_upload_files,
+    record_upload_files,
+)
+
+logger = logging.getLogger(__name__)
+
+MAX_FILES_PER_REQUEST = 10
+MAX_PARTS_PER_REQUEST = 1000
+# ValidationError codes that describe a state conflict rather than bad input
+CONFLICT_CODES = {
+    "session_closed",
+    "session_completing",
+    "part_conflict",
+    "part_in_progress",
+}
+
+
+def _get_files(request):
+    # Accessing request.FILES triggers multipart parsing
+    return request.FILES.getlist("files")
+
+
+def _error_response(exc):
+    status = 409 if exc.code in CONFLICT_CODES else 400
+    return JsonResponse({"error": exc.messages[0], "code": exc.code}, status=status)
+
+
+def _unauthorized():
+    return JsonResponse({"error": "Authentication required."}, status=401)
+
+
+def _not_found():
+    return JsonResponse({"error": "Upload session not found."}, status=404)
+
+
+def _get_session(user, session_id):
+    return (
+        UploadSession.objects.select_related("file")
+        .filter(pk=session_id, file__uploaded_by=user)
+        .first()
+    )
+
+
+def _serialize_session(session):
+    return {
+        "id": str(session.pk),
+        "file_id": str(session.file_id),
+        "status": session.status,
+        "total_size_bytes": session.total_size_bytes,
+        "chunk_size_bytes": session.chunk_size_bytes,
+        "total_parts": session.total_parts,
+        "completed_parts": session.completed_parts,
+        "bytes_received": session.bytes_received,
+        "tree_sha256": session.tree_sha256,
+    }
+
+
+def _serialize_upload(upload):
+    return {
+        "id": str(upload.pk),
+        "original_filename": upload.original_filename,
+        "status": upload.status,
+        "content_type": upload.content_type,
+        "size_bytes": upload.size_bytes,
+        "sha256": upload.sha256,
+        "tree_sha256": upload.tree_sha256,
+        "error_message": upload.error_message,
+    }
+
+
+@require_POST
+@csrf_protect
+async def upload_files_view(request):
+    """Accept a multipart upload (field ``files``) and store it as a batch.
+
+    Files are prepared on ``prepare_upload_files()``'s pool, so at most
+    ``FILE_UPLOAD_WORKERS`` threads hash and store them per request.
+
+    The body is not read in a single pass: ``ASGIHandler`` spools it to a
+    temporary file before the view runs, and parsing then copies each
+    file part once more through the hashing upload handlers.
+
+    Returns:
+        201 with the batch and per-file results, 400 for a missing or
+        oversized file list, 401 when not authenticated.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _unauthorized()
+
+    # Parsing streams the spooled body through the hashing upload handlers
+    files = await sync_to_async(_get_files, thread_sensitive=False)(request)
+    if not files:
+        return JsonResponse({"error": "No files selected."}, status=400)
+    if len(files) > MAX_FILES_PER_REQUEST:
+        return JsonResponse(
+            {"error": f"Maximum {MAX_FILES_PER_REQUEST} files per upload."},
+            status=400,
+        )
+
+    # Validation, hashing, and storage writes: the FILE_UPLOAD_WORKERS pool
+    prepared = await sync_to_async(prepare_upload_files, thread_sensitive=False)(files)
+
+    # Database writes: Django's thread-sensitive executor
+    batch = await sync_to_async(create_batch)(user)
+    uploads = await sync_to_async(record_upload_files)(user, prepared, batch=batch)
+    batch = await sync_to_async(finalize_batch)(batch)
+
+    stored = sum(1 for u in uploads if u.status == UploadFile.Status.STORED)
+    logger.info(
+        "Async upload complete: batch=%s stored=%d failed=%d",
+        batch.pk,
+        stored,
+        len(uploads) - stored,
+    )
+    return JsonResponse(
+        {
+            "batch_id": str(batch.pk),
+            "status": batch.status,
+            "files": [_serialize_upload(u) for u in uploads],
+        },
+        status=201,
+    )
+
+
+@require_POST
+@csrf_protect
+async def create_session_view(request):
+    """Start a chunked upload session.
+
+    Expects a JSON body ``{"filename": str, "size_bytes": int,
+    "chunk_size_bytes": int (optional)}``.
+
+    Returns:
+        201 with the session, 400 for invalid input, 401 when not
+        authenticated.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _unauthorized()
+
+    try:
+        data = json.loads(request.body)
+        filename = str(data["filename"])
+        size_bytes = int(data["size_bytes"])
+        chunk_size_bytes = data.get("chunk_size_bytes")
+        if chunk_size_bytes is not None:
+            chunk_size_bytes = int(chunk_size_bytes)
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse(
+            {"error": "Expected JSON with filename and size_bytes."}, status=400
+        )
+
+    try:
+        session = await sync_to_async(start_upload_session)(
+            user, filename, size_bytes, chunk_size_bytes
+        )
+    except ValidationError as exc:
+        return _error_response(exc)
+    return JsonResponse(_serialize_session(session), status=201)
+
+
+def _session_etag(session):
+    # completed_parts moves with every newly set bit in received_parts
+    return f'"{session.pk.hex}-{session.status}-{session.completed_parts}"'
+
+
+@require_GET
+async def session_status_view(request, session_id):
+    """Report a session's progress so an interrupted client can resume.
+
+    Missing parts come from the session's ``received_parts`` bitmap, never
+    from ``UploadPart`` rows, and are range-encoded (``"1-40,57,90-120"``).
+    Responses carry an ETag; a matching ``If-None-Match`` returns 304.
+
+    Returns:
+        200 with the session and ``missing_parts``, 304 when unchanged,
+        404 for an unknown session.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _unauthorized()
+
+    session = await sync_to_async(_get_session)(user, session_id)
+    if session is None:
+        return _not_found()
+
+    etag = _session_etag(session)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        data = _serialize_session(session)
+        data["missing_parts"] = format_ranges(
+            missing_parts(bytes(session.received_parts), session.total_parts)
+        )
+        response = JsonResponse(data)
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@require_http_methods(["PUT"])
+@csrf_protect
+async def upload_part_view(request, session_id, part_number):
+    """Receive one part as a raw ``application/octet-stream`` body.
+
+    The bytes are written at the part's offset in the session's
+    preallocated staging file on a worker thread (or, on S3, sent as a
+    multipart part), so parts may arrive out of order and concurrently.
+    The part is claimed (``claim_upload_parts()``) before any byte is
+    written, so concurrent uploads of the same part cannot overwrite
+    each other.
+
+    Returns:
+        201 when the part is new, 200 for an identical retry, 400 for a
+        bad part number or size, 404 for an unknown session, 409 when the
+        session is closed, the part was received with other content, or
+        another request is uploading it.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _unauthorized()
+
+    session = await sync_to_async(_get_session)(user, session_id)
+    if session is None:
+        return _not_found()
+
+    try:
+        # Only the request holding the part's claim writes its bytes
+        claims = await sync_to_async(claim_upload_parts)(session, [part_number])
+        claim = claims["claimed"].get(part_number)
+        try:
+            if claim is None:
+                # A retried part is only hashed and compared, never rewritten
+                staged = await sync_to_async(stage_upload_part, thread_sensitive=False)(
+                    session, part_number, request, write=False
+                )
+            elif session.multipart_upload_id:
+                # S3: the part goes straight to the open multipart upload
+                staged = await sync_to_async(
+                    upload_multipart_part, thread_sensitive=False
+                )(session, part_number, request)
+            else:
+                staged = await sync_to_async(stage_upload_part, thread_sensitive=False)(
+                    session, part_number, request
+                )
+            part, created = await sync_to_async(accept_upload_part)(
+                session, staged, claim=claim
+            )
+        except BaseException:
+            if claim is not None:
+                await sync_to_async(release_upload_parts)([claim])
+            raise
+    except ValidationError as exc:
+        return _error_response(exc)
+
+    return JsonResponse(
+        {
+            "part_number": part.part_number,
+            "offset_bytes": part.offset_bytes,
+            "size_bytes": part.size_bytes,
+            "sha256": part.sha256,
+        },
+        status=201 if created else 200,
+    )
+
+
+def _stage_part_run(session, first, last, stream, claimed):
+    """Stage parts first..last from one concatenated body, in order.
+
+    Does not touch the database. Only the parts in ``claimed`` are
+    written; the others were already received and are only hashed and
+    compared.
+    """
+    staged_parts = []
+    for part_number in range(first, last + 1):
+        _offset, size = part_range(session, part_number)
+        part_stream = LimitedStream(stream, size)
+        if session.multipart_upload_id and part_number in claimed:
+            staged = upload_multipart_part(session, part_number, part_stream)
+        else:
+            staged = stage_upload_part(
+                session, part_number, part_stream, write=part_number in claimed
+            )
+        staged_parts.append(staged)
+    if stream.read(1):
+        raise ValidationError(
+            f"Body is longer than parts {first}-{last}.", code="invalid_part_size"
+        )
+    return staged_parts
+
+
+@require_http_methods(["PUT"])
+@csrf_protect
+async def upload_part_run_view(request, session_id, first, last):
+    """Receive a contiguous run of parts as one raw body.
+
+    The body is parts ``first..last`` concatenated. Each part is staged
+    (or sent to S3) and hashed on its own, then the whole run is recorded
+    with one INSERT and one session UPDATE, so clients using small chunks
+    pay for database writes per request rather than per part.
+
+    Returns:
+        201 when any part is new, 200 when every part was an identical
+        retry, 400 for a bad range or body size, 404 for an unknown
+        session, 409 when the session is closed, a part conflicts, or
+        another request is uploading one of the parts.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _unauthorized()
+
+    session = await sync_to_async(_get_session)(user, session_id)
+    if session is None:
+        return _not_found()
+    if not 1 <= first <= last or last - first >= MAX_PARTS_PER_REQUEST:
+        return JsonResponse(
+            {"error": f"Expected a range of up to {MAX_PARTS_PER_REQUEST} parts."},
+            status=400,
+        )
+
+    try:
+        claims = await sync_to_async(claim_upload_parts)(
+            session, range(first, last + 1)
+        )
+        claimed = claims["claimed"]
+        try:
+            staged_parts = await sync_to_async(_stage_part_run, thread_sensitive=False)(
+                session, first, last, request, claimed
+            )
+            results = await sync_to_async(record_upload_parts)(
+                session, staged_parts, claims=claimed
+            )
+        except BaseException:
+            await sync_to_async(release_upload_parts)(claimed.values())
+            raise
+    except ValidationError as exc:
+        return _error_response(exc)
+
+    return JsonResponse(
+        {
+            "parts": [
+                {
+                    "part_number": part.part_number,
+                    "size_bytes": part.size_bytes,
+                    "sha256": part.sha256,
+                    "created": created,
+                }
+                for part, created in results
+            ]
+        },
+        status=201 if any(created for _part, created in results) else 200,
+    )
+
+
+@require_POST
+@csrf_protect
+async def complete_session_view(request, session_id):
+    """Complete a chunked upload session once every part is received.
+
+    An optional JSON body ``{"sha256": str, "tree_sha256": str}`` (either
+    key optional) verifies the whole file while it is assembled, and/or
+    the Merkle tree hash over the received parts' SHA-256s.
+
+    Returns:
+        200 with the session (also for a session already completed), 400
+        on a checksum or tree hash mismatch, 404 for an unknown session,
+        409 when parts are still missing, another request is completing
+        the session, or the session failed or was aborted.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _unauthorized()
+
+    session = await sync_to_async(_get_session)(user, session_id)
+    if session is None:
+        return _not_found()
+
+    expected = {}
+    if request.content_type == "application/json" and request.body:
+        try:
+            data = json.loads(request.body)
+            for key in ("sha256", "tree_sha256"):
+                if data.get(key):
+                    expected[f"expected_{key}"] = str(data[key])
+        except (ValueError, AttributeError):
+            return JsonResponse(
+                {"error": "Expected JSON with sha256 or tree_sha256."}, status=400
+            )
+
+    try:
+        session = await sync_to_async(complete_upload_session)(session, **expected)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=409)
+    except ValidationError as exc:
+        return _error_response(exc)
+    return JsonResponse(_serialize_session(session))
+
+
+@require_GET
+async def part_proof_view(request, session_id, part_number):
+    """Return a Merkle inclusion proof for one part of a completed session.
+
+    Lets a consumer verify a single byte range of the file against the
+    session's ``tree_sha256`` without downloading the rest.
+
+    Returns:
+        200 with the proof, 400 for a bad part number, 404 for an unknown
+        session, 409 when the session has no tree hash yet.
+    """
+    user = await request.auser()
+    if not user.is_authenticated:
+        return _unauthorized()
+
+    session = await sync_to_async(_get_session)(user, session_id)
+    if session is None:
+        return _not_found()
+
+    try:
+        proof = await sync_to_async(upload_part_proof)(session, part_number)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=409)
+    except ValidationError as exc:
+        return _error_response(exc)
+    return JsonResponse(proof)